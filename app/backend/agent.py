@@ -1,31 +1,33 @@
-from langchain_ollama import OllamaLLM as Ollama
-from langchain.prompts import PromptTemplate
-from comparator import compare_skills
-from job_parser import fetch_and_clean, search_jobs
-from vectorstore import build_vector_store, top_k
-from chunker import chunk_text
-import os
-import time
+from comparator import retrieve_evidence
+from skills import extract_skills
+from job_parser import fetch_stream, search_jobs
+from vectorstore import build_vector_store
+from chunker import chunk_text, chunk_texts
+from registry import get_embeddings, get_llm, get_llm_cache, get_session_store
+from llm_cache import response_key, response_scope
+from context_builder import EVIDENCE_CANDIDATES, count_tokens, prompt_budget, select_evidence
+from scoring import score_cv
+from health import health_monitor
+from market_profiles import load_profile
+from sessions import (SESSION_DELTA_MAX_CHANGE, SESSIONS_ENABLED, cv_digest, cv_sections, describe_changes,
+                      diff_sections, merge_report)
+from observability import CHUNKS, GENERATED_TOKENS, PROMPT_TOKENS, get_logger, span
+import numpy as np
 from dotenv import load_dotenv
 
 load_dotenv()
 
-Tavily_API_KEY = os.getenv("TAVILY_API_KEY")
-if not Tavily_API_KEY:
-    raise ValueError("TAVILY_API_KEY environment variable is not set.")
+logger = get_logger(__name__)
 
-GAP_PROMPT = PromptTemplate.from_template("""
+# Static instructions come first and the per-request inputs last, so every
+# prompt shares one long prefix that Ollama can serve from its KV cache.
+# A plain str.format template: LangChain's PromptTemplate cost ~1s of import time
+GAP_PROMPT = """
 You are an **expert career mentor, hiring manager, and skills analyst**.  
 Your goal is to help the candidate close the gap between their current skills and the target role.  
 
-Analyze the following information carefully:
-
-**TARGET ROLE:** {role}  
-**CANDIDATE SKILLS FROM CV:** {cv_skills}  
-**RELEVANT JOB DESCRIPTION EXCERPTS:**  
-{jd_evidence}
-
----
+You will be given the target role, the candidate's skills extracted from their CV, and
+excerpts from real job descriptions for the role. Analyze them carefully.
 
 ### 🔎 Your Task
 Provide a **detailed, structured analysis** in the following format:
@@ -67,211 +69,511 @@ Provide a **detailed, structured analysis** in the following format:
 - Prioritize skills/tools that recur across multiple job descriptions.  
 - Keep the tone professional but encouraging — as if guiding a motivated job seeker.  
 - Where possible, suggest **concrete resources** (platforms, project ideas, or certifications).
-""")
+
+---
+
+**TARGET ROLE:** {role}  
+**CANDIDATE SKILLS FROM CV:** {cv_skills}  
+**RELEVANT JOB DESCRIPTION EXCERPTS:**  
+{jd_evidence}
+"""
+
+# Revision of an earlier report after the candidate edited their CV; the model
+# writes only the sections that change and merge_report splices them in
+DELTA_PROMPT = """
+You are an **expert career mentor, hiring manager, and skills analyst**.  
+Earlier you wrote the skills-gap report below for this candidate. They have since revised their CV.
+
+### 🔎 Your Task
+Update the report for the revised CV **without rewriting all of it**:
+- Start with a `## 🔄 What Changed` section: how the revisions move the candidate closer to (or further from) the target role.
+- Then rewrite **only** the report sections the revisions affect, each under exactly the same `## ` heading as in the previous report.
+- Leave out every section that is still accurate; it is kept as it was.
+- Base every claim on the skills, CV revisions and job description excerpts below.
+
+---
+
+**TARGET ROLE:** {role}  
+**CANDIDATE SKILLS FROM REVISED CV:** {cv_skills}  
+**SKILLS GAINED SINCE THE LAST VERSION:** {skills_added}  
+**SKILLS NO LONGER ON THE CV:** {skills_removed}  
+
+**CV REVISIONS:**  
+{changes}
+
+**ADDITIONAL JOB DESCRIPTION EXCERPTS:**  
+{jd_evidence}
+
+**PREVIOUS REPORT:**  
+{previous_report}
+"""
 
 def test_vector_store_connection():
     """Test if vector store service is available"""
-    try:
-        # Try to build a minimal vector store to test connection
-        test_chunks = ["test content for vector store connection"]
-        vs = build_vector_store(test_chunks)
-        print("✅ Vector store connection successful")
-        return True
-    except Exception as e:
-        print(f"❌ Vector store connection failed: {e}")
-        return False
+    entry = health_monitor.check("vector_store")
+    if entry["healthy"]:
+        logger.info("✅ Vector store connection successful")
+    else:
+        logger.error(f"❌ Vector store connection failed: {entry['error']}")
+    return entry["healthy"]
 
 def test_ollama_connection():
     """Test if Ollama service is available"""
-    try:
-        ollama_base_url = os.getenv("OLLAMA_BASE_URL")
-        model_name = os.getenv("OLLAMA_MODEL")
-        
-        llm = Ollama(
-            model=model_name,
-            base_url=ollama_base_url,
-            temperature=0.1
-        )
+    entry = health_monitor.check("ollama")
+    if entry["healthy"]:
+        logger.info("✅ Ollama connection successful")
+    else:
+        logger.error(f"❌ Ollama connection failed: {entry['error']}")
+    return entry["healthy"]
+
+def stage_event(stage: str, status: str, **details) -> dict:
+    return {"event": "stage", "stage": stage, "status": status, **details}
+
+def normalise_search_results(raw_jds) -> list:
+    """Turn whatever the search returned (dict, list or scalar) into a list of results"""
+    if isinstance(raw_jds, dict):
+        values = list(raw_jds.values())
+        if values and all(isinstance(v, dict) for v in values):
+            return values
+        keys = list(raw_jds.keys())
+        if keys and all(isinstance(k, str) and (k.startswith("http") or k.startswith("www")) for k in keys):
+            return keys
+        return [str(v) for v in values]
+    if isinstance(raw_jds, list):
+        return raw_jds
+    return [raw_jds] if raw_jds else []
+
+def split_search_results(norm_jds: list):
+    """Separate results that already carry JD text from those that need fetching"""
+    jd_texts = []
+    pending_urls = []
+    for i, jd in enumerate(norm_jds):
+        url = None
+        if isinstance(jd, dict):
+            url = jd.get("url") or jd.get("link") or jd.get("job_url") or jd.get("href") or jd.get("apply_link")
+            # Check if content is already available
+            existing_text = jd.get("html") or jd.get("description") or jd.get("text") or jd.get("body") or jd.get("content")
+            if existing_text and isinstance(existing_text, str) and len(existing_text.strip()) > 100:
+                jd_texts.append(existing_text.strip())
+                logger.info(f"✅ Used existing content for JD[{i}]")
+                continue
+        elif isinstance(jd, str):
+            url = jd.strip()
         
-        # Test with a simple prompt
-        response = llm.invoke("Hello, this is a connection test.")
-        print("✅ Ollama connection successful")
-        return True
+        if not url:
+            logger.warning(f"⚠️ Skipping JD[{i}] - no URL found")
+            continue
+        pending_urls.append(url)
+    return jd_texts, pending_urls
+
+def chunk_job_descriptions(jd_texts: list) -> list:
+    try:
+        batches = chunk_texts(jd_texts)
     except Exception as e:
-        print(f"❌ Ollama connection failed: {e}")
-        return False
+        logger.warning(f"⚠️ Batched chunking failed, chunking one by one: {e}")
+        batches = []
+        for jd in jd_texts:
+            try:
+                batches.append(chunk_text(jd))
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to chunk a job description: {e}")
+                # Add as single chunk if chunking fails
+                batches.append([jd])
+    return [chunk for chunks in batches for chunk in chunks]
 
-def run_agent(cv_text: str, role: str, use_fallback_on_failure: bool = True):
+def build_gap_prompt(role: str, cv_skills: list, jd_evidence: list) -> str:
+    return GAP_PROMPT.format(
+        role=role,
+        cv_skills=", ".join(cv_skills) if cv_skills else "Skills analysis pending - please review CV content",
+        jd_evidence="\n\n".join(jd_evidence) if jd_evidence else f"Job market analysis for {role} position"
+    )
+
+def assemble_gap_prompt(role: str, cv_skills: list, candidates: list, query_vector=None) -> dict:
     """
-    Enhanced version with better error handling and fallback mechanisms
+    Pick diverse, de-duplicated evidence from `candidates` (MMR when a query
+    vector is given) and pack it into the model's prompt budget.
+    Returns the selection plus the final prompt and its token count.
     """
-    print(f"🚀 Starting analysis for role: {role}")
+    base_tokens = count_tokens(build_gap_prompt(role, cv_skills, []))
+    candidate_vectors = None
+    if query_vector is not None and candidates:
+        # Chunks were just embedded for the index, so these come from the embedding cache
+        candidate_vectors = get_embeddings().embed_documents(candidates)
     
-    # Test connections first
-    vector_store_available = test_vector_store_connection()
-    ollama_available = test_ollama_connection()
-    
-    if not ollama_available:
-        return "⚠️ Ollama service is not available. Please ensure Ollama is running and the specified model is installed."
-    
-    jd_texts = []
+    selection = select_evidence(candidates, prompt_budget() - base_tokens, query_vector, candidate_vectors)
+    prompt = build_gap_prompt(role, cv_skills, selection["evidence"])
+    selection["prompt"] = prompt
+    selection["prompt_tokens"] = count_tokens(prompt)
+    return selection
+
+def build_delta_prompt(role: str, cv_skills: list, previous: dict, changes: str, jd_evidence: list) -> str:
+    previous_skills = set(previous["cv_skills"])
+    return DELTA_PROMPT.format(
+        role=role,
+        cv_skills=", ".join(cv_skills) if cv_skills else "None detected",
+        skills_added=", ".join(s for s in cv_skills if s not in previous_skills) or "None",
+        skills_removed=", ".join(s for s in previous["cv_skills"] if s not in set(cv_skills)) or "None",
+        changes=changes,
+        jd_evidence="\n\n".join(jd_evidence) if jd_evidence else "No new excerpts",
+        previous_report=previous["report"],
+    )
+
+def assemble_delta_prompt(role: str, cv_skills: list, previous: dict, changes: str, candidates: list,
+                          query_vector=None):
+    """
+    Like assemble_gap_prompt for a report revision: only evidence the previous
+    report didn't already see is added, within what the previous report and
+    the CV changes leave of the budget. None when those alone don't fit.
+    `previous["evidence"]` holds the raw chunks behind the previous report
+    (selection "sources"), so they compare equal to today's candidates.
+    """
+    base_tokens = count_tokens(build_delta_prompt(role, cv_skills, previous, changes, []))
+    if base_tokens > prompt_budget():
+        return None
+    seen = set(previous["evidence"])
+    fresh = [c for c in candidates if c not in seen]
+    fresh_vectors = get_embeddings().embed_documents(fresh) if query_vector is not None and fresh else None
+
+    selection = select_evidence(fresh, prompt_budget() - base_tokens, query_vector, fresh_vectors)
+    prompt = build_delta_prompt(role, cv_skills, previous, changes, selection["evidence"])
+    selection.update(prompt=prompt, prompt_tokens=count_tokens(prompt), template=DELTA_PROMPT,
+                     key_parts=[previous["report"], changes])
+    return selection
+
+def report_cache_entry(role: str, cv_skills: list, context: dict):
+    """Cache scope, exact key and (for semantic lookups) the mean evidence vector of a prompt."""
+    scope = response_scope(get_llm().model, context.get("template", GAP_PROMPT), role, cv_skills)
+    key = response_key(scope, context["evidence"] + context.get("key_parts", []))
+    vector = None
+    # A revision depends on more than its evidence, so it only ever hits exactly
+    if get_llm_cache().semantic and context["evidence"] and not context.get("key_parts"):
+        try:
+            vector = np.mean(get_embeddings().embed_documents(context["evidence"]), axis=0)
+        except Exception as e:
+            logger.warning(f"⚠️ Semantic cache lookup skipped: {e}")
+    return scope, key, vector
+
+def generate_report(role: str, cv_skills: list, context: dict) -> dict:
+    """Blocking generation through the response cache; returns {"report", "cached"}."""
+    cache = get_llm_cache()
+    scope, key, vector = report_cache_entry(role, cv_skills, context)
+    hit = cache.get(scope, key, vector)
+    if hit:
+        return {"report": hit["response"], "cached": True}
+
+    PROMPT_TOKENS.observe(context["prompt_tokens"])
+    with span("generate", prompt_tokens=context["prompt_tokens"], streamed=False) as s:
+        report = get_llm().invoke(context["prompt"])
+    cache.put(scope, key, report, s["seconds"], vector)
+    return {"report": report, "cached": False}
+
+def iter_live_market_events(role: str, jd_texts: list):
+    """Search and scrape the job market for `role`, appending cleaned JDs to `jd_texts`."""
+    # Try to fetch job descriptions
+    logger.info("🔍 Searching for job descriptions...")
+    yield stage_event("search", "start")
+    with span("search", role=role) as s:
+        try:
+            raw_jds = search_jobs(role)
+            norm_jds = normalise_search_results(raw_jds)
+        except Exception as e:
+            logger.error(f"❌ Error searching for jobs: {e}")
+            norm_jds = []
+        s["results"] = len(norm_jds)
+    yield stage_event("search", "done", **s)
     
-    # 1) Try to fetch job descriptions
-    print("🔍 Searching for job descriptions...")
-    try:
-        raw_jds = search_jobs(role)
-        print(f"Found {len(raw_jds)} job search results")
+    # Fetch and clean job descriptions
+    yield stage_event("fetch", "start", urls=len(norm_jds))
+    with span("fetch") as s:
+        found_texts, pending_urls = split_search_results(norm_jds)
+        jd_texts.extend(found_texts)
+        s.update(urls=len(pending_urls), inline=len(found_texts))
         
-        if isinstance(raw_jds, dict):
-            values = list(raw_jds.values())
-            if values and all(isinstance(v, dict) for v in values):
-                norm_jds = values
-            else:
-                keys = list(raw_jds.keys())
-                if keys and all(isinstance(k, str) and (k.startswith("http") or k.startswith("www")) for k in keys):
-                    norm_jds = keys
+        # Fetch remaining URLs concurrently; results arrive in completion order
+        try:
+            for i, url, text in fetch_stream(pending_urls):
+                ok = bool(text and len(text.strip()) > 100)
+                if ok:
+                    jd_texts.append(text)
                 else:
-                    norm_jds = [str(v) for v in values]
-        elif isinstance(raw_jds, list):
-            norm_jds = raw_jds
-        else:
-            norm_jds = [raw_jds] if raw_jds else []
-        
+                    logger.warning(f"⚠️ {url[:50]} returned insufficient content")
+                yield stage_event("fetch", "progress", url=url, ok=ok)
+        except Exception as e:
+            logger.error(f"❌ Failed to fetch job descriptions: {e}")
+        s["fetched"] = len(jd_texts)
+    
+    logger.info(f"📊 Successfully processed {len(jd_texts)} out of {len(norm_jds)} job descriptions")
+    yield stage_event("fetch", "done", fetched=len(jd_texts), seconds=s["seconds"])
+
+def load_session_run(session_id: str, role: str):
+    """The session's previous run for `role`, or None; the session store is best effort."""
+    if not (session_id and SESSIONS_ENABLED):
+        return None
+    try:
+        return get_session_store().latest(session_id, role)
     except Exception as e:
-        print(f"❌ Error searching for jobs: {e}")
-        norm_jds = []
+        logger.warning(f"⚠️ Session lookup failed, running a full analysis: {e}")
+        return None
+
+def save_session_run(session_id: str, role: str, state: dict):
+    if not (session_id and SESSIONS_ENABLED):
+        return
+    try:
+        get_session_store().save(session_id, role, state)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not save session state: {e}")
+
+def iter_agent_events(cv_text: str, role: str, skip_llm: bool = False, session_id: str = None):
+    """
+    Run the analysis pipeline as a stream of events:
+    stage events for search, fetch, chunk, embed (or one profile event for roles
+    with a precomputed market profile), retrieve and score, then one
+    token event per generated LLM chunk, then a final done (or error) event.
+    With skip_llm the done event carries only the score and no report.
+    Every stage is also timed as a span and recorded in the stage histogram.
+
+    With a `session_id`, a revised CV is diffed against the session's previous
+    run for the role (see sessions.py): a session event replaces search and
+    fetch, only new or edited CV text is embedded, and the LLM streams a delta
+    that is merged into the previous report in the done event.
+    """
+    logger.info(f"🚀 Starting analysis for role: {role}")
     
-    # 2) Fetch and clean job descriptions
-    print("📄 Processing job descriptions...")
-    successful_fetches = 0
-    for i, jd in enumerate(norm_jds):
-        url = None
-        try:
-            if isinstance(jd, dict):
-                url = jd.get("url") or jd.get("link") or jd.get("job_url") or jd.get("href") or jd.get("apply_link")
-                # Check if content is already available
-                existing_text = jd.get("html") or jd.get("description") or jd.get("text") or jd.get("body") or jd.get("content")
-                if existing_text and isinstance(existing_text, str) and len(existing_text.strip()) > 100:
-                    jd_texts.append(existing_text.strip())
-                    successful_fetches += 1
-                    print(f"✅ Used existing content for JD[{i}]")
-                    continue
-            elif isinstance(jd, str):
-                url = jd.strip()
-            
-            if not url:
-                print(f"⚠️ Skipping JD[{i}] - no URL found")
-                continue
-            
-            print(f"🌐 Fetching JD[{i}] from {url[:50]}...")
-            text = fetch_and_clean(url)
-            if text and len(text.strip()) > 100:
-                jd_texts.append(text)
-                successful_fetches += 1
-                print(f"✅ Successfully fetched JD[{i}]")
-            else:
-                print(f"⚠️ JD[{i}] returned insufficient content")
-                
-            # Add delay between requests
-            if i < len(norm_jds) - 1:  # Don't delay after the last request
-                time.sleep(1)
-                
-        except Exception as e:
-            print(f"❌ Failed to fetch JD[{i}] from {url}: {e}")
-            continue
+    cv_hash = cv_digest(cv_text)
+    sections = cv_sections(cv_text)
+    previous = load_session_run(session_id, role)
+    diff = diff_sections(previous["sections"], sections) if previous else None
     
-    print(f"📊 Successfully processed {successful_fetches} out of {len(norm_jds)} job descriptions")
+    # The same CV again (sections at most reordered): the previous result stands
+    if previous and not (diff["added"] or diff["changed"] or diff["removed"]) and (previous["report"] or skip_llm):
+        get_session_store().record("reused")
+        yield stage_event("session", "done", reused=True, changed_sections=0)
+        yield stage_event("score", "done", score=previous["score"], seconds=0.0)
+        if not skip_llm:
+            yield {"event": "token", "text": previous["report"]}
+        yield {"event": "done", "report": None if skip_llm else previous["report"], "score": previous["score"],
+               "cached": True, "incremental": True}
+        return
     
-    # 3) Use fallback content if needed
+    # Read cached health status; probes run in the background, never per request
+    vector_store_available = health_monitor.is_available("vector_store")
+    ollama_available = health_monitor.is_available("ollama")
+    
+    if not ollama_available and not skip_llm:
+        yield {"event": "error", "message": "⚠️ Ollama service is not available. Please ensure Ollama is running and the specified model is installed."}
+        return
+    
+    # 1) A precomputed market profile for known roles; the session's market for a
+    #    revised CV; live search and scraping otherwise
+    with span("profile") as s:
+        profile = load_profile(role)
+        s["found"] = bool(profile)
+    market = previous["market"] if previous else {}
+    reused_chunks = None
+    jd_texts = []
+    if profile:
+        jd_texts = list(profile["jd_texts"])
+        logger.info(f"📦 Using market profile {profile['version']} for {role}")
+        yield stage_event("profile", "done", version=profile["version"], jds=len(jd_texts),
+                          chunks=len(profile["chunks"]), seconds=s["seconds"])
+    elif market.get("jd_texts"):
+        jd_texts = list(market["jd_texts"])
+        reused_chunks = market.get("chunks")
+        logger.info(f"♻️ Re-analysing a revised CV: {len(diff['added']) + len(diff['changed'])} sections "
+                    f"changed, reusing {len(jd_texts)} JDs from the session")
+        yield stage_event("session", "done", reused=False, jds=len(jd_texts),
+                          changed_sections=len(diff["added"]) + len(diff["changed"]),
+                          removed_sections=len(diff["removed"]), changed_share=diff["changed_share"])
+    else:
+        yield from iter_live_market_events(role, jd_texts)
+    # Query rankings index into the chunk list, so they carry over only onto the same chunks
+    same_index = bool(previous) and (reused_chunks is not None or
+                                     bool(profile) and market.get("profile") == profile["version"])
+    known_rankings = previous.get("rankings") if same_index else None
+    
+    # 2) Use fallback content if needed
     if not jd_texts:
-        print("⚠️ Could not fetch any job descriptions. Please try a different role")
+        logger.warning("⚠️ Could not fetch any job descriptions. Please try a different role")
     
-    # 4) Process with vector store (if available) or use simple text matching
+    # 3) Process with vector store (if available) or use simple text matching
     cv_skills = []
     jd_evidence = []
+    query_vector = None
+    vs = None
+    chunks = None
+    rankings = {}
     
     if vector_store_available:
         try:
-            print("🧠 Building vector store...")
-            chunks = []
-            for jd in jd_texts:
-                try:
-                    chunks.extend(chunk_text(jd))
-                except Exception as e:
-                    print(f"⚠️ Failed to chunk a job description: {e}")
-                    # Add as single chunk if chunking fails
-                    chunks.append(jd)
-            
-            vs = build_vector_store(chunks)
-            print("✅ Vector store built successfully")
+            if profile:
+                # Chunks were embedded offline; the index loads with the profile
+                vs = profile["index"]
+            else:
+                if reused_chunks is not None:
+                    chunks = reused_chunks
+                else:
+                    yield stage_event("chunk", "start")
+                    with span("chunk", jds=len(jd_texts)) as s:
+                        chunks = chunk_job_descriptions(jd_texts)
+                        s["chunks"] = len(chunks)
+                    CHUNKS.observe(len(chunks))
+                    yield stage_event("chunk", "done", **s)
+                
+                yield stage_event("embed", "start")
+                with span("embed", chunks=len(chunks)) as s:
+                    # Session chunks are all in the embedding cache; rankings need the in-memory index
+                    vs = build_vector_store(chunks, mode="ephemeral" if session_id else None)
+                yield stage_event("embed", "done", seconds=s["seconds"])
             
             # Compare skills using vector store
-            cv_skills, jd_evidence = compare_skills(cv_text, vs, role)
-            print(f"🎯 Found {len(cv_skills)} matching skills and {len(jd_evidence)} evidence pieces")
+            yield stage_event("retrieve", "start")
+            with span("retrieve") as s:
+                query_vector = get_embeddings().embed_query(cv_text)
+                cv_skills = extract_skills(cv_text)
+                retrieved = retrieve_evidence(cv_text, vs, cv_skills, k=EVIDENCE_CANDIDATES,
+                                              query_vector=query_vector, known_rankings=known_rankings)
+                jd_evidence = retrieved["evidence"]
+                rankings = retrieved["rankings"]
+                s.update(skills=len(cv_skills), evidence=len(jd_evidence), queries=retrieved["queries"],
+                         embedded=retrieved["embedded"])
+            yield stage_event("retrieve", "done", **s)
             
         except Exception as e:
-            print(f"❌ Vector store processing failed: {e}")
+            logger.error(f"❌ Vector store processing failed: {e}")
             vector_store_available = False
     
     if not vector_store_available:
-        print("🔄 Using simple text analysis (vector store unavailable)")
+        logger.warning("🔄 Using simple text analysis (vector store unavailable)")
         # Simple fallback: extract key terms from CV and JDs
         cv_skills = extract_simple_skills(cv_text)
-        jd_evidence = [jd[:500] + "..." if len(jd) > 500 else jd for jd in jd_texts[:3]]
+        jd_evidence = [jd[:500] + "..." if len(jd) > 500 else jd for jd in jd_texts]
+        yield stage_event("retrieve", "done", skills=len(cv_skills), evidence=len(jd_evidence), fallback=True)
+    
+    # Deterministic score: milliseconds, and the same answer every time for the same inputs
+    with span("score") as s:
+        score = score_cv(cv_skills, jd_texts, vs, query_vector, demand=profile["demand"] if profile else None)
+        s.update(score=score["score"], matched=len(score["matched"]), missing=len(score["missing"]))
+    yield stage_event("score", "done", score=score, seconds=s["seconds"])
+    
+    run_state = {
+        "cv_hash": cv_hash,
+        "sections": sections,
+        "cv_skills": cv_skills,
+        "market": {"profile": profile["version"]} if profile else {"jd_texts": jd_texts, "chunks": chunks},
+        "rankings": rankings,
+        "score": score,
+        "evidence": [],
+        "report": None,
+    }
+    
+    if skip_llm:
+        # A score-only run must not replace a run whose report the next upload could revise
+        if not (previous and previous["report"]):
+            save_session_run(session_id, role, run_state)
+        yield {"event": "done", "report": None, "score": score}
+        return
     
-    # 5) Generate analysis with Ollama
-    print("🤖 Generating skills gap analysis...")
+    # 4) Generate analysis with Ollama, token by token: a delta on the previous
+    #    report when only part of the CV changed, the full report otherwise
+    yield stage_event("generate", "start")
     try:
-        ollama_base_url = os.getenv("OLLAMA_BASE_URL")
-        model_name = os.getenv("OLLAMA_MODEL")
+        llm = get_llm()
+        context = None
+        incremental = bool(previous and previous["report"]) and diff["changed_share"] <= SESSION_DELTA_MAX_CHANGE
+        with span("context", candidates=len(jd_evidence), incremental=incremental) as s:
+            if incremental:
+                changes = describe_changes(previous["sections"], sections, diff)
+                context = assemble_delta_prompt(role, cv_skills, previous, changes, jd_evidence, query_vector)
+                incremental = context is not None
+            if context is None:
+                context = assemble_gap_prompt(role, cv_skills, jd_evidence, query_vector)
+            s.update(prompt_tokens=context["prompt_tokens"], evidence=len(context["evidence"]),
+                     duplicates=context["duplicates_dropped"], incremental=incremental)
+        PROMPT_TOKENS.observe(context["prompt_tokens"])
+        yield stage_event("context", "done", prompt_tokens=context["prompt_tokens"],
+                          evidence=len(context["evidence"]), duplicates=context["duplicates_dropped"],
+                          incremental=incremental)
+        if incremental:
+            get_session_store().record("incremental")
         
-        llm = Ollama(
-            model=model_name,
-            base_url=ollama_base_url,
-            temperature=0.1
-        )
+        def finish(response: str, cached: bool) -> dict:
+            report = merge_report(previous["report"], response) if incremental else response
+            # Raw chunks, not the trimmed prompt text, so the next revision can filter candidates by them
+            evidence = previous["evidence"] + context["sources"] if incremental else context["sources"]
+            save_session_run(session_id, role, dict(run_state, report=report, evidence=evidence))
+            return {"event": "done", "report": report, "score": score, "cached": cached, "incremental": incremental}
         
-        prompt = GAP_PROMPT.format(
-            role=role,
-            cv_skills=", ".join(cv_skills) if cv_skills else "Skills analysis pending - please review CV content",
-            jd_evidence="\n\n".join(jd_evidence[:3]) if jd_evidence else f"Job market analysis for {role} position"
-        )
+        cache = get_llm_cache()
+        scope, key, vector = report_cache_entry(role, cv_skills, context)
+        hit = cache.get(scope, key, vector)
+        if hit:
+            logger.info(f"♻️ Reusing cached report ({'semantic' if hit['semantic'] else 'exact'} hit, "
+                        f"saved ~{hit['seconds']:.1f}s)")
+            yield {"event": "token", "text": hit["response"]}
+            yield finish(hit["response"], True)
+            return
         
-        response = llm.invoke(prompt)
-        print("✅ Analysis complete!")
-        return response
+        with span("generate", prompt_tokens=context["prompt_tokens"], incremental=incremental) as s:
+            tokens = []
+            for token in llm.stream(context["prompt"]):
+                tokens.append(token)
+                yield {"event": "token", "text": token}
+            # Ollama streams one token per chunk
+            s["generated_tokens"] = len(tokens)
+        GENERATED_TOKENS.observe(len(tokens))
+        response = "".join(tokens)
+        cache.put(scope, key, response, s["seconds"], vector)
+        
+        yield finish(response, False)
         
     except Exception as e:
         error_msg = f"⚠️ Error generating analysis: {str(e)}"
-        print(error_msg)
-        return error_msg
+        logger.error(error_msg)
+        yield {"event": "error", "message": error_msg}
+
+class AnalysisError(Exception):
+    """The pipeline ended in an error event; the message is meant for the user."""
+
+    def __init__(self, message: str, score: dict = None):
+        super().__init__(message)
+        self.score = score
+
+def collect_result(events, on_event=None) -> dict:
+    """
+    Drain pipeline events into {"report", "score", "cached", "incremental"},
+    calling `on_event` with each one first. Raises AnalysisError on an error event.
+    """
+    score = None
+    for event in events:
+        if on_event:
+            on_event(event)
+        if event["event"] == "stage" and event["stage"] == "score":
+            score = event["score"]
+        elif event["event"] == "done":
+            return {"report": event["report"], "score": event["score"], "cached": event.get("cached", False),
+                    "incremental": event.get("incremental", False)}
+        elif event["event"] == "error":
+            raise AnalysisError(event["message"], score)
+    return {"report": "", "score": score}
+
+def run_analysis(cv_text: str, role: str, skip_llm: bool = False, session_id: str = None) -> dict:
+    """Run the pipeline to completion; an error comes back as the report, next to the score if there is one."""
+    try:
+        return collect_result(iter_agent_events(cv_text, role, skip_llm=skip_llm, session_id=session_id))
+    except AnalysisError as e:
+        return {"report": str(e), "score": e.score}
+
+def run_agent(cv_text: str, role: str, use_fallback_on_failure: bool = True):
+    """
+    Enhanced version with better error handling and fallback mechanisms
+    """
+    return run_analysis(cv_text, role)["report"]
 
 def extract_simple_skills(cv_text: str) -> list:
     """
     Simple skill extraction fallback when vector store is unavailable
     """
-    import re
-    
-    # Common technical skills patterns
-    skill_patterns = [
-        r'\b(python|java|javascript|c\+\+|sql|r|scala|golang?|rust)\b',
-        r'\b(react|angular|vue|node\.?js|express|django|flask|spring)\b',
-        r'\b(aws|azure|gcp|docker|kubernetes|git|jenkins)\b',
-        r'\b(pandas|numpy|scikit-learn|tensorflow|pytorch|matplotlib)\b',
-        r'\b(mysql|postgresql|mongodb|redis|elasticsearch)\b',
-        r'\b(html|css|bootstrap|tailwind|sass)\b',
-        r'\b(agile|scrum|devops|ci/cd|microservices)\b'
-    ]
-    
-    skills = []
-    cv_lower = cv_text.lower()
-    
-    for pattern in skill_patterns:
-        matches = re.findall(pattern, cv_lower, re.IGNORECASE)
-        skills.extend(matches)
-    
-    # Remove duplicates and return
-    return list(set(skills))
+    return extract_skills(cv_text)
 
 if __name__ == "__main__":
     # Test the connections
@@ -1,12 +1,49 @@
+import time
+# Everything below is import cost; /startup reports it next to the warm-up
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
 import uvicorn
-from cv_parser import extract_text_from_pdf
-from agent import run_agent
+from cv_parser import PDF_MAX_BYTES, PDFLimitError, extract_text_from_pdf
+from agent import collect_result, iter_agent_events, run_analysis
+from jobs import QueueFullError, analysis_slots, job_manager, worker_saturation
+from batch import run_batch
+from typing import List
+import registry
+from health import health_monitor
+from observability import RequestContextMiddleware, configure_logging, get_logger, metrics_payload
+from bake import load_manifest
+import json
 import os
 import traceback
 
-app = FastAPI(title="AI Career Mentor API")
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
+configure_logging()
+logger = get_logger(__name__)
+
+# New synchronous analyses get a 503 at this saturation; clients retry and the autoscaler adds replicas
+SHED_SATURATION = float(os.getenv("SHED_SATURATION", 1.0))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the embedding model and clients once, before the first request arrives
+    manifest = load_manifest()
+    if manifest:
+        logger.info(f"🧊 Baked image: {manifest['embedding_model']} baked at {manifest['baked_at']}")
+    await run_in_threadpool(registry.warm_up)
+    logger.info(f"🚀 Serving {time.perf_counter() - _import_started:.2f}s after import start "
+                f"(imports {IMPORT_SECONDS:.2f}s)")
+    health_monitor.start()
+    yield
+    health_monitor.stop()
+    job_manager.shutdown()
+
+app = FastAPI(title="AI Career Mentor API", lifespan=lifespan)
 
 # Add CORS middleware to allow Streamlit to connect
 app.add_middleware(
@@ -15,33 +52,198 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
+# Outermost, so the request id is set before anything else runs
+app.add_middleware(RequestContextMiddleware)
 
 @app.get("/")
 async def root():
     return {"message": "AI Career Mentor API is running!"}
 
-@app.post("/analyze")
-async def analyze_cv(role: str = Form(...), cv: UploadFile = File(...)):
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up. Component status comes from the cached monitor."""
+    return {
+        "status": "ok",
+        "components": health_monitor.status(),
+        "jobs": job_manager.stats(),
+        "saturation": worker_saturation(),
+    }
+
+@app.get("/readyz")
+async def readyz():
+    """
+    Readiness: every required component (the embedding model; Ollama only
+    degrades the report) passed its latest background probe. Load doesn't
+    count: a saturated replica must still answer job polls, so it refuses new
+    work at the submit endpoints instead.
+    """
+    ready = health_monitor.is_ready()
+    body = {"ready": ready, "components": health_monitor.status(), "saturation": worker_saturation()}
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint: per-stage latency histograms, sizes and HTTP timings."""
+    payload, content_type = metrics_payload()
+    return Response(payload, media_type=content_type)
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counters, sizes and LLM time saved for the on-disk caches."""
+    return {
+        "jd": registry.get_jd_cache().stats(),
+        "embeddings": registry.get_embeddings().stats(),
+        "llm": registry.get_llm_cache().stats(),
+        "sessions": registry.get_session_store().stats(),
+    }
+
+@app.get("/startup")
+async def startup_report():
+    """How long the app's imports and each shared resource's warm-up took at startup."""
+    imports = {"status": "ok", "seconds": round(IMPORT_SECONDS, 3), "error": None}
+    return {"app_import": imports, **registry.warmup_report()}
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+def reject_when_saturated():
+    """503 with Retry-After for a new synchronous analysis while this replica's workers are saturated."""
+    saturation = worker_saturation()
+    if saturation >= SHED_SATURATION:
+        raise HTTPException(status_code=503, detail=f"Server is at capacity (saturation {saturation})",
+                            headers={"Retry-After": "10"})
+
+async def read_cv_text(cv: UploadFile) -> str:
+    """
+    Validate and extract a CV upload. The body is read in chunks and rejected
+    as soon as it passes PDF_MAX_BYTES; extraction runs in the threadpool.
+    """
+    label = f" ({cv.filename})" if cv.filename else ""
+    if cv.content_type != "application/pdf":
+        raise HTTPException(status_code=400, detail=f"Only PDF files are supported{label}")
+
+    parts = []
+    size = 0
+    while chunk := await cv.read(UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        if size > PDF_MAX_BYTES:
+            raise HTTPException(status_code=413, detail=f"PDF exceeds {PDF_MAX_BYTES} bytes{label}")
+        parts.append(chunk)
+
     try:
-        if cv.content_type != "application/pdf":
-            raise HTTPException(status_code=400, detail="Only PDF files are supported")
+        cv_text = await run_in_threadpool(extract_text_from_pdf, b"".join(parts))
+    except PDFLimitError as e:
+        raise HTTPException(status_code=413, detail=f"{e}{label}")
 
-        pdf_bytes = await cv.read()
-        cv_text = extract_text_from_pdf(pdf_bytes)
+    if not cv_text.strip():
+        raise HTTPException(status_code=400, detail=f"Could not extract text from PDF{label}")
+    return cv_text
 
-        if not cv_text.strip():
-            raise HTTPException(status_code=400, detail="Could not extract text from PDF")
+@app.post("/analyze")
+async def analyze_cv(role: str = Form(...), cv: UploadFile = File(...), skip_llm: bool = Form(False),
+                     session_id: str = Form(None)):
+    """
+    Gap report plus a deterministic match score; skip_llm returns the score alone in milliseconds.
+    Pass the same session_id when re-submitting a revised CV to update the previous analysis
+    instead of redoing it.
+    """
+    reject_when_saturated()
+    try:
+        cv_text = await read_cv_text(cv)
+
+        # The pipeline is synchronous; keep it off the event loop
+        with analysis_slots.hold():
+            return await run_in_threadpool(run_analysis, cv_text, role, skip_llm, session_id)
 
-        report = run_agent(cv_text,role)
-        return {"report": report}
+    except HTTPException:
+        raise
 
     except Exception as e:
         tb = traceback.format_exc()
+        logger.exception("❌ Analysis failed")
         # temporary: return full traceback (or log it). Remove before production.
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}\n\nTraceback:\n{tb}")
 
+def to_sse(events):
+    """Encode pipeline events as server-sent events"""
+    for event in events:
+        yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+def holding_slot(lines):
+    """Count a streamed analysis as in flight until the stream ends or the client leaves."""
+    with analysis_slots.hold():
+        yield from lines
+
+@app.post("/analyze/stream")
+async def analyze_cv_stream(role: str = Form(...), cv: UploadFile = File(...), session_id: str = Form(None)):
+    """
+    Same analysis as /analyze, streamed as stage events followed by LLM tokens.
+    For an incremental re-analysis the tokens are the revised sections only; the
+    done event carries the merged report.
+    """
+    reject_when_saturated()
+    cv_text = await read_cv_text(cv)
+
+    # Sync generators are iterated in the threadpool, so the event loop stays free
+    return StreamingResponse(
+        holding_slot(to_sse(iter_agent_events(cv_text, role, session_id=session_id))),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def analysis_job(context, cv_text: str, role: str, session_id: str = None) -> dict:
+    """
+    Job body for /jobs: run the pipeline, recording stage progress and honouring
+    cancellation. A pipeline error raises AnalysisError, which fails the job.
+    """
+    def on_event(event):
+        context.check_cancelled()
+        if event["event"] == "stage":
+            context.progress(stage=event["stage"], status=event["status"])
+
+    return collect_result(iter_agent_events(cv_text, role, session_id=session_id), on_event)
+
+@app.post("/jobs", status_code=202)
+async def submit_job(role: str = Form(...), cv: UploadFile = File(...), session_id: str = Form(None)):
+    """Queue an analysis and return its id; poll GET /jobs/{id} for the result."""
+    cv_text = await read_cv_text(cv)
+
+    try:
+        job_id = job_manager.submit(analysis_job, cv_text, role, session_id, role=role)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    return {"job_id": job_id, "status": "queued"}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    if not job_manager.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Job is not queued or running")
+    return job_manager.get(job_id)
+
+@app.post("/batch/analyze")
+async def analyze_batch(role: str = Form(...), cvs: List[UploadFile] = File(...), include_report: bool = Form(True)):
+    """
+    Screen many CVs against one role. Search, scraping and JD embedding run once;
+    results stream back as NDJSON, one line per CV, then a summary line.
+    """
+    reject_when_saturated()
+    parsed = []
+    for cv in cvs:
+        parsed.append((cv.filename, await read_cv_text(cv)))
+
+    lines = (json.dumps(item) + "\n" for item in run_batch(parsed, role, with_report=include_report))
+    return StreamingResponse(holding_slot(lines), media_type="application/x-ndjson")
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))  # Changed default port to 8000
-    print(f"🚀 Starting AI Career Mentor API on port {port}")
-    uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
+    logger.info(f"🚀 Starting AI Career Mentor API on port {port}")
+    # log_config=None keeps uvicorn on the structured handler set up above
+    uvicorn.run(app, host="0.0.0.0", port=port, log_config=None)
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Bake slow-to-fetch assets into the container image, so a new replica loads
+everything from its own filesystem instead of the network.
+
+    python bake.py          (the Dockerfile runs this when BAKE_MODEL=1)
+
+- Downloads the embedding model into HF_HOME for each of
+  BAKE_EMBEDDING_BACKENDS (PyTorch weights, ONNX and int8 ONNX exports) and
+  encodes one sentence with each. The image then sets HF_HUB_OFFLINE=1, so
+  startup makes no hub calls whichever EMBEDDING_BACKEND it runs.
+- Builds the skill matcher once, so a broken taxonomy fails the build
+  rather than the first pod.
+- Writes BAKE_MANIFEST (model, dimension, timings), logged at startup.
+"""
+import json
+import os
+import time
+
+from observability import configure_logging, get_logger
+
+BAKE_MANIFEST = os.getenv("BAKE_MANIFEST", os.path.join(os.path.dirname(os.path.abspath(__file__)), "bake.json"))
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+# Every backend is baked by default, so EMBEDDING_BACKEND can be switched without a rebuild
+BAKE_EMBEDDING_BACKENDS = [b.strip() for b in os.getenv("BAKE_EMBEDDING_BACKENDS", "torch,onnx,onnx-int8").split(",")
+                           if b.strip()]
+
+logger = get_logger(__name__)
+
+
+def load_manifest():
+    """The manifest written at build time, or None outside a baked image."""
+    try:
+        with open(BAKE_MANIFEST, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def bake() -> dict:
+    from embedding_backends import build_embedding_model
+
+    timings = {}
+    backends = {}
+    for backend in BAKE_EMBEDDING_BACKENDS:
+        start = time.perf_counter()
+        model = build_embedding_model(EMBEDDING_MODEL_NAME, backend)
+        backends[backend] = {"dimension": len(model.embed_query("bake check"))}
+        timings[f"embedding_{backend}"] = round(time.perf_counter() - start, 3)
+
+    start = time.perf_counter()
+    from skills import default_matcher
+    skills = len(default_matcher.skills)
+    timings["skill_matcher"] = round(time.perf_counter() - start, 3)
+
+    manifest = {
+        "embedding_model": EMBEDDING_MODEL_NAME,
+        "embedding_backends": backends,
+        "skills": skills,
+        "hf_home": os.getenv("HF_HOME"),
+        "baked_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "seconds": timings,
+    }
+    with open(BAKE_MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    configure_logging()
+    manifest = bake()
+    logger.info(f"🧊 Baked {manifest['embedding_model']} ({', '.join(manifest['embedding_backends'])}) and "
+                f"{manifest['skills']} skills", extra={"fields": manifest})
+
+
+if __name__ == "__main__":
+    main()
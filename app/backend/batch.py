@@ -0,0 +1,181 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from agent import (assemble_gap_prompt, chunk_job_descriptions, generate_report, normalise_search_results,
+                   split_search_results)
+from comparator import retrieve_evidence_batch
+from context_builder import EVIDENCE_CANDIDATES
+from job_parser import fetch_stream, search_jobs
+from market_profiles import load_profile
+from observability import bind_context, get_logger, span
+from registry import get_embeddings
+from scoring import embedding_similarity, match_score, skill_demand
+from skills import extract_skills
+from vectorstore import build_vector_store
+
+BATCH_EMBED_SIZE = int(os.getenv("BATCH_EMBED_SIZE", 64))
+BATCH_LLM_WORKERS = int(os.getenv("BATCH_LLM_WORKERS", 2))
+# CVs matched together: their embeddings and retrieval queries share model calls, and
+# their results go out before the next group starts
+BATCH_GROUP_SIZE = int(os.getenv("BATCH_GROUP_SIZE", 8))
+
+logger = get_logger(__name__)
+
+
+def prepare_role_context(role: str, use_profile: bool = True) -> dict:
+    """
+    Search, fetch, chunk and embed the job market for `role` once, for reuse
+    across CVs. A precomputed market profile is used instead when one exists.
+    """
+    started = time.perf_counter()
+    profile = load_profile(role) if use_profile else None
+    if profile:
+        logger.info(f"📦 Using market profile {profile['version']} for {role}")
+        return {
+            "role": role,
+            "jd_texts": profile["jd_texts"],
+            "chunks": profile["chunks"],
+            "index": profile["index"],
+            "demand": profile["demand"],
+            "profile": profile["version"],
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+    try:
+        norm_jds = normalise_search_results(search_jobs(role))
+    except Exception as e:
+        logger.error(f"❌ Error searching for jobs: {e}")
+        norm_jds = []
+
+    jd_texts, pending_urls = split_search_results(norm_jds)
+    for _, url, text in fetch_stream(pending_urls):
+        if text and len(text.strip()) > 100:
+            jd_texts.append(text)
+
+    chunks = chunk_job_descriptions(jd_texts)
+    index = build_vector_store(chunks, mode="ephemeral")
+    logger.info(f"📦 Prepared {role}: {len(jd_texts)} JDs, {len(chunks)} chunks")
+    return {
+        "role": role,
+        "jd_texts": jd_texts,
+        "chunks": chunks,
+        "index": index,
+        "demand": skill_demand(jd_texts),
+        "profile": None,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def embed_cvs(cv_texts: list, batch_size: int = BATCH_EMBED_SIZE) -> list:
+    """Embed all CVs in batches through the shared model."""
+    embeddings = get_embeddings()
+    vectors = []
+    for start in range(0, len(cv_texts), batch_size):
+        vectors.extend(embeddings.embed_documents(cv_texts[start:start + batch_size]))
+    return vectors
+
+
+def match_cvs(cvs: list, context: dict, k: int = EVIDENCE_CANDIDATES) -> list:
+    """
+    Skills, evidence, prompt and score for a group of (name, cv_text) against
+    a prepared role context. The CV embeddings and the retrieval queries of the
+    whole group go to the model together.
+    """
+    role = context["role"]
+    vectors = embed_cvs([text for _, text in cvs])
+    skills = [extract_skills(text) for _, text in cvs]
+    retrieved = retrieve_evidence_batch([(text, cv_skills) for (_, text), cv_skills in zip(cvs, skills)],
+                                        context["index"], k=k, query_vectors=vectors)
+    matches = []
+    for (name, _), cv_skills, vector, found in zip(cvs, skills, vectors, retrieved):
+        prompt_context = assemble_gap_prompt(role, cv_skills, found["evidence"], vector)
+        prompt_context["score"] = match_score(cv_skills, context["demand"], len(context["jd_texts"]),
+                                              embedding_similarity(context["index"], vector))
+        matches.append((name, cv_skills, prompt_context))
+    return matches
+
+
+def run_batch(cvs: list, role: str, with_report: bool = True, k: int = EVIDENCE_CANDIDATES,
+              llm_workers: int = BATCH_LLM_WORKERS, group_size: int = BATCH_GROUP_SIZE):
+    """
+    Analyse many CVs against one role. `cvs` is a list of (name, cv_text).
+    CVs are matched `group_size` at a time and each result is yielded as soon
+    as it is ready: right after its group without reports, else when its
+    generation finishes (in completion order) while later groups are matched.
+    Finally yields a summary dict with throughput metrics.
+    """
+    started = time.perf_counter()
+    with span("batch_prepare", role=role) as s:
+        context = prepare_role_context(role)
+        s.update(jds=len(context["jd_texts"]), chunks=len(context["chunks"]), profile=context["profile"])
+
+    def result(name, cv_skills, prompt_context, report=None, error=None) -> dict:
+        entry = {
+            "type": "result",
+            "cv": name,
+            "skills": cv_skills,
+            "score": prompt_context["score"],
+            "evidence": prompt_context["evidence"],
+            "prompt_tokens": prompt_context["prompt_tokens"],
+            "elapsed": round(time.perf_counter() - started, 3),
+        }
+        if report is not None:
+            entry["report"] = report
+            entry["cached"] = prompt_context.get("cached", False)
+        if error is not None:
+            entry["error"] = error
+        return entry
+
+    def finished(future, match) -> dict:
+        nonlocal failures
+        name, cv_skills, prompt_context = match
+        try:
+            generated = future.result()
+        except Exception as e:
+            failures += 1
+            return result(name, cv_skills, prompt_context, error=str(e))
+        prompt_context["cached"] = generated["cached"]
+        return result(name, cv_skills, prompt_context, report=generated["report"])
+
+    failures = 0
+    match_seconds = 0.0
+    # A small pool keeps Ollama busy without queueing hundreds of generations on it
+    pool = ThreadPoolExecutor(max_workers=llm_workers, thread_name_prefix="batch-llm") if with_report else None
+    pending = {}
+    try:
+        for start in range(0, len(cvs), group_size):
+            group = cvs[start:start + group_size]
+            with span("batch_match", cvs=len(group)) as s:
+                matches = match_cvs(group, context, k=k)
+            match_seconds += s["seconds"]
+            if pool is None:
+                for match in matches:
+                    yield result(*match)
+                continue
+            for match in matches:
+                pending[pool.submit(bind_context(generate_report), role, match[1], match[2])] = match
+            # Hand over whatever finished while this group was matched
+            for future in [f for f in pending if f.done()]:
+                yield finished(future, pending.pop(future))
+        for future in as_completed(list(pending)):
+            yield finished(future, pending.pop(future))
+    finally:
+        if pool is not None:
+            # The client may have gone away; don't start generations nobody will read
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    total = time.perf_counter() - started
+    yield {
+        "type": "summary",
+        "role": role,
+        "cvs": len(cvs),
+        "failures": failures,
+        "jd_count": len(context["jd_texts"]),
+        "chunk_count": len(context["chunks"]),
+        "role_prep_seconds": context["seconds"],
+        "profile": context["profile"],
+        "match_seconds": round(match_seconds, 3),
+        "total_seconds": round(total, 3),
+        "cvs_per_second": round(len(cvs) / total, 3) if total else None,
+    }
@@ -0,0 +1,126 @@
+"""
+Cache backend benchmark and smoke check: runs the JD, LLM and embedding
+caches on each backend (memory, SQLite, Redis) and times their hot calls.
+
+    python -m benchmarks.bench_cache_backends [--ops 2000] [--redis-url redis://host:6379/0]
+
+Redis is served by the in-process FakeRedis stand-in unless --redis-url
+points at a real server. Every backend is also checked for the behaviour the
+caches depend on (round trips, TTL expiry, semantic LLM hits, shared state
+between two cache instances on one Redis); a failed check exits non-zero.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.fakes import FakeRedis
+from cache_backends import MemoryBackend, RedisBackend, SQLiteBackend, build_redis_client
+from embedding_cache import BackendVectorStore
+from jd_cache import JDCache
+from llm_cache import LLMCache
+
+DIM = 384
+
+
+def check(condition: bool, message: str, failures: list):
+    if not condition:
+        failures.append(message)
+
+
+def smoke(make_backend, failures: list, label: str):
+    jd = JDCache(backend=make_backend("jd"))
+    jd.put_page("https://jobs.example/1", "hash-1", "Python and SQL " * 20, etag='"v1"', ttl=60)
+    page = jd.get_page("https://jobs.example/1")
+    check(page is not None and page["fresh"] and page["etag"] == '"v1"', f"{label}: page round trip", failures)
+    jd.put_page("https://jobs.example/2", "hash-2", "Expired", ttl=-1)
+    check(jd.get_page("https://jobs.example/2")["fresh"] is False, f"{label}: stale page kept for revalidation",
+          failures)
+    jd.put_search("Data Scientist", [{"url": "u"}], ttl=0.05)
+    check(jd.get_search("data  scientist") == [{"url": "u"}], f"{label}: search round trip", failures)
+    time.sleep(0.1)
+    check(jd.get_search("data scientist") is None, f"{label}: search TTL", failures)
+
+    llm = LLMCache(backend=make_backend("llm"), semantic=True, threshold=0.95)
+    vector = np.ones(DIM, dtype=np.float32)
+    llm.put("scope", "a" * 64, "report", 12.5, vector=vector)
+    check(llm.get("scope", "a" * 64)["response"] == "report", f"{label}: exact LLM hit", failures)
+    near = llm.get("scope", "b" * 64, vector=vector + 0.01)
+    check(near is not None and near["semantic"], f"{label}: semantic LLM hit", failures)
+    check(llm.get("other", "c" * 64, vector=vector) is None, f"{label}: scope isolation", failures)
+
+    store = BackendVectorStore(make_backend("emb"))
+    store.put_many({"k1": np.arange(DIM, dtype=np.float32)})
+    found = store.get_many(["k1", "k2"])
+    check(list(found) == ["k1"] and float(found["k1"][5]) == 5.0, f"{label}: vector round trip", failures)
+
+
+def time_ops(make_backend, ops: int) -> dict:
+    jd = JDCache(backend=make_backend("jd-bench"))
+    text = "Requirements: Python, SQL, Docker. " * 60
+    store = BackendVectorStore(make_backend("emb-bench"))
+    vectors = {f"chunk-{i}": np.random.rand(DIM).astype(np.float32) for i in range(200)}
+
+    def timed(fn, n):
+        start = time.perf_counter()
+        for i in range(n):
+            fn(i)
+        return round((time.perf_counter() - start) / n * 1e6, 1)
+
+    return {
+        "put_page_us": timed(lambda i: jd.put_page(f"https://jobs.example/{i}", f"h{i}", text), ops),
+        "get_page_us": timed(lambda i: jd.get_page(f"https://jobs.example/{i}"), ops),
+        "miss_us": timed(lambda i: jd.get_page(f"https://nowhere.example/{i}"), ops),
+        "put_200_vectors_us": timed(lambda i: store.put_many(vectors), max(ops // 100, 5)),
+        "get_200_vectors_us": timed(lambda i: store.get_many(list(vectors)), max(ops // 100, 5)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--redis-url", help="real Redis to use instead of the stand-in")
+    args = parser.parse_args()
+
+    fake = None
+    redis_url = args.redis_url
+    if not redis_url:
+        fake = FakeRedis()
+        redis_url = fake.start()
+    client = build_redis_client(redis_url)
+    tmp = tempfile.mkdtemp(prefix="bench-backends-")
+
+    backends = {
+        "memory": lambda ns: MemoryBackend(),
+        "sqlite": lambda ns: SQLiteBackend(os.path.join(tmp, f"{ns}.sqlite3"), 500 * 1024 * 1024),
+        "redis": lambda ns: RedisBackend(client, f"bench:{ns}"),
+    }
+
+    failures = []
+    for name, make in backends.items():
+        smoke(make, failures, name)
+    # Two replicas on one Redis see each other's writes
+    writer, reader = JDCache(backend=backends["redis"]("shared")), JDCache(backend=backends["redis"]("shared"))
+    writer.put_search("ML Engineer", [{"url": "shared"}])
+    check(reader.get_search("ml engineer") == [{"url": "shared"}], "redis: shared between instances", failures)
+
+    columns = None
+    for name, make in backends.items():
+        row = time_ops(make, args.ops)
+        if columns is None:
+            columns = list(row)
+            print(f"{'backend':<8} " + " ".join(f"{c:>18}" for c in columns))
+        print(f"{name:<8} " + " ".join(f"{row[c]:>18}" for c in columns))
+
+    if fake:
+        fake.stop()
+    for failure in failures:
+        print(f"FAILED {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
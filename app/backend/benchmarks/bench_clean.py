@@ -0,0 +1,126 @@
+"""
+HTML cleaning benchmark: BeautifulSoup vs lxml vs the full clean_html path
+(JSON-LD first, then the configured backend).
+
+    python -m benchmarks.bench_clean [--corpus ./saved_pages] [--repeat 5]
+    python -m benchmarks.bench_clean --write-corpus ./saved_pages
+
+--corpus reads every *.html file in a directory of saved job pages. Without
+it a generated corpus is used: plain postings, postings carrying a JSON-LD
+JobPosting block, and one oversized page. --write-corpus saves that
+generated corpus so runs can be repeated against fixed files.
+
+Besides speed, each backend's word overlap with the BeautifulSoup output is
+reported, so a faster cleaner that drops content shows up here.
+"""
+import argparse
+import json
+import os
+import re
+import time
+
+from benchmarks.fakes import FILLER, job_page
+from html_cleaner import clean_bs4, clean_html, clean_lxml
+
+
+def jsonld_page(job_id: int, words: int = 600) -> str:
+    """A generated posting that also embeds its description as JSON-LD, like most ATS pages."""
+    page = job_page(job_id, words)
+    posting = {
+        "@context": "https://schema.org",
+        "@type": "JobPosting",
+        "title": f"Engineer #{job_id}",
+        "description": re.search(r"<main>(.*)</main>", page, re.DOTALL).group(1),
+        "hiringOrganization": {"@type": "Organization", "name": "Example"},
+    }
+    script = f'<script type="application/ld+json">{json.dumps(posting)}</script>'
+    return page.replace("</head>", script + "</head>")
+
+
+def huge_page(size_chars: int = 3_000_000) -> str:
+    """A posting buried in a multi-megabyte page of repeated markup."""
+    row = f"<div class='card'><span>{FILLER}</span><a href='#'>More</a></div>"
+    return job_page(0).replace("</main>", "</main>" + row * (size_chars // len(row)))
+
+
+def generated_corpus() -> dict:
+    corpus = {f"plain_{i}.html": job_page(i, 400 + 200 * i) for i in range(10)}
+    corpus.update({f"jsonld_{i}.html": jsonld_page(100 + i) for i in range(5)})
+    corpus["huge.html"] = huge_page()
+    return corpus
+
+
+def load_corpus(directory: str) -> dict:
+    corpus = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith((".html", ".htm")):
+            with open(os.path.join(directory, name), encoding="utf-8", errors="replace") as f:
+                corpus[name] = f.read()
+    return corpus
+
+
+def words(text: str) -> set:
+    return set(re.findall(r"\w+", text.lower()))
+
+
+def overlap(text: str, reference: str) -> float:
+    """Share of the reference's words that `text` kept."""
+    ref = words(reference)
+    return len(words(text) & ref) / len(ref) if ref else 1.0
+
+
+def time_backend(fn, corpus: dict, repeat: int) -> tuple:
+    """Best-of-`repeat` seconds per page, and the output of the last run."""
+    seconds, outputs = {}, {}
+    for name, page in corpus.items():
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            outputs[name] = fn(page)
+            best = min(best, time.perf_counter() - start)
+        seconds[name] = best
+    return seconds, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="directory of saved *.html job pages")
+    parser.add_argument("--write-corpus", help="save the generated corpus to this directory and exit")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.write_corpus:
+        os.makedirs(args.write_corpus, exist_ok=True)
+        for name, page in generated_corpus().items():
+            with open(os.path.join(args.write_corpus, name), "w", encoding="utf-8") as f:
+                f.write(page)
+        print(f"Wrote generated corpus to {args.write_corpus}")
+        return
+
+    corpus = load_corpus(args.corpus) if args.corpus else generated_corpus()
+    total_mb = sum(len(p) for p in corpus.values()) / 1e6
+    print(f"{len(corpus)} pages, {total_mb:.1f} MB\n")
+
+    backends = {
+        "bs4": clean_bs4,
+        "lxml": clean_lxml,
+        "clean_html": clean_html,
+    }
+    results = {name: time_backend(fn, corpus, args.repeat) for name, fn in backends.items()}
+    reference = results["bs4"][1]
+
+    print(f"{'backend':<12} {'total ms':>10} {'MB/s':>8} {'p50 ms/page':>12} {'max ms/page':>12} {'word overlap':>13}")
+    for name, (seconds, outputs) in results.items():
+        per_page = sorted(seconds.values())
+        total = sum(per_page)
+        kept = min(overlap(outputs[page], reference[page]) for page in corpus)
+        print(f"{name:<12} {total * 1000:>10.1f} {total_mb / total:>8.1f} {per_page[len(per_page) // 2] * 1000:>12.2f} "
+              f"{per_page[-1] * 1000:>12.2f} {kept:>13.2f}")
+
+    print("\nSlowest pages (bs4 ms -> clean_html ms):")
+    for page in sorted(corpus, key=lambda p: -results["bs4"][0][p])[:5]:
+        print(f"  {page:<24} {results['bs4'][0][page] * 1000:>8.1f} -> {results['clean_html'][0][page] * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Embedding backend comparison: throughput, memory and retrieval parity.
+
+    python -m benchmarks.bench_embeddings [--backends torch,onnx,onnx-int8] [--reference torch]
+                                          [--threads 2] [--concurrency 8] [--requests 32]
+                                          [--model sentence-transformers/all-MiniLM-L6-v2]
+
+Each backend runs in a fresh interpreter so its RSS is its own. Per backend:
+load time, the RSS the loaded model adds, peak RSS, single-caller throughput, and
+throughput for --concurrency callers each embedding one request's chunks,
+with every caller running its own forward pass ("direct") and through the
+shared request batcher ("batched").
+
+Parity against --reference: cosine between the two backends' vectors for
+the same text, and overlap of the top-k chunks retrieved for CV-line queries
+over a JD corpus. Exits non-zero when a backend falls below --min-cosine or
+--min-overlap. Needs the model files (the hub, HF_HOME, or a local --model
+directory); a backend that fails to load is reported and skipped.
+"""
+import argparse
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.bench_retrieval import CVS, JD_CHUNKS
+from benchmarks.fakes import job_page
+from benchmarks.harness import CV_TEXT
+from embedding_backends import EMBEDDING_BACKENDS
+from html_cleaner import clean_html
+from registry import EMBEDDING_MODEL_NAME
+
+CHUNKS_PER_REQUEST = 24
+
+
+def corpus() -> tuple:
+    """(JD chunks, CV-line queries) in natural language, deterministic."""
+    chunks = list(JD_CHUNKS.values())
+    for job_id in range(40):
+        text = clean_html(job_page(job_id, words=120))
+        chunks.extend(s.strip() for s in re.split(r"(?<=[.!?])\s+|\n+", text) if len(s.strip()) > 20)
+    chunks = list(dict.fromkeys(chunks))
+    queries = [line.strip() for cv, _ in CVS for line in (CV_TEXT + cv).splitlines() if len(line.strip()) > 20]
+    return chunks, list(dict.fromkeys(queries))
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def concurrent_throughput(embeddings, chunks: list, requests: int, concurrency: int) -> float:
+    """Texts per second with `concurrency` callers working through `requests` requests."""
+    batches = [chunks[(i * 7) % len(chunks):][:CHUNKS_PER_REQUEST] or chunks[:CHUNKS_PER_REQUEST]
+               for i in range(requests)]
+    todo = list(range(requests))
+    lock = threading.Lock()
+
+    def caller():
+        while True:
+            with lock:
+                if not todo:
+                    return
+                index = todo.pop()
+            embeddings.embed_documents(batches[index])
+
+    threads = [threading.Thread(target=caller) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(len(b) for b in batches) / (time.perf_counter() - start)
+
+
+def run_worker(args):
+    """Measure one backend in this process; vectors go to --out, the report to stdout."""
+    from embedding_backends import BatchingEmbeddings, build_embedding_model
+
+    chunks, queries = corpus()
+    baseline_rss = rss_mb()
+    start = time.perf_counter()
+    model = build_embedding_model(args.model, args.worker)
+    load_seconds = time.perf_counter() - start
+    model.embed_documents(chunks[:8])
+    loaded_rss = rss_mb()
+
+    start = time.perf_counter()
+    chunk_vectors = np.asarray(model.embed_documents(chunks), dtype=np.float32)
+    single = len(chunks) / (time.perf_counter() - start)
+    query_vectors = np.asarray(model.embed_documents(queries), dtype=np.float32)
+
+    direct = concurrent_throughput(model, chunks, args.requests, args.concurrency)
+    batcher = BatchingEmbeddings(model)
+    batched = concurrent_throughput(batcher, chunks, args.requests, args.concurrency)
+
+    np.savez(args.out, chunks=chunk_vectors, queries=query_vectors)
+    print(json.dumps({
+        "load_s": round(load_seconds, 2),
+        "rss_mb": round(loaded_rss - baseline_rss, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "single_tps": round(single, 1),
+        "direct_tps": round(direct, 1),
+        "batched_tps": round(batched, 1),
+        "calls_per_pass": batcher.stats()["calls_per_pass"],
+    }))
+
+
+def measure_backend(backend: str, args, out: str) -> dict:
+    env = dict(os.environ)
+    if args.threads:
+        env["EMBED_THREADS"] = str(args.threads)
+    command = [sys.executable, "-m", "benchmarks.bench_embeddings", "--worker", backend, "--out", out,
+               "--model", args.model, "--requests", str(args.requests), "--concurrency", str(args.concurrency)]
+    result = subprocess.run(command, env=env, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if result.returncode != 0:
+        return {"error": (result.stderr.strip().splitlines() or ["failed"])[-1]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def normalised(matrix):
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+
+def parity(candidate, reference, k: int) -> dict:
+    """Per-text cosine between two backends' vectors, and top-k retrieval overlap."""
+    cosines = np.concatenate([
+        (normalised(candidate[name]) * normalised(reference[name])).sum(axis=1) for name in ("chunks", "queries")
+    ])
+    k = min(k, len(candidate["chunks"]))
+
+    def top(vectors):
+        scores = normalised(vectors["queries"]) @ normalised(vectors["chunks"]).T
+        return np.argsort(-scores, axis=1)[:, :k]
+
+    overlaps = [len(set(a) & set(b)) / k for a, b in zip(top(candidate), top(reference))]
+    return {"mean_cosine": round(float(cosines.mean()), 4), "min_cosine": round(float(cosines.min()), 4),
+            f"overlap@{k}": round(float(np.mean(overlaps)), 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default=",".join(EMBEDDING_BACKENDS))
+    parser.add_argument("--reference", default="torch", help="backend the others are compared against")
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME, help="hub id or local model directory")
+    parser.add_argument("--threads", type=int, default=0, help="EMBED_THREADS for every backend (0 = default)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--min-overlap", type=float, default=0.8)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    chunks, queries = corpus()
+    print(f"{args.model}: {len(chunks)} chunks, {len(queries)} queries, "
+          f"{args.concurrency} callers x {args.requests} requests of {CHUNKS_PER_REQUEST} chunks\n")
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    tmp = tempfile.mkdtemp(prefix="bench-embeddings-")
+    results, vectors = {}, {}
+    for backend in backends:
+        out = os.path.join(tmp, f"{backend}.npz")
+        results[backend] = measure_backend(backend, args, out)
+        if "error" not in results[backend]:
+            vectors[backend] = dict(np.load(out))
+
+    reference = args.reference if args.reference in vectors else next(iter(vectors), None)
+    columns = ("load_s", "rss_mb", "peak_rss_mb", "single_tps", "direct_tps", "batched_tps", "calls_per_pass")
+    print(f"{'backend':<10} " + " ".join(f"{c:>14}" for c in columns))
+    for backend, row in results.items():
+        if "error" in row:
+            print(f"{backend:<10} unavailable: {row['error']}")
+            continue
+        print(f"{backend:<10} " + " ".join(f"{row[c]!s:>14}" for c in columns))
+
+    failures = []
+    if reference:
+        print(f"\nParity against {reference}:")
+        for backend in vectors:
+            if backend == reference:
+                continue
+            report = parity(vectors[backend], vectors[reference], args.k)
+            print(f"  {backend:<10} " + "  ".join(f"{name} {value}" for name, value in report.items()))
+            if report["min_cosine"] < args.min_cosine:
+                failures.append(f"{backend}: min cosine {report['min_cosine']} < {args.min_cosine}")
+            overlap = report[next(name for name in report if name.startswith("overlap@"))]
+            if overlap < args.min_overlap:
+                failures.append(f"{backend}: top-k overlap {overlap} < {args.min_overlap}")
+        if reference != args.reference:
+            print(f"  ({args.reference} unavailable; compared against {reference})")
+
+    for failure in failures:
+        print(f"FAILED {failure}")
+    sys.exit(1 if failures or not vectors else 0)
+
+
+if __name__ == "__main__":
+    main()
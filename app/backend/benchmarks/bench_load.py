@@ -0,0 +1,145 @@
+"""
+End-to-end load test of POST /analyze against local stand-ins for Tavily,
+the job boards and Ollama, so it runs offline with realistic network waits.
+
+    python -m benchmarks.bench_load [--requests 40] [--concurrency 8] [--skip-llm] [--warm]
+                                    [--search-latency 0.3] [--page-latency 0.05] [--llm-latency 0.2]
+                                    [--save results.json] [--baseline results.json --tolerance 1.25]
+
+The real app runs in-process under uvicorn on a free port; only the external
+services and the embedding model (hashing stand-in unless --real-model) are
+replaced. By default every request searches, fetches and generates from
+scratch; --warm lets the search, page and report caches hit.
+
+Reports client-side p50/p95/p99 latency, throughput and errors. With
+--baseline the run exits non-zero when p50, p95 or throughput regress
+beyond --tolerance.
+"""
+import argparse
+import asyncio
+import socket
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+
+from benchmarks import harness
+from benchmarks.fakes import FakeStack
+
+ROLES = ("Machine Learning Engineer", "Data Scientist", "Backend Engineer", "Data Engineer")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(port: int) -> uvicorn.Server:
+    from app import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_config=None, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.time() + 120
+    while not server.started:
+        if time.time() > deadline:
+            raise RuntimeError("app did not start")
+        time.sleep(0.05)
+    return server
+
+
+async def run_load(base_url: str, pdf: bytes, total: int, concurrency: int, skip_llm: bool) -> dict:
+    limit = asyncio.Semaphore(concurrency)
+    latencies, errors = [], []
+
+    async def one(client, number):
+        async with limit:
+            started = time.perf_counter()
+            try:
+                response = await client.post(
+                    "/analyze",
+                    data={"role": ROLES[number % len(ROLES)], "skip_llm": str(skip_llm).lower()},
+                    files={"cv": ("cv.pdf", pdf, "application/pdf")},
+                )
+                if response.status_code != 200:
+                    errors.append(f"HTTP {response.status_code}: {response.text[:200]}")
+                    return
+            except httpx.HTTPError as e:
+                errors.append(repr(e))
+                return
+            latencies.append(time.perf_counter() - started)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(one(client, n) for n in range(total)))
+        wall = time.perf_counter() - started
+
+    summary = harness.summarise(latencies)
+    summary.update(
+        requests=total,
+        concurrency=concurrency,
+        errors=len(errors),
+        wall_s=round(wall, 3),
+        throughput_rps=round(len(latencies) / wall, 3) if wall else None,
+    )
+    return {"summary": summary, "errors": errors}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--skip-llm", action="store_true", help="score only, no report generation")
+    parser.add_argument("--warm", action="store_true", help="let search, page and report caches hit")
+    parser.add_argument("--real-model", action="store_true")
+    parser.add_argument("--search-latency", type=float, default=0.3)
+    parser.add_argument("--page-latency", type=float, default=0.05)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--llm-tokens", type=int, default=200)
+    parser.add_argument("--save")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=1.25)
+    args = parser.parse_args()
+
+    with FakeStack(search_latency=args.search_latency, page_latency=args.page_latency,
+                   llm_latency=args.llm_latency, llm_tokens=args.llm_tokens, unique=not args.warm) as stack:
+        harness.use_offline_services(stack, real_model=args.real_model, warm_caches=args.warm)
+        server = start_app(free_port())
+        host, port = server.config.host, server.config.port
+        try:
+            result = asyncio.run(run_load(f"http://{host}:{port}", harness.make_pdf(), args.requests,
+                                          args.concurrency, args.skip_llm))
+        finally:
+            server.should_exit = True
+
+    summary = result["summary"]
+    summary.update(
+        search_calls=stack.tavily.requests,
+        page_fetches=stack.board.requests,
+        llm_calls=stack.ollama.requests,
+    )
+    for key, value in summary.items():
+        print(f"{key:<16} {value}")
+    for error in result["errors"][:5]:
+        print(f"ERROR {error}")
+
+    # Throughput regresses downward; gate on its inverse so one tolerance covers all three
+    gated = {
+        "p50": {"value": summary["p50_ms"]},
+        "p95": {"value": summary["p95_ms"]},
+        "seconds_per_request": {"value": 1 / summary["throughput_rps"] if summary["throughput_rps"] else None},
+    }
+    if args.save:
+        harness.save_results(gated, args.save)
+    if args.baseline:
+        regressions = harness.compare_to_baseline(gated, args.baseline, metric="value", tolerance=args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if regressions or result["errors"] else 0)
+    sys.exit(1 if result["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Micro-benchmarks for the CPU-bound pipeline stages, fully offline.
+
+    python -m benchmarks.bench_micro [--repeat 20] [--only chunk_text,extract_skills]
+                                     [--save results.json] [--baseline results.json --tolerance 1.25]
+
+Cases: PDF extraction (cold, bypassing the document cache), HTML cleaning,
+chunking (per text and batched), ephemeral index build, skill comparison and the skill extractors.
+Embeddings come from the hashing stand-in unless --real-model is given, so
+index numbers measure our code rather than the model.
+
+With --baseline the run exits non-zero when any case's p50 exceeds the
+baseline's by more than --tolerance, for use as a regression gate.
+"""
+import argparse
+import sys
+
+from benchmarks import harness
+from benchmarks.fakes import job_page
+
+
+def build_cases(jd_count: int) -> dict:
+    """name -> (fn, setup or None, items per call)"""
+    import cv_parser
+    from chunker import chunk_text, chunk_texts
+    from comparator import compare_skills
+    from job_parser import clean_html
+    from skills import count_skills, extract_skills
+    from vectorstore import build_vector_store
+
+    pdf = harness.make_pdf(pages=2)
+    html = job_page(1)
+    jd_texts = harness.sample_jd_texts(jd_count)
+    jd_blob = "\n\n".join(jd_texts)
+    chunks = [c for text in jd_texts for c in chunk_text(text)]
+    index = build_vector_store(chunks, mode="ephemeral")
+    cv_text = harness.CV_TEXT
+
+    return {
+        "extract_text_from_pdf": (lambda: cv_parser.extract_text_from_pdf(pdf), cv_parser._cache.clear, 1),
+        "clean_html": (lambda: clean_html(html), None, 1),
+        "chunk_text": (lambda: [chunk_text(t) for t in jd_texts], None, len(jd_texts)),
+        "chunk_texts_batched": (lambda: chunk_texts(jd_texts), None, len(jd_texts)),
+        "build_vector_store": (lambda: build_vector_store(chunks, mode="ephemeral"), None, len(chunks)),
+        "compare_skills": (lambda: compare_skills(cv_text, index, "Machine Learning Engineer", k=12), None, 1),
+        "extract_skills": (lambda: extract_skills(cv_text), None, 1),
+        "count_skills_jds": (lambda: count_skills(jd_blob), None, len(jd_texts)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--jds", type=int, default=10, help="job descriptions in the sample corpus")
+    parser.add_argument("--only", default="", help="comma-separated case names")
+    parser.add_argument("--real-model", action="store_true")
+    parser.add_argument("--save")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=1.25)
+    args = parser.parse_args()
+
+    harness.use_offline_services(real_model=args.real_model)
+    cases = build_cases(args.jds)
+    selected = [n for n in args.only.split(",") if n] or list(cases)
+
+    results = {}
+    print(f"{'case':<24} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'items/s':>10}")
+    for name in selected:
+        fn, setup, items = cases[name]
+        summary = harness.summarise(harness.measure(fn, repeat=args.repeat, setup=setup))
+        summary["items_per_s"] = round(items / (summary["p50_ms"] / 1000), 1) if summary["p50_ms"] else None
+        results[name] = summary
+        print(f"{name:<24} {summary['p50_ms']:>9.3f} {summary['p95_ms']:>9.3f} {summary['p99_ms']:>9.3f} "
+              f"{summary['items_per_s']:>10}")
+
+    if args.save:
+        harness.save_results(results, args.save)
+    if args.baseline:
+        regressions = harness.compare_to_baseline(results, args.baseline, tolerance=args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Retrieval quality and latency: one whole-CV query vs multi-query + RRF.
+
+    python -m benchmarks.bench_retrieval [--real-model] [--k 5]
+
+A small hand-labelled set: JD chunks each cover one topic, and every CV
+lists the chunk ids a recruiter would cite for it. Reports recall@k and
+MRR per approach, plus median latency. The real MiniLM model shows the
+truncation effect on long CVs; the default hashing embedder runs offline.
+"""
+import argparse
+import statistics
+import time
+
+import registry
+from benchmarks.bench_vectorstore import HashingEmbeddings
+from retrieval import multi_query_retrieve
+from skills import extract_skills
+from vectorstore import InMemoryIndex
+
+JD_CHUNKS = {
+    "py": "Strong Python skills: writing production services, packaging, typing and testing with pytest.",
+    "k8s": "Deploy and operate workloads on Kubernetes; write Helm charts and manage cluster autoscaling.",
+    "aws": "Hands-on AWS experience: S3, Lambda, IAM and SageMaker for model training and hosting.",
+    "spark": "Build large-scale batch pipelines in Apache Spark and orchestrate them with Airflow.",
+    "sql": "Advanced SQL, data modeling and query optimisation on PostgreSQL and Snowflake.",
+    "ml": "Train and evaluate machine learning models with scikit-learn and PyTorch; track runs in MLflow.",
+    "react": "Build responsive front-ends in React and TypeScript backed by REST APIs.",
+    "lead": "Lead a small team, mentor juniors and communicate with stakeholders across the business.",
+    "llm": "Prototype LLM applications with LangChain, retrieval augmented generation and prompt engineering.",
+    "ci": "Own CI/CD with GitHub Actions and Docker images; keep builds fast and reliable.",
+    "sec": "Apply security best practices: OAuth, secrets management and threat modelling.",
+    "perks": "We offer flexible hours, a learning budget, and a hybrid office in the city centre.",
+}
+
+CVS = [
+    (
+        """SUMMARY
+Backend engineer focused on Python services.
+EXPERIENCE
+Built APIs in Python and FastAPI, tested with pytest. Containerised with Docker and shipped via GitHub Actions.
+Ran services on Kubernetes with Helm. Some AWS Lambda and S3.
+SKILLS
+Python, Docker, Kubernetes, AWS, CI/CD""",
+        {"py", "k8s", "aws", "ci"},
+    ),
+    (
+        """PROFILE
+Data engineer.
+EXPERIENCE
+""" + "Maintained reporting dashboards and wrote documentation for internal tools. " * 30 + """
+Designed Spark pipelines orchestrated with Airflow; heavy SQL on PostgreSQL and Snowflake.
+SKILLS
+Spark, Airflow, SQL, Snowflake""",
+        {"spark", "sql"},
+    ),
+    (
+        """SUMMARY
+ML engineer and team lead.
+PROJECTS
+RAG assistant with LangChain and prompt engineering. Trained PyTorch and scikit-learn models tracked in MLflow.
+EXPERIENCE
+Led a team of five, mentoring juniors and reporting to stakeholders.
+SKILLS
+PyTorch, scikit-learn, MLflow, LangChain, LLM""",
+        {"ml", "llm", "lead"},
+    ),
+]
+
+
+def score(ranked_ids: list, relevant: set, k: int):
+    recall = len(set(ranked_ids[:k]) & relevant) / len(relevant)
+    rr = next((1.0 / (i + 1) for i, cid in enumerate(ranked_ids) if cid in relevant), 0.0)
+    return recall, rr
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--real-model", action="store_true")
+    args = parser.parse_args()
+
+    if not args.real_model:
+        registry.register("embeddings", HashingEmbeddings)
+    embeddings = registry.get_embeddings()
+
+    ids = list(JD_CHUNKS)
+    texts = [JD_CHUNKS[i] for i in ids]
+    by_text = dict(zip(texts, ids))
+    index = InMemoryIndex.from_texts(texts, embeddings)
+
+    results = {"single": [], "multi": []}
+    for cv_text, relevant in CVS:
+        start = time.perf_counter()
+        single = [by_text[d.page_content] for d in index.similarity_search(cv_text, k=len(ids))]
+        results["single"].append((*score(single, relevant, args.k), time.perf_counter() - start))
+
+        start = time.perf_counter()
+        multi = multi_query_retrieve(index, cv_text, extract_skills(cv_text), k=len(ids))
+        ranked = [by_text[t] for t in multi["evidence"]]
+        results["multi"].append((*score(ranked, relevant, args.k), time.perf_counter() - start))
+
+    print(f"{'approach':<9} {'recall@' + str(args.k):>9} {'MRR':>6} {'p50 ms':>8}")
+    for name, rows in results.items():
+        recall = statistics.mean(r[0] for r in rows)
+        mrr = statistics.mean(r[1] for r in rows)
+        latency = statistics.median(r[2] for r in rows) * 1000
+        print(f"{name:<9} {recall:>9.2f} {mrr:>6.2f} {latency:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
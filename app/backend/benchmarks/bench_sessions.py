@@ -0,0 +1,106 @@
+"""
+Incremental re-analysis: a first upload, a revised CV in the same session,
+and the same CV again, against the local stand-ins.
+
+    python -m benchmarks.bench_sessions [--rounds 5] [--search-latency 0.3] [--page-latency 0.05]
+
+Each round runs the three uploads under a fresh session and reports the
+median wall time, how many retrieval queries were embedded, and the prompt
+tokens of the full report vs the delta revision. Fails when the revision
+doesn't reuse the session (search ran again, every query was re-embedded, no
+delta prompt or one no smaller than the full prompt) or its merged report lost the sections it didn't rewrite.
+The stand-in LLM writes the same number of tokens for both prompts, so the
+saving in generated tokens needs a real model to measure.
+"""
+import argparse
+import re
+import statistics
+import sys
+import time
+import uuid
+
+from agent import iter_agent_events
+from benchmarks.fakes import FakeStack
+from benchmarks.harness import CV_TEXT, use_offline_services
+
+ROLE = "Machine Learning Engineer"
+# One edited section and one added section; the rest of the CV is untouched
+REVISED_CV = CV_TEXT.replace(
+    "Led a team of four engineers and presented results to stakeholders.",
+    "Led a team of six engineers, introduced Terraform and Kubernetes autoscaling, and presented to stakeholders.",
+) + "\nCERTIFICATIONS\nAWS Certified Machine Learning Specialty; Certified Kubernetes Application Developer\n"
+
+
+def headings(report: str) -> list:
+    return re.findall(r"^##\s+(.+?)\s*$", report, re.MULTILINE)
+
+
+def run(cv_text: str, session_id: str) -> dict:
+    started = time.perf_counter()
+    stages = {}
+    result = {}
+    for event in iter_agent_events(cv_text, ROLE, session_id=session_id):
+        if event["event"] == "stage" and event["status"] == "done":
+            stages[event["stage"]] = event
+        elif event["event"] == "done":
+            result = event
+        elif event["event"] == "error":
+            raise RuntimeError(event["message"])
+    return {
+        "seconds": time.perf_counter() - started,
+        "searched": "search" in stages,
+        "embedded": stages.get("retrieve", {}).get("embedded"),
+        "queries": stages.get("retrieve", {}).get("queries"),
+        "prompt_tokens": stages.get("context", {}).get("prompt_tokens"),
+        "incremental": result.get("incremental", False),
+        "report": result.get("report") or "",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--search-latency", type=float, default=0.3)
+    parser.add_argument("--page-latency", type=float, default=0.05)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    failures = []
+    rows = {"first upload": [], "revised CV": [], "same CV again": []}
+    with FakeStack(search_latency=args.search_latency, page_latency=args.page_latency,
+                   llm_latency=args.llm_latency) as stack:
+        use_offline_services(stack)
+        for round_number in range(args.rounds):
+            session_id = uuid.uuid4().hex
+            first = run(CV_TEXT, session_id)
+            revised = run(REVISED_CV, session_id)
+            again = run(REVISED_CV, session_id)
+            for name, row in zip(rows, (first, revised, again)):
+                rows[name].append(row)
+
+            if revised["searched"]:
+                failures.append(f"round {round_number}: revision searched the job market again")
+            if not revised["incremental"]:
+                failures.append(f"round {round_number}: revision regenerated the full report")
+            elif revised["prompt_tokens"] >= first["prompt_tokens"]:
+                failures.append(f"round {round_number}: delta prompt is no smaller than the full prompt")
+            if revised["embedded"] is None or revised["embedded"] >= revised["queries"]:
+                failures.append(f"round {round_number}: every retrieval query was embedded again")
+            if not set(headings(first["report"])) <= set(headings(revised["report"])):
+                failures.append(f"round {round_number}: merged report lost sections")
+            if again["report"] != revised["report"]:
+                failures.append(f"round {round_number}: identical CV did not reuse the report")
+
+    print(f"{'upload':<16} {'median s':>9} {'embedded':>9} {'queries':>8} {'prompt tok':>11} {'delta':>6}")
+    for name, runs in rows.items():
+        last = runs[-1]
+        print(f"{name:<16} {statistics.median(r['seconds'] for r in runs):>9.3f} {last['embedded']!s:>9} "
+              f"{last['queries']!s:>8} {last['prompt_tokens']!s:>11} {str(last['incremental']):>6}")
+
+    for failure in failures:
+        print(f"FAILED {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
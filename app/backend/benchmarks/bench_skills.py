@@ -0,0 +1,73 @@
+"""
+Skill extraction scaling benchmark.
+
+    python -m benchmarks.bench_skills
+
+Measures the Aho-Corasick matcher while growing (a) CV length with a fixed
+taxonomy and (b) taxonomy size with a fixed CV. Time per character should
+stay flat in (a) and total time should stay roughly flat in (b), unlike a
+per-skill scan whose cost grows with the number of skills.
+"""
+import random
+import re
+import string
+import time
+
+from skills import SkillMatcher, default_matcher
+
+CV_SAMPLE = """
+Senior Machine Learning Engineer with 6 years of experience building ML platforms.
+Skills: Python, PyTorch, TensorFlow, scikit-learn, pandas, NumPy, SQL, Spark, Airflow.
+Deployed models on AWS SageMaker and GCP with Docker, k8s and Terraform; CI/CD via GitHub Actions.
+Built REST APIs in FastAPI and Node.js, dashboards in React, and RAG pipelines with LangChain.
+Led a team of 4, agile/scrum, strong communication and stakeholder management.
+"""
+
+
+def time_call(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def synthetic_taxonomy(size: int, seed: int = 3) -> dict:
+    rng = random.Random(seed)
+    skills = dict(default_matcher.skills)
+    while len(skills) < size:
+        name = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 12)))
+        skills[name] = [name + "js", name + " framework"]
+    return skills
+
+
+def naive_scan(skills: dict, text: str) -> list:
+    """The old approach: one word-boundary regex per skill."""
+    text = text.lower()
+    return [s for s in skills if re.search(r"\b" + re.escape(s) + r"\b", text)]
+
+
+def main():
+    print("(a) CV length, bundled taxonomy")
+    print(f"{'chars':>9} {'ms':>9} {'ns/char':>9}")
+    for factor in (1, 4, 16, 64, 256):
+        text = CV_SAMPLE * factor
+        seconds = time_call(lambda: default_matcher.extract(text))
+        print(f"{len(text):>9} {seconds * 1000:>9.2f} {seconds / len(text) * 1e9:>9.1f}")
+
+    print("\n(b) taxonomy size, fixed CV")
+    text = CV_SAMPLE * 16
+    print(f"{'skills':>9} {'build ms':>9} {'match ms':>9} {'naive ms':>9}")
+    for size in (200, 1000, 5000, 20000):
+        skills = synthetic_taxonomy(size)
+        start = time.perf_counter()
+        matcher = SkillMatcher(skills)
+        build = time.perf_counter() - start
+        match = time_call(lambda: matcher.extract(text))
+        naive = time_call(lambda: naive_scan(skills, text), repeat=1)
+        print(f"{size:>9} {build * 1000:>9.1f} {match * 1000:>9.2f} {naive * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
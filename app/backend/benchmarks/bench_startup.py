@@ -0,0 +1,141 @@
+"""
+Cold-start budget check: how long `import app` takes, where that time goes,
+and (with --serve) how long a fresh process takes to warm up and answer.
+
+    python -m benchmarks.bench_startup [--runs 5] [--budget-ms 1500] [--top 15]
+    python -m benchmarks.bench_startup --serve [--serve-timeout 300]
+
+Imports are profiled with `python -X importtime` in fresh interpreters with
+TAVILY_API_KEY unset, which also proves the API starts in offline mode.
+Exits non-zero when the median import time exceeds --budget-ms or when a
+heavy stack that should load lazily (LangChain, torch, chonkie, ...) is
+imported eagerly.
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Only needed once a request (or the warm-up) reaches them
+LAZY_PACKAGES = (
+    "langchain", "langchain_core", "langchain_community", "langchain_ollama", "langchain_huggingface",
+    "sentence_transformers", "torch", "transformers", "chonkie", "chromadb", "tavily", "bs4",
+)
+
+_LINE_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def offline_env() -> dict:
+    env = dict(os.environ)
+    env.pop("TAVILY_API_KEY", None)
+    return env
+
+
+def profile_imports() -> list:
+    """[(module, self_us, cumulative_us, depth)] from one `python -X importtime -c "import app"`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=BACKEND_DIR, env=offline_env(), capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import app failed:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2))
+    return rows
+
+
+def first_party_modules() -> set:
+    return {name[:-3] for name in os.listdir(BACKEND_DIR) if name.endswith(".py")}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve_once(timeout: float) -> dict:
+    """Start `python app.py` and time until /startup answers (warm-up finishes before serving)."""
+    port = free_port()
+    env = offline_env()
+    env.update(PORT=str(port), LOG_LEVEL="WARNING")
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "app.py"], cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"app.py exited with {process.returncode}")
+            try:
+                # uvicorn only accepts once the lifespan warm-up has finished
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/startup", timeout=2) as response:
+                    report = json.load(response)
+                return {"seconds_to_serve": round(time.perf_counter() - started, 3), "startup": report}
+            except OSError:
+                time.sleep(0.1)
+        raise RuntimeError(f"app did not serve within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--serve", action="store_true", help="also time a full process start to first response")
+    parser.add_argument("--serve-timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    runs = [profile_imports() for _ in range(args.runs)]
+    totals = [next(cum for name, _, cum, depth in rows if name == "app" and depth == 0) / 1000 for rows in runs]
+    median_ms = statistics.median(totals)
+    rows = runs[totals.index(sorted(totals)[len(totals) // 2])]
+
+    ours = first_party_modules()
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        top_level = name.split(".")[0]
+        by_package["(app modules)" if top_level in ours else top_level] += self_us
+    eager = sorted({name.split(".")[0] for name, *_ in rows} & set(LAZY_PACKAGES))
+
+    print(f"import app: median {median_ms:.0f} ms over {args.runs} runs "
+          f"(min {min(totals):.0f}, max {max(totals):.0f}); budget {args.budget_ms:.0f} ms\n")
+    print(f"{'package':<28} {'self ms':>9}")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<28} {self_us / 1000:>9.1f}")
+    print("\nApp modules, cumulative ms:")
+    for name, _, cum, _ in sorted((r for r in rows if r[0] in ours), key=lambda r: -r[2])[:args.top]:
+        print(f"  {name:<26} {cum / 1000:>9.1f}")
+
+    failed = False
+    if eager:
+        print(f"\nFAILED: imported eagerly, should be lazy: {', '.join(eager)}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"\nFAILED: import time {median_ms:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+        failed = True
+
+    if args.serve:
+        result = serve_once(args.serve_timeout)
+        print(f"\nProcess start to first response: {result['seconds_to_serve']:.2f}s")
+        for name, entry in result["startup"].items():
+            print(f"  {name:<14} {entry['status']:<6} {entry['seconds']:>7.3f}s {entry.get('error') or ''}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
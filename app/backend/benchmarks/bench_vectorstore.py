@@ -0,0 +1,122 @@
+"""
+Compare vector store modes over a sequence of simulated requests.
+
+    python -m benchmarks.bench_vectorstore [--requests 20] [--chunks 40] [--real-model]
+
+Modes:
+  chroma     current behaviour: every request writes to the shared, persisted
+             "job_descriptions" collection
+  ephemeral  per-request in-memory NumPy index
+  corpus     ephemeral index plus the upsert into the long-lived corpus
+             collection (run inline here so its cost is visible)
+
+By default a deterministic hashing embedder replaces the model so that only
+index cost is measured; --real-model uses the shared MiniLM embeddings.
+"""
+import argparse
+import hashlib
+import random
+import re
+import shutil
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+import registry
+import vectorstore
+
+VOCAB = ("python sql docker kubernetes aws spark airflow pandas pytorch tensorflow mlflow "
+         "terraform react java scala communication stakeholders pipelines models deploy "
+         "monitoring experience years team design data production cloud").split()
+
+
+class HashingEmbeddings:
+    """Bag-of-words hashed into a fixed-size vector; fast and deterministic."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _embed(self, text: str):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1.0
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def make_request(rng: random.Random, request_id: int, n_chunks: int):
+    chunks = [
+        f"req{request_id} chunk{i} " + " ".join(rng.choice(VOCAB) for _ in range(120))
+        for i in range(n_chunks)
+    ]
+    cv = " ".join(rng.choice(VOCAB) for _ in range(300))
+    return chunks, cv
+
+
+def run_mode(mode: str, n_requests: int, n_chunks: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    build_times, query_times, leaked = [], [], 0
+    returned = 0
+
+    for request_id in range(n_requests):
+        chunks, cv = make_request(rng, request_id, n_chunks)
+
+        start = time.perf_counter()
+        if mode == "corpus":
+            store = vectorstore.build_vector_store(chunks, mode="ephemeral")
+            vectorstore.add_to_corpus(chunks)
+        else:
+            store = vectorstore.build_vector_store(chunks, mode=mode)
+        build_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        results = store.similarity_search(cv, k=5)
+        query_times.append(time.perf_counter() - start)
+
+        # Evidence that belongs to a different request is a cross-user leak
+        own = set(chunks)
+        leaked += sum(1 for r in results if r.page_content not in own)
+        returned += len(results)
+
+    return {
+        "mode": mode,
+        "build_p50_ms": statistics.median(build_times) * 1000,
+        "build_last_ms": build_times[-1] * 1000,
+        "query_p50_ms": statistics.median(query_times) * 1000,
+        "leak_rate": leaked / returned if returned else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--chunks", type=int, default=40)
+    parser.add_argument("--modes", default="chroma,ephemeral,corpus")
+    parser.add_argument("--real-model", action="store_true")
+    args = parser.parse_args()
+
+    if not args.real_model:
+        registry.register("embeddings", HashingEmbeddings)
+
+    print(f"{'mode':<10} {'build p50':>11} {'build last':>11} {'query p50':>10} {'leak rate':>10}")
+    for mode in args.modes.split(","):
+        # Each mode gets a fresh persist directory so runs don't contaminate each other
+        persist_dir = tempfile.mkdtemp(prefix=f"bench-{mode}-")
+        vectorstore.CHROMA_PERSIST_DIR = persist_dir
+        try:
+            r = run_mode(mode, args.requests, args.chunks)
+        finally:
+            shutil.rmtree(persist_dir, ignore_errors=True)
+        print(f"{r['mode']:<10} {r['build_p50_ms']:>9.2f}ms {r['build_last_ms']:>9.2f}ms "
+              f"{r['query_p50_ms']:>8.2f}ms {r['leak_rate']:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
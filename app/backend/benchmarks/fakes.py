@@ -0,0 +1,375 @@
+"""
+Local stand-ins for the services the pipeline talks to, so benchmarks run
+offline and deterministically:
+
+  FakeTavily    POST /search, returns job-board URLs (with FakeTavilyClient)
+  FakeJobBoard  GET /jobs/<n>, serves a generated job-description page
+  FakeOllama    GET /api/tags, POST /api/generate (streamed NDJSON)
+  FakeRedis     the Redis commands the cache backends use, over RESP
+
+Each server runs on a daemon thread on 127.0.0.1 with a free port and adds
+`latency` seconds (plus up to `jitter`) to every response.
+"""
+import hashlib
+import json
+import random
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import requests
+
+JOB_SKILLS = (
+    "Python", "SQL", "Docker", "Kubernetes", "AWS", "Spark", "Airflow", "pandas", "PyTorch",
+    "TensorFlow", "MLflow", "Terraform", "React", "TypeScript", "FastAPI", "PostgreSQL",
+    "Snowflake", "scikit-learn", "Git", "CI/CD", "LangChain", "Kafka", "Redis", "GCP",
+)
+FILLER = (
+    "You will work closely with product and engineering to ship reliable systems. "
+    "We value ownership, clear communication and a habit of measuring before optimising. "
+)
+
+
+def job_page(job_id: int, words: int = 600) -> str:
+    """Deterministic HTML job posting; the skill mix depends on the id."""
+    rng = random.Random(job_id)
+    skills = rng.sample(JOB_SKILLS, 8)
+    bullets = "".join(f"<li>Hands-on experience with {s} in production.</li>" for s in skills)
+    body = " ".join(FILLER.split() * (words // len(FILLER.split()) + 1))[: words * 7]
+    return (
+        f"<html><head><title>Job {job_id}</title><script>var tracking = {job_id};</script></head>"
+        f"<body><nav>Home | Jobs | About</nav><main><h1>Engineer #{job_id}</h1>"
+        f"<h2>Requirements</h2><ul>{bullets}</ul><h2>About the role</h2><p>{body}</p></main>"
+        f"<footer>Copyright Example Jobs</footer></body></html>"
+    )
+
+
+class FakeServer:
+    """Threaded HTTP server on a free local port with injected latency."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.requests = 0
+        # For tests: requests being handled now, the most at once, and when each arrived
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.arrivals = []
+        self._lock = threading.Lock()
+        self._server = None
+
+    def delay(self):
+        with self._lock:
+            self.requests += 1
+        wait = self.latency + random.uniform(0, self.jitter)
+        if wait > 0:
+            time.sleep(wait)
+
+    def handle(self, handler: BaseHTTPRequestHandler, method: str):
+        raise NotImplementedError
+
+    def serve(self, handler: BaseHTTPRequestHandler, method: str):
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            self.arrivals.append(time.perf_counter())
+        try:
+            self.handle(handler, method)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def start(self) -> str:
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                owner.serve(self, "GET")
+
+            def do_POST(self):
+                owner.serve(self, "POST")
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.url
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    @staticmethod
+    def read_json(handler) -> dict:
+        length = int(handler.headers.get("Content-Length") or 0)
+        return json.loads(handler.rfile.read(length) or b"{}")
+
+    @staticmethod
+    def send(handler, status: int, body: bytes, content_type: str, headers: dict = None):
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+class FakeJobBoard(FakeServer):
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02, words: int = 600):
+        super().__init__(latency, jitter)
+        self.words = words
+
+    def handle(self, handler, method):
+        self.delay()
+        path = urlparse(handler.path).path
+        if method != "GET" or not path.startswith("/jobs/"):
+            self.send(handler, 404, b"not found", "text/plain")
+            return
+        job_id = int(path.rsplit("/", 1)[-1])
+        html = job_page(job_id, self.words).encode("utf-8")
+        etag = '"%s"' % hashlib.md5(html).hexdigest()
+        self.send(handler, 200, html, "text/html; charset=utf-8", {"ETag": etag})
+
+
+class FakeTavily(FakeServer):
+    """
+    Returns `results` job-board URLs per search. With `unique` on, every
+    search returns fresh URLs so nothing is served from the page cache.
+    """
+
+    def __init__(self, board_url: str, latency: float = 0.3, jitter: float = 0.1, results: int = 5,
+                 unique: bool = True):
+        super().__init__(latency, jitter)
+        self.board_url = board_url
+        self.results = results
+        self.unique = unique
+        self._next_id = 0
+
+    def handle(self, handler, method):
+        self.delay()
+        payload = self.read_json(handler)
+        count = int(payload.get("max_results") or self.results)
+        with self._lock:
+            if self.unique:
+                first, self._next_id = self._next_id, self._next_id + count
+            else:
+                first = 0
+        results = [
+            {
+                "title": f"Engineer #{i}",
+                "url": f"{self.board_url}/jobs/{i}",
+                # Short snippet, so the pipeline has to fetch the page
+                "content": "Job posting",
+                "score": 0.9,
+            }
+            for i in range(first, first + count)
+        ]
+        body = json.dumps({"query": payload.get("query"), "results": results}).encode("utf-8")
+        self.send(handler, 200, body, "application/json")
+
+
+class FakeTavilyClient:
+    """Drop-in for TavilyClient.search that talks to a FakeTavily server."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.session = requests.Session()
+
+    def search(self, query: str, limit: int = 5, **kwargs) -> dict:
+        response = self.session.post(f"{self.base_url}/search", json={"query": query, "max_results": limit}, timeout=30)
+        response.raise_for_status()
+        return response.json()
+
+
+class FakeOllama(FakeServer):
+    """
+    Streams `tokens` tokens per generation: `latency` before the first one,
+    then `token_latency` between tokens, like a real model's prefill + decode.
+    """
+
+    def __init__(self, model: str = "fake-llm", latency: float = 0.2, jitter: float = 0.05, tokens: int = 200,
+                 token_latency: float = 0.005):
+        super().__init__(latency, jitter)
+        self.model = model
+        self.tokens = tokens
+        self.token_latency = token_latency
+
+    def handle(self, handler, method):
+        path = urlparse(handler.path).path
+        if method == "GET" and path == "/api/tags":
+            body = json.dumps({"models": [{"name": f"{self.model}:latest", "model": f"{self.model}:latest"}]})
+            self.send(handler, 200, body.encode("utf-8"), "application/json")
+            return
+        if method != "POST" or path != "/api/generate":
+            self.send(handler, 404, b"not found", "text/plain")
+            return
+
+        payload = self.read_json(handler)
+        started = time.perf_counter()
+        self.delay()
+        words = ["## Report\n"] + [f"word{i} " for i in range(self.tokens - 1)]
+
+        def chunk(text: str, done: bool = False) -> bytes:
+            entry = {"model": payload.get("model", self.model), "created_at": "2024-01-01T00:00:00Z",
+                     "response": text, "done": done}
+            if done:
+                entry.update(done_reason="stop", eval_count=self.tokens,
+                             total_duration=int((time.perf_counter() - started) * 1e9))
+            return (json.dumps(entry) + "\n").encode("utf-8")
+
+        if payload.get("stream", True) is False:
+            for _ in words:
+                time.sleep(self.token_latency)
+            body = chunk("".join(words), done=True)
+            self.send(handler, 200, body, "application/json")
+            return
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/x-ndjson")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+        for word in words:
+            time.sleep(self.token_latency)
+            self._write_chunk(handler, chunk(word))
+        self._write_chunk(handler, chunk("", done=True))
+        handler.wfile.write(b"0\r\n\r\n")
+
+    @staticmethod
+    def _write_chunk(handler, data: bytes):
+        handler.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        handler.wfile.flush()
+
+
+class FakeRedis:
+    """
+    In-memory Redis speaking RESP2: PING, GET, MGET, SET (EX/PX), DEL, EXISTS,
+    FLUSHDB and DBSIZE. Connection setup commands (CLIENT, SELECT) are
+    acknowledged and ignored. Enough for cache_backends.RedisBackend.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.commands = 0
+        self._data = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _live(self, key: bytes):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            del self._data[key]
+            return None
+        return entry
+
+    def execute(self, args: list) -> bytes:
+        name = args[0].upper()
+        with self._lock:
+            self.commands += 1
+            if name == b"PING":
+                return b"+PONG\r\n"
+            if name in (b"CLIENT", b"SELECT"):
+                return b"+OK\r\n"
+            if name == b"GET":
+                return self.bulk(self._live(args[1]))
+            if name == b"MGET":
+                return b"*%d\r\n" % (len(args) - 1) + b"".join(self.bulk(self._live(k)) for k in args[1:])
+            if name == b"SET":
+                expires_at = None
+                options = [a.upper() for a in args[3:]]
+                if b"PX" in options:
+                    expires_at = time.time() + int(args[3 + options.index(b"PX") + 1]) / 1000
+                elif b"EX" in options:
+                    expires_at = time.time() + int(args[3 + options.index(b"EX") + 1])
+                self._data[args[1]] = (args[2], expires_at)
+                return b"+OK\r\n"
+            if name in (b"DEL", b"EXISTS"):
+                found = [k for k in args[1:] if self._live(k) is not None]
+                if name == b"DEL":
+                    for key in found:
+                        del self._data[key]
+                return b":%d\r\n" % len(found)
+            if name == b"DBSIZE":
+                return b":%d\r\n" % len(self._data)
+            if name == b"FLUSHDB":
+                self._data.clear()
+                return b"+OK\r\n"
+        return b"-ERR unknown command '%s'\r\n" % name
+
+    @staticmethod
+    def bulk(entry) -> bytes:
+        if entry is None:
+            return b"$-1\r\n"
+        return b"$%d\r\n%s\r\n" % (len(entry[0]), entry[0])
+
+    def start(self) -> str:
+        owner = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            # Small replies to pipelined commands otherwise stall on delayed ACKs
+            disable_nagle_algorithm = True
+
+            def handle(self):
+                while True:
+                    header = self.rfile.readline()
+                    if not header:
+                        return
+                    if not header.startswith(b"*"):
+                        # Inline command, e.g. from redis-cli or telnet
+                        args = header.split()
+                    else:
+                        args = []
+                        for _ in range(int(header[1:])):
+                            length = int(self.rfile.readline()[1:])
+                            args.append(self.rfile.read(length + 2)[:-2])
+                    if owner.latency:
+                        time.sleep(owner.latency)
+                    self.wfile.write(owner.execute(args))
+                    self.wfile.flush()
+
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.url
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"redis://{host}:{port}/0"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+class FakeStack:
+    """Starts all three stand-ins; use as a context manager."""
+
+    def __init__(self, search_latency: float = 0.3, page_latency: float = 0.05, llm_latency: float = 0.2,
+                 llm_tokens: int = 200, token_latency: float = 0.005, results: int = 5, unique: bool = True):
+        self.board = FakeJobBoard(latency=page_latency)
+        self.board_url = self.board.start()
+        self.tavily = FakeTavily(self.board_url, latency=search_latency, results=results, unique=unique)
+        self.tavily_url = self.tavily.start()
+        self.ollama = FakeOllama(latency=llm_latency, tokens=llm_tokens, token_latency=token_latency)
+        self.ollama_url = self.ollama.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        for server in (self.board, self.tavily, self.ollama):
+            server.stop()
@@ -0,0 +1,162 @@
+"""
+Shared pieces for the offline benchmark suite: timing and percentiles,
+sample inputs, wiring the pipeline to the local stand-ins, and baseline
+comparison for regression gating.
+"""
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import registry
+from benchmarks.bench_vectorstore import HashingEmbeddings
+from benchmarks.fakes import FakeTavilyClient, job_page
+from jd_cache import JDCache
+from llm_cache import LLMCache
+from sessions import SessionStore
+
+CV_TEXT = """JANE DOE
+Senior Machine Learning Engineer
+
+SUMMARY
+Machine learning engineer with 6 years of experience building ML platforms and data pipelines.
+
+EXPERIENCE
+Built REST APIs in Python and FastAPI, tested with pytest and shipped through GitHub Actions CI/CD.
+Trained PyTorch and scikit-learn models, tracked experiments in MLflow and served them on AWS SageMaker.
+Ran Spark and Airflow pipelines over PostgreSQL and Snowflake; containerised with Docker on Kubernetes.
+Led a team of four engineers and presented results to stakeholders.
+
+PROJECTS
+Retrieval augmented generation assistant with LangChain and prompt engineering.
+
+SKILLS
+Python, SQL, PyTorch, scikit-learn, pandas, Docker, Kubernetes, AWS, Spark, Airflow, MLflow, Git
+"""
+
+
+def percentile(values: list, p: float) -> float:
+    """Nearest-rank percentile; `p` in 0..100."""
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    rank = max(1, min(len(ordered), int(round(p / 100 * len(ordered) + 0.5))))
+    return ordered[rank - 1]
+
+
+def summarise(samples: list) -> dict:
+    """Latency summary in milliseconds from samples in seconds."""
+    ms = [s * 1000 for s in samples]
+    return {
+        "n": len(ms),
+        "mean_ms": round(statistics.mean(ms), 3) if ms else None,
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+    }
+
+
+def measure(fn, repeat: int = 20, warmup: int = 2, setup=None) -> list:
+    """Time `fn()` `repeat` times after `warmup` untimed calls; `setup()` runs untimed before each."""
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def make_pdf(text: str = CV_TEXT, pages: int = 2) -> bytes:
+    """A small text PDF built with PyMuPDF, `pages` copies of `text`."""
+    import fitz
+
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(50, 50, 550, 800), f"{text}\nPage {number + 1}", fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def sample_jd_texts(count: int = 10, words: int = 600) -> list:
+    """Cleaned text of `count` generated job pages."""
+    from job_parser import clean_html
+    return [clean_html(job_page(i, words)) for i in range(count)]
+
+
+class ColdJDCache(JDCache):
+    """Stores as usual but never returns a search or page, so every request does the full work."""
+
+    def get_search(self, query: str):
+        self.record("search_misses")
+        return None
+
+    def get_page(self, url: str):
+        return None
+
+
+def use_offline_services(stack=None, real_model: bool = False, warm_caches: bool = False) -> str:
+    """
+    Point the shared registry at the stand-ins: hashing embeddings (unless
+    `real_model`), fake Tavily and Ollama from `stack`, and throwaway caches
+    and session store.
+    Unless `warm_caches`, search, page and LLM caches never return hits.
+    Market profiles are switched off so every role goes through live search.
+    Returns the temporary cache directory. The changes are process-wide and
+    stay in place; the test suite undoes them after each test (tests/conftest.py).
+    """
+    import job_parser
+    import market_profiles
+
+    cache_dir = tempfile.mkdtemp(prefix="bench-cache-")
+    jd_cache_class = JDCache if warm_caches else ColdJDCache
+
+    if not real_model:
+        registry.register("embeddings", HashingEmbeddings)
+    registry.register("jd_cache", lambda: jd_cache_class(os.path.join(cache_dir, "jd.sqlite3")))
+    registry.register("llm_cache", lambda: LLMCache(
+        os.path.join(cache_dir, "llm.sqlite3"), **({} if warm_caches else {"ttl": 0})
+    ))
+    registry.register("session_store", lambda: SessionStore(os.path.join(cache_dir, "sessions.sqlite3"),
+                                                            50 * 1024 * 1024))
+
+    market_profiles.MARKET_PROFILE_ENABLED = False
+
+    if stack is not None:
+        os.environ["OLLAMA_BASE_URL"] = stack.ollama_url
+        os.environ["OLLAMA_MODEL"] = stack.ollama.model
+        # Rebuilt on first use, so it talks to this stack's Ollama
+        registry.register("llm", registry._build_llm)
+        registry.register("tavily", lambda: FakeTavilyClient(stack.tavily_url))
+        # Every stand-in page lives on one host; per-domain politeness would serialise them
+        job_parser._domain_limiter = job_parser.DomainLimiter(per_domain=job_parser.FETCH_CONCURRENCY, delay=0)
+    return cache_dir
+
+
+def save_results(results: dict, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def compare_to_baseline(results: dict, baseline_path: str, metric: str = "p50_ms", tolerance: float = 1.25) -> list:
+    """
+    Names whose `metric` is more than `tolerance` times the baseline's.
+    Cases missing from either side are skipped.
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = []
+    for name, entry in results.items():
+        before = (baseline.get(name) or {}).get(metric)
+        after = entry.get(metric)
+        if before and after and after > before * tolerance:
+            regressions.append(f"{name}: {metric} {after:.2f} vs baseline {before:.2f} (x{after / before:.2f})")
+    return regressions
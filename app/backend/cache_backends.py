@@ -0,0 +1,302 @@
+"""
+Key-value storage behind the JD, embedding and LLM caches and the job store.
+
+  memory  per-process LRU dict; nothing survives a restart
+  sqlite  one file per cache on local disk (the default); shared only by
+          processes on the same volume
+  redis   any Redis-protocol server; shared by every replica, which is what
+          lets the backend run with more than one pod
+
+Values are bytes; callers own the encoding. `ttl` is a hard expiry in seconds
+(None keeps the entry until it is evicted). memory and sqlite evict least
+recently used entries above `max_bytes` (sqlite to within
+SQLITE_TOUCH_INTERVAL); Redis relies on its own maxmemory policy. A cache that can't reach Redis degrades to misses, never to errors.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from observability import get_logger
+
+logger = get_logger(__name__)
+
+# Default for every cache; JD_CACHE_BACKEND, EMBED_CACHE_BACKEND, LLM_CACHE_BACKEND
+# and SESSION_CACHE_BACKEND override it per cache, JOB_STORE picks the job store
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite").lower()
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_KEY_PREFIX = os.getenv("REDIS_KEY_PREFIX", "career-mentor")
+REDIS_TIMEOUT = float(os.getenv("REDIS_TIMEOUT", 2.0))
+MEMORY_CACHE_MAX_BYTES = int(os.getenv("MEMORY_CACHE_MAX_BYTES", 100 * 1024 * 1024))
+# SQLite records a read for LRU only when the entry's last recorded access is older
+# than this, so repeated hits on hot keys stay read-only
+SQLITE_TOUCH_INTERVAL = float(os.getenv("SQLITE_TOUCH_INTERVAL", 300))
+
+
+def backend_kind(cache: str) -> str:
+    """Configured backend for `cache` ("JD", "EMBED", "LLM" or "SESSION")."""
+    return os.getenv(f"{cache}_CACHE_BACKEND", CACHE_BACKEND).lower()
+
+
+def uses_redis() -> bool:
+    kinds = [backend_kind(cache) for cache in ("JD", "EMBED", "LLM", "SESSION")]
+    return "redis" in kinds or os.getenv("JOB_STORE", "memory").lower() == "redis"
+
+
+class MemoryBackend:
+    name = "memory"
+    shared = False
+
+    def __init__(self, max_bytes: int = MEMORY_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        # key -> (value, expires_at or None), least recently used first
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _pop(self, key: str):
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(value)
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] is not None and entry[1] <= time.time():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def get_many(self, keys: list) -> dict:
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def set(self, key: str, value: bytes, ttl: float = None):
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items: dict, ttl: float = None):
+        if ttl is not None and ttl <= 0:
+            return
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            for key, value in items.items():
+                if key in self._entries:
+                    self._pop(key)
+                self._entries[key] = (value, expires_at)
+                self._bytes += len(value)
+            while self._bytes > self.max_bytes and self._entries:
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"backend": self.name, "entries": len(self._entries), "bytes": self._bytes,
+                    "max_bytes": self.max_bytes, "evictions": self.evictions}
+
+
+class SQLiteBackend:
+    name = "sqlite"
+    shared = False
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS entries (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        expires_at REAL,
+        last_access REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS entries_lru ON entries(last_access);
+    """
+
+    def __init__(self, path: str, max_bytes: int, touch_interval: float = SQLITE_TOUCH_INTERVAL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self._SCHEMA)
+        self._lock = threading.Lock()
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        self.evictions = 0
+
+    def get_many(self, keys: list) -> dict:
+        if not keys:
+            return {}
+        now = time.time()
+        found = {}
+        stale = []
+        with self._lock:
+            # SQLite caps bound parameters per statement
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                for key, value, last_access in self._conn.execute(
+                    f"SELECT key, value, last_access FROM entries WHERE key IN ({placeholders}) "
+                    "AND (expires_at IS NULL OR expires_at > ?)", [*batch, now]
+                ):
+                    found[key] = value
+                    if last_access <= now - self.touch_interval:
+                        stale.append(key)
+            if stale:
+                self._conn.executemany("UPDATE entries SET last_access = ? WHERE key = ?",
+                                       [(now, key) for key in stale])
+                self._conn.commit()
+        return found
+
+    def get(self, key: str):
+        return self.get_many([key]).get(key)
+
+    def set(self, key: str, value: bytes, ttl: float = None):
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items: dict, ttl: float = None):
+        if not items or (ttl is not None and ttl <= 0):
+            return
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        with self._lock:
+            replaced = self._sizes(list(items))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                [(key, value, len(value), expires_at, now) for key, value in items.items()],
+            )
+            self._conn.commit()
+            self._bytes += sum(len(v) for v in items.values()) - sum(replaced.values())
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _sizes(self, keys: list) -> dict:
+        sizes = {}
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            sizes.update(self._conn.execute(
+                f"SELECT key, size FROM entries WHERE key IN ({','.join('?' * len(batch))})", batch
+            ).fetchall())
+        return sizes
+
+    def _evict(self):
+        """Drop expired entries, then least-recently-used ones until under max_bytes. Caller holds the lock."""
+        self._conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        excess = self._bytes - self.max_bytes
+        while excess > 0:
+            rows = self._conn.execute("SELECT key, size FROM entries ORDER BY last_access ASC LIMIT 500").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if excess <= 0:
+                    break
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                excess -= size
+                self._bytes -= size
+                self.evictions += 1
+        self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            size = self._sizes([key]).get(key, 0)
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+            self._bytes -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            return {"backend": self.name, "entries": entries, "bytes": self._bytes,
+                    "max_bytes": self.max_bytes, "evictions": self.evictions}
+
+
+class RedisBackend:
+    """
+    Keys are namespaced as `<REDIS_KEY_PREFIX>:<namespace>:<key>`. Run the
+    server with a maxmemory-policy such as allkeys-lru so it evicts instead
+    of refusing writes.
+    """
+
+    name = "redis"
+    shared = True
+
+    def __init__(self, client, namespace: str):
+        self.client = client
+        self.prefix = f"{REDIS_KEY_PREFIX}:{namespace}:"
+        self.errors = 0
+        self._last_logged = 0.0
+
+    def _failed(self, e: Exception):
+        self.errors += 1
+        # One line per minute is enough to notice an outage without flooding the log
+        if time.time() - self._last_logged > 60:
+            self._last_logged = time.time()
+            logger.warning(f"⚠️ Redis cache unavailable ({e}); treating as a miss")
+
+    def get_many(self, keys: list) -> dict:
+        if not keys:
+            return {}
+        try:
+            values = self.client.mget([self.prefix + key for key in keys])
+        except Exception as e:
+            self._failed(e)
+            return {}
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    def get(self, key: str):
+        return self.get_many([key]).get(key)
+
+    def set(self, key: str, value: bytes, ttl: float = None):
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items: dict, ttl: float = None):
+        if not items or (ttl is not None and ttl <= 0):
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.set(self.prefix + key, value, px=int(ttl * 1000) if ttl is not None else None)
+            pipe.execute()
+        except Exception as e:
+            self._failed(e)
+
+    def delete(self, key: str):
+        try:
+            self.client.delete(self.prefix + key)
+        except Exception as e:
+            self._failed(e)
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "prefix": self.prefix, "errors": self.errors}
+
+
+def build_redis_client(url: str = REDIS_URL):
+    import redis
+
+    # RESP2 works with Redis, Valkey, KeyDB and the benchmark stand-in alike
+    return redis.Redis.from_url(url, protocol=2, socket_timeout=REDIS_TIMEOUT,
+                                socket_connect_timeout=REDIS_TIMEOUT, health_check_interval=30)
+
+
+def create_backend(kind: str, namespace: str, path: str = None, max_bytes: int = MEMORY_CACHE_MAX_BYTES):
+    """Build the backend named `kind`; `path` is the SQLite file, `namespace` the Redis key prefix."""
+    if kind == "memory":
+        return MemoryBackend(max_bytes)
+    if kind == "sqlite":
+        return SQLiteBackend(path, max_bytes)
+    if kind == "redis":
+        from registry import get_redis
+        return RedisBackend(get_redis(), namespace)
+    raise ValueError(f"Unknown cache backend: {kind!r} (expected memory, sqlite or redis)")
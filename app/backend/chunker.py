@@ -1,5 +1,78 @@
-from chonkie import TokenChunker
+"""
+Job-description chunking sized to the embedding model.
 
-def chunk_text(text: str):
-    chunker = TokenChunker(chunk_size=800, chunk_overlap=120)
-    return [c.text for c in chunker(text)]
+Chunks are measured with the embedding model's own tokenizer and capped at its
+max sequence length, so nothing is silently truncated at embedding time. Text
+is split at section breaks first, then lines and bullets, then sentences, and
+the pieces are packed back together up to the limit. One chunker (and one
+tokenizer) is built per process through the registry.
+"""
+import os
+
+from observability import get_logger
+
+logger = get_logger(__name__)
+
+# 0 = the embedding model's max sequence length; a larger value is clamped to it
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", 0))
+# all-MiniLM-L6-v2's window, used when the model doesn't report one
+DEFAULT_MAX_SEQ_LENGTH = 256
+# [CLS] and [SEP] are added by the model and count against its window
+SPECIAL_TOKENS = 2
+# Without the model's tokenizer, words stand in for tokens (about 1.3 tokens per word)
+WORDS_PER_TOKEN = 0.75
+
+# Split levels, coarsest first, as RecursiveLevel keyword arguments
+JOB_POSTING_LEVELS = (
+    {"delimiters": ["\n\n"]},
+    {"delimiters": ["\n"]},
+    {"delimiters": ["• ", "· ", "▪ ", " - ", " * "], "include_delim": "next"},
+    {"delimiters": [". ", "! ", "? ", "; "]},
+    {"whitespace": True},
+)
+
+
+def _embedding_model(embeddings):
+    """
+    The model behind the cache and batching wrappers: the SentenceTransformer of
+    the torch backend, or the ONNX backend itself. Both expose `tokenizer` and
+    `max_seq_length`.
+    """
+    while hasattr(embeddings, "base"):
+        embeddings = embeddings.base
+    return getattr(embeddings, "_client", None) or getattr(embeddings, "client", None) or embeddings
+
+
+def build_chunker(embeddings=None):
+    """
+    A chonkie RecursiveChunker using the tokenizer and window of the loaded
+    embedding model. Falls back to word counts when the embeddings don't
+    expose a tokenizer.
+    """
+    from chonkie import RecursiveChunker, RecursiveLevel, RecursiveRules
+
+    model = _embedding_model(embeddings)
+    tokenizer = getattr(model, "tokenizer", None)
+    window = (getattr(model, "max_seq_length", None) or DEFAULT_MAX_SEQ_LENGTH) - SPECIAL_TOKENS
+    chunk_size = min(CHUNK_MAX_TOKENS, window) if CHUNK_MAX_TOKENS > 0 else window
+
+    if tokenizer is None:
+        logger.warning("⚠️ Embedding tokenizer unavailable; sizing chunks by word count")
+        tokenizer = "word"
+        chunk_size = int(chunk_size * WORDS_PER_TOKEN)
+
+    logger.info(f"✂️ Chunking at {chunk_size} {'words' if tokenizer == 'word' else 'tokens'}")
+    rules = RecursiveRules(levels=[RecursiveLevel(**level) for level in JOB_POSTING_LEVELS])
+    return RecursiveChunker(tokenizer=tokenizer, chunk_size=chunk_size, rules=rules)
+
+
+def chunk_texts(texts: list) -> list:
+    """Chunk every text in one batched call; one list of chunk strings per input text."""
+    from registry import get_chunker
+
+    batches = get_chunker().chunk_batch(texts, show_progress=False)
+    return [[c.text.strip() for c in chunks if c.text.strip()] for chunks in batches]
+
+
+def chunk_text(text: str) -> list:
+    return chunk_texts([text])[0]
@@ -1,28 +1,43 @@
-from vectorstore import top_k
-import re
+from skills import extract_skills
+from retrieval import RETRIEVAL_MULTI_QUERY, multi_query_retrieve, multi_query_retrieve_batch
 
-HARD_SKILLS = ["python","pytorch","tensorflow","scikit-learn","mlflow","docker","kubernetes","airflow","spark","sql","pandas","numpy","langchain","faiss","chroma","aws","gcp","azure","transformers","llm","prompt engineering"]
+def retrieve_evidence(cv_text: str, vector_store, cv_skills: list, k: int = 5, query_vector=None,
+                      known_rankings: dict = None) -> dict:
+    """
+    Retrieve JD evidence for a CV. Uses per-skill and per-section queries fused
+    with RRF when the index supports batched search, else one whole-CV query.
+    `known_rankings` reuses query rankings from an earlier run over the same index.
+    """
+    if RETRIEVAL_MULTI_QUERY and hasattr(vector_store, "search_matrix"):
+        return multi_query_retrieve(vector_store, cv_text, cv_skills, k=k, known_rankings=known_rankings)
 
-def extract_skills(cv_text: str) -> list:
-    """Extract skills from CV text using a predefined list of hard skills."""
-    cv_text_lower = cv_text.lower()
-    found_skills = [skill for skill in HARD_SKILLS if skill in cv_text_lower]
-    return found_skills
+    if query_vector is not None:
+        results = vector_store.similarity_search_by_vector(query_vector, k=k)
+    else:
+        results = vector_store.similarity_search(cv_text, k=k)
+    return {"evidence": [r.page_content for r in results], "queries": 1, "embedded": 1, "rankings": {}}
+
+def retrieve_evidence_batch(cvs: list, vector_store, k: int = 5, query_vectors: list = None) -> list:
+    """
+    retrieve_evidence for many (cv_text, cv_skills) pairs against one index,
+    embedding and searching the queries of all of them together.
+    """
+    if RETRIEVAL_MULTI_QUERY and hasattr(vector_store, "search_matrix"):
+        return multi_query_retrieve_batch(vector_store, cvs, k=k)
+    query_vectors = query_vectors or [None] * len(cvs)
+    return [retrieve_evidence(cv_text, vector_store, cv_skills, k=k, query_vector=vector)
+            for (cv_text, cv_skills), vector in zip(cvs, query_vectors)]
     
-def compare_skills(cv_text: str, vector_store, role: str, k: int = 5):
+def compare_skills(cv_text: str, vector_store, role: str, k: int = 5, query_vector=None):
+    """
+    Extract CV skills and retrieve the k most relevant JD chunks.
+    Pass `query_vector` when the CV embedding was already computed (e.g. in a batch).
+    """
 
     # 1️⃣ Extract skills from CV
-    skill_patterns = [
-        r'\b(python|java|javascript|sql|react|aws|docker)\b',
-    ]
-    cv_lower = cv_text.lower()
-    cv_skills = []
-    for pattern in skill_patterns:
-        cv_skills.extend(re.findall(pattern, cv_lower, re.IGNORECASE))
-    cv_skills = list(set(cv_skills))
+    cv_skills = extract_skills(cv_text)
 
     # 2️⃣ Use vector store to find relevant JD evidence
-    results = vector_store.similarity_search(cv_text, k=k)
-    jd_evidence = [r.page_content for r in results]
+    jd_evidence = retrieve_evidence(cv_text, vector_store, cv_skills, k=k, query_vector=query_vector)["evidence"]
 
     return cv_skills, jd_evidence
\ No newline at end of file
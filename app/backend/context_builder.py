@@ -0,0 +1,123 @@
+import math
+import os
+import re
+
+import numpy as np
+
+# Context window of the target Ollama model, and what to leave free for the answer
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", 4096))
+RESPONSE_TOKEN_RESERVE = int(os.getenv("RESPONSE_TOKEN_RESERVE", 1536))
+# Explicit prompt budget; 0 derives it from the two settings above
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", 0))
+EVIDENCE_CANDIDATES = int(os.getenv("EVIDENCE_CANDIDATES", 12))
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", 0.6))
+
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+def prompt_budget() -> int:
+    return PROMPT_TOKEN_BUDGET or max(256, OLLAMA_NUM_CTX - RESPONSE_TOKEN_RESERVE)
+
+
+def count_tokens(text: str) -> int:
+    """
+    Approximate LLM token count: words and punctuation, plus ~30% for
+    sub-word splits. Close enough for budgeting without loading the
+    model's tokenizer.
+    """
+    return math.ceil(len(_TOKEN_PIECES.findall(text)) * 1.3)
+
+
+def mmr_order(query_vector, candidate_vectors, lambda_mult: float = MMR_LAMBDA) -> list:
+    """
+    Rank candidates by maximal marginal relevance: each pick balances
+    similarity to the query against similarity to what is already picked.
+    """
+    matrix = np.asarray(candidate_vectors, dtype=np.float32)
+    if not len(matrix):
+        return []
+    matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_vector, dtype=np.float32)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = matrix @ query
+    pairwise = matrix @ matrix.T
+    selected = [int(np.argmax(relevance))]
+    max_redundancy = pairwise[selected[0]].copy()
+    remaining = np.ones(len(matrix), dtype=bool)
+    remaining[selected[0]] = False
+
+    while remaining.any():
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_redundancy
+        scores[~remaining] = -np.inf
+        pick = int(np.argmax(scores))
+        selected.append(pick)
+        remaining[pick] = False
+        max_redundancy = np.maximum(max_redundancy, pairwise[pick])
+    return selected
+
+
+def _shingles(words: list, n: int = 5) -> set:
+    return {tuple(words[i:i + n]) for i in range(max(1, len(words) - n + 1))}
+
+
+def trim_overlap(kept_words: list, words: list, min_overlap: int = 8) -> list:
+    """Drop a leading or trailing run of `words` that duplicates the edge of a kept chunk."""
+    limit = min(len(kept_words), len(words) - 1)
+    for n in range(limit, min_overlap - 1, -1):
+        if words[:n] == kept_words[-n:]:
+            return words[n:]
+        if words[-n:] == kept_words[:n]:
+            return words[:-n]
+    return words
+
+
+def select_evidence(candidates: list, budget_tokens: int, query_vector=None, candidate_vectors=None,
+                    max_containment: float = 0.8) -> dict:
+    """
+    Choose diverse, non-overlapping evidence that fits in `budget_tokens`.
+
+    Candidates are visited in MMR order (or as given, without vectors).
+    A candidate mostly contained in already-kept evidence is skipped, and the
+    chunk-overlap region shared with a kept neighbour is trimmed off.
+    `sources` holds the kept candidates as given, before any trimming.
+    """
+    if query_vector is not None and candidate_vectors is not None and len(candidates) > 1:
+        order = mmr_order(query_vector, candidate_vectors)
+    else:
+        order = range(len(candidates))
+
+    kept_words, kept_shingles = [], []
+    evidence, sources, used = [], [], 0
+    duplicates = 0
+    for index in order:
+        words = candidates[index].split()
+        if not words:
+            continue
+
+        shingles = _shingles(words)
+        if any(len(shingles & seen) / len(shingles) >= max_containment for seen in kept_shingles):
+            duplicates += 1
+            continue
+        for previous in kept_words:
+            words = trim_overlap(previous, words)
+
+        text = " ".join(words)
+        tokens = count_tokens(text)
+        if used + tokens > budget_tokens:
+            # A smaller candidate further down may still fit
+            continue
+
+        evidence.append(text)
+        sources.append(candidates[index])
+        kept_words.append(words)
+        kept_shingles.append(shingles)
+        used += tokens
+
+    return {
+        "evidence": evidence,
+        "sources": sources,
+        "evidence_tokens": used,
+        "candidates": len(candidates),
+        "duplicates_dropped": duplicates,
+    }
@@ -1,19 +1,240 @@
-import fitz 
+import fitz
+import hashlib
+import multiprocessing
+import os
+import re
+import signal
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from typing import Union
 from io import BytesIO
 
-def extract_text_from_pdf(file_path: Union[str, bytes]) -> str:
-    """Extract text from a PDF file."""
-    text = ""
+PDF_MAX_BYTES = int(os.getenv("PDF_MAX_BYTES", 10 * 1024 * 1024))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", 30))
+PDF_TIMEOUT = float(os.getenv("PDF_TIMEOUT", 20))
+# Documents with at least this many pages are split across worker processes
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", 12))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", min(4, os.cpu_count() or 1)))
+PDF_CACHE_SIZE = int(os.getenv("PDF_CACHE_SIZE", 128))
+
+_pool = None
+_pool_lock = threading.Lock()
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class PDFLimitError(ValueError):
+    """The document exceeds a configured size budget."""
+
+
+def _report_pid(pids):
+    pids.put(os.getpid())
+
+
+class WorkerPool(ProcessPoolExecutor):
+    """
+    Process pool whose workers report their PIDs as they start, so workers stuck
+    on a task can be killed without reaching into the executor's internals.
+    """
+
+    def __init__(self, workers: int):
+        # Forking the server (health monitor, embedding batcher, event loop and ORT threads)
+        # can hand a child a lock some other thread held; spawned workers start clean
+        context = multiprocessing.get_context("spawn")
+        self._pid_queue = context.SimpleQueue()
+        self._pids = set()
+        super().__init__(max_workers=workers, mp_context=context, initializer=_report_pid,
+                         initargs=(self._pid_queue,))
+
+    def worker_pids(self) -> list:
+        """PIDs of every worker started so far. A worker reports before it takes its first task."""
+        while not self._pid_queue.empty():
+            self._pids.add(self._pid_queue.get())
+        return sorted(self._pids)
+
+    def terminate(self):
+        """Stop every worker, mid-task or not, and shut the pool down."""
+        # A running task can't be cancelled, only its process stopped
+        for pid in self.worker_pids():
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        self.shutdown(wait=False, cancel_futures=True)
+
+
+def _process_pool() -> WorkerPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool(PDF_WORKERS)
+        return _pool
+
+
+def _recycle_pool(pool: WorkerPool):
+    """Kill the workers of `pool`, stuck on over-budget pages; the next document gets a fresh pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.terminate()
+
+
+def iter_page_text(doc, start: int, stop: int):
+    """Yield the text of pages [start, stop) one at a time."""
+    for number in range(start, stop):
+        yield doc[number].get_text()
+
+
+def _extract_page_range(pdf_bytes: bytes, start: int, stop: int) -> list:
+    """Worker-process entry point: each worker opens its own copy of the document."""
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        return list(iter_page_text(doc, start, stop))
+    finally:
+        doc.close()
+
+
+def _line_signature(line: str) -> str:
+    line = line.strip().lower()
+    # "Page 3 of 7" and "Page 4 of 7" are the same footer; long lines must match exactly
+    return re.sub(r"\d+", "#", line) if len(line) <= 30 else line
+
+
+def _edge_indexes(lines: list, edge_lines: int) -> list:
+    non_empty = [i for i, l in enumerate(lines) if l.strip()]
+    # Short pages get a narrower window so body text isn't mistaken for an edge
+    width = min(edge_lines, len(non_empty) // 2)
+    if not width:
+        return []
+    return non_empty[:width] + non_empty[-width:]
+
+
+def strip_repeated_lines(pages: list, edge_lines: int = 3, min_share: float = 0.5) -> list:
+    """
+    Remove headers and footers: lines near the top or bottom of a page that
+    recur (ignoring digits) on at least `min_share` of the pages.
+    """
+    if len(pages) < 3:
+        return pages
+
+    counts = Counter()
+    for text in pages:
+        lines = text.splitlines()
+        counts.update({_line_signature(lines[i]) for i in _edge_indexes(lines, edge_lines)})
+
+    threshold = max(2, int(len(pages) * min_share))
+    repeated = {sig for sig, n in counts.items() if n >= threshold}
+    if not repeated:
+        return pages
+
+    cleaned = []
+    for text in pages:
+        lines = text.splitlines()
+        edge_idx = set(_edge_indexes(lines, edge_lines))
+        kept = [l for i, l in enumerate(lines) if not (i in edge_idx and _line_signature(l) in repeated)]
+        cleaned.append("\n".join(kept) + ("\n" if text.endswith("\n") else ""))
+    return cleaned
+
+
+def _read_sequential(doc, start: int, stop: int, deadline: float) -> list:
+    """Pages [start, stop) in this process, stopping after the page that passes the deadline."""
+    pages = []
+    for text in iter_page_text(doc, start, stop):
+        pages.append(text)
+        if time.monotonic() > deadline:
+            break
+    return pages
+
+
+def _read_pages(pdf_bytes: bytes, doc, page_count: int, deadline: float):
+    """Extract up to page_count pages within the deadline. Returns (pages, timed_out)."""
+    if page_count < PDF_PARALLEL_MIN_PAGES or PDF_WORKERS < 2:
+        pages = _read_sequential(doc, 0, page_count, deadline)
+        return pages, len(pages) < page_count
+
+    # Contiguous page ranges, one per worker
+    step = -(-page_count // PDF_WORKERS)
+    ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+    pool = _process_pool()
+    futures = [pool.submit(_extract_page_range, pdf_bytes, start, stop) for start, stop in ranges]
+    done, not_done = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+
+    # Ranges still running past the deadline would hold their workers until they finish
+    if [future for future in not_done if not future.cancel()]:
+        _recycle_pool(pool)
+
+    pages = []
+    for future, (start, stop) in zip(futures, ranges):
+        # Keep pages in order; stop at the first range that didn't finish
+        if future in done and isinstance(future.exception(), BrokenProcessPool) and time.monotonic() < deadline:
+            # Another document's timeout recycled the pool under this one; read the range here
+            pages.extend(_read_sequential(doc, start, stop, deadline))
+            if len(pages) < stop:
+                break
+            continue
+        if future not in done or future.exception() is not None:
+            break
+        pages.extend(future.result())
+    return pages, len(pages) < page_count
+
+
+def extract_pages(file_path: Union[str, bytes], max_pages: int = PDF_MAX_PAGES,
+                  timeout: float = PDF_TIMEOUT) -> dict:
+    """
+    Extract per-page text from a PDF within byte, page and time budgets.
+
+    Returns {"hash", "page_count", "pages": [{"number", "text"}], "truncated", "text"}.
+    Results are cached by document hash, so re-uploading the same file is free.
+    """
     if isinstance(file_path, str):
-        doc = fitz.open(file_path)
+        with open(file_path, "rb") as f:
+            pdf_bytes = f.read()
     else:
-        doc = fitz.open(stream=BytesIO(file_path), filetype="pdf")
-    
+        pdf_bytes = bytes(file_path)
+
+    if len(pdf_bytes) > PDF_MAX_BYTES:
+        raise PDFLimitError(f"PDF is {len(pdf_bytes)} bytes; the limit is {PDF_MAX_BYTES}")
+
+    doc_hash = hashlib.sha256(pdf_bytes).hexdigest()
+    with _cache_lock:
+        if doc_hash in _cache:
+            _cache.move_to_end(doc_hash)
+            return _cache[doc_hash]
+
+    deadline = time.monotonic() + timeout
+    doc = fitz.open(stream=BytesIO(pdf_bytes), filetype="pdf")
     try:
-        for page in doc:
-            text += page.get_text()
+        total_pages = doc.page_count
+        page_count = min(total_pages, max_pages)
+        raw_pages, timed_out = _read_pages(pdf_bytes, doc, page_count, deadline)
     finally:
         doc.close()
-    return text
 
+    if timed_out and not raw_pages:
+        raise PDFLimitError(f"PDF text extraction exceeded {timeout:.0f}s")
+
+    pages = strip_repeated_lines(raw_pages)
+    result = {
+        "hash": doc_hash,
+        "page_count": total_pages,
+        "pages": [{"number": i + 1, "text": text} for i, text in enumerate(pages)],
+        "truncated": timed_out or total_pages > page_count,
+        "text": "".join(pages),
+    }
+
+    # A timed-out extraction may succeed on a quieter worker; don't pin it
+    if not timed_out:
+        with _cache_lock:
+            _cache[doc_hash] = result
+            while len(_cache) > PDF_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return result
+
+
+def extract_text_from_pdf(file_path: Union[str, bytes]) -> str:
+    """Extract text from a PDF file."""
+    return extract_pages(file_path)["text"]
@@ -0,0 +1,309 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", "./cache/embeddings")
+EMBED_CACHE_LRU_SIZE = int(os.getenv("EMBED_CACHE_LRU_SIZE", 20000))
+# Size of each model's vector file before it is compacted to its most recently used rows
+EMBED_CACHE_MAX_BYTES = int(os.getenv("EMBED_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+
+def model_slug(model_name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+
+
+def chunk_key(model_name: str, text: str) -> str:
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class VectorStore:
+    """
+    Append-only float32 matrix on disk (memory-mapped for reads) with a SQLite
+    index mapping chunk key -> row number. One store per model, since each
+    model has its own dimension.
+
+    The index's meta table holds the committed row count: a write goes past
+    it and commits the new count together with the rows, so a torn append is
+    cut off on the next open instead of shifting later rows. Writers take
+    SQLite's write lock, so several processes can share the directory. Past
+    `max_bytes` the least recently read rows are copied into a new file (the
+    next generation) and the rest are dropped.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = EMBED_CACHE_MAX_BYTES):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._conn = sqlite3.connect(os.path.join(directory, "index.sqlite3"), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS rows (key TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        if "last_access" not in {column[1] for column in self._conn.execute("PRAGMA table_info(rows)")}:
+            self._conn.execute("ALTER TABLE rows ADD COLUMN last_access REAL NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS rows_lru ON rows(last_access)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self.dim = self._meta("dim")
+        self.compactions = 0
+        self._mmap = None
+        self._mapped = (None, 0)
+        with self._lock, self._write():
+            self._repair()
+
+    def _path(self, generation: int) -> str:
+        # Generation 0 keeps the original file name, so existing stores stay valid
+        return os.path.join(self.directory, "vectors.f32" if not generation else f"vectors.{generation}.f32")
+
+    def _meta(self, name: str, default=None):
+        row = self._conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, name: str, value: int):
+        self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+
+    @contextmanager
+    def _write(self):
+        """One write transaction holding SQLite's lock, which other processes respect too."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.rollback()
+            raise
+        self._conn.commit()
+
+    def _repair(self):
+        """Make the vector file and the committed row count agree. Caller holds the write lock."""
+        self.dim = self._meta("dim")
+        if not self.dim:
+            return
+        rows = self._meta("rows")
+        if rows is None:
+            # Written before the count was tracked: trust the index, not the file size
+            rows = self._conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM rows").fetchone()[0]
+        path = self._path(self._meta("generation", 0))
+        row_bytes = self.dim * 4
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size < rows * row_bytes:
+            # The file lost rows the index points at; forget them
+            rows = size // row_bytes
+            self._conn.execute("DELETE FROM rows WHERE row >= ?", (rows,))
+        if size > rows * row_bytes:
+            # A torn or uncommitted append
+            os.truncate(path, rows * row_bytes)
+        self._set_meta("rows", rows)
+
+    def _matrix(self, generation: int, rows: int):
+        """Memory-map the committed rows, remapping only when the file has grown or been compacted."""
+        if rows and (generation, rows) != self._mapped:
+            self._mmap = np.memmap(self._path(generation), dtype=np.float32, mode="r", shape=(rows, self.dim))
+            self._mapped = (generation, rows)
+        return self._mmap
+
+    def get_many(self, keys: list) -> dict:
+        if not keys:
+            return {}
+        with self._lock:
+            found = {}
+            # One snapshot for the index, the row count and the generation
+            self._conn.execute("BEGIN")
+            try:
+                # Another process may have written the first vectors
+                self.dim = self.dim or self._meta("dim")
+                generation, rows = self._meta("generation", 0), self._meta("rows", 0)
+                # SQLite caps bound parameters per statement
+                for start in range(0, len(keys), 500):
+                    batch = keys[start:start + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    found.update(self._conn.execute(
+                        f"SELECT key, row FROM rows WHERE key IN ({placeholders})", batch
+                    ).fetchall())
+            finally:
+                self._conn.commit()
+            if not found:
+                return {}
+            try:
+                matrix = self._matrix(generation, rows)
+            except FileNotFoundError:
+                # Another process compacted the store since the snapshot; treat it as a miss
+                return {}
+            vectors = {key: np.array(matrix[row]) for key, row in found.items()}
+            self._conn.executemany("UPDATE rows SET last_access = ? WHERE key = ?",
+                                   [(time.time(), key) for key in vectors])
+            self._conn.commit()
+            return vectors
+
+    def put_many(self, items: dict):
+        if not items:
+            return
+        keys = list(items)
+        block = np.asarray([items[k] for k in keys], dtype=np.float32)
+        stale = None
+        with self._lock, self._write():
+            self.dim = self._meta("dim")
+            if self.dim is None:
+                self.dim = block.shape[1]
+                self._set_meta("dim", self.dim)
+            # Another process may have stored some of these since we looked them up
+            existing = set()
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                existing.update(key for key, in self._conn.execute(
+                    f"SELECT key FROM rows WHERE key IN ({','.join('?' * len(batch))})", batch
+                ))
+            new = [i for i, key in enumerate(keys) if key not in existing]
+            if not new:
+                return
+            generation, rows = self._meta("generation", 0), self._meta("rows", 0)
+            path = self._path(generation)
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                # Overwrite anything past the committed rows, e.g. a torn append
+                f.truncate(rows * self.dim * 4)
+                f.seek(rows * self.dim * 4)
+                f.write(block[new].tobytes())
+            now = time.time()
+            self._conn.executemany(
+                "INSERT INTO rows (key, row, last_access) VALUES (?, ?, ?)",
+                [(keys[i], rows + offset, now) for offset, i in enumerate(new)],
+            )
+            rows += len(new)
+            self._set_meta("rows", rows)
+            if rows * self.dim * 4 > self.max_bytes:
+                stale = self._compact(generation, rows)
+        if stale:
+            os.remove(stale)
+
+    def _compact(self, generation: int, rows: int) -> str:
+        """
+        Copy the most recently read rows, up to 3/4 of max_bytes, into the next
+        generation's file and re-point the index at it. Returns the old file,
+        to delete once the transaction commits. Caller holds the write lock.
+        """
+        keep = int(self.max_bytes * 0.75) // (self.dim * 4)
+        kept = self._conn.execute(
+            "SELECT key, row, last_access FROM rows ORDER BY last_access DESC LIMIT ?", (keep,)
+        ).fetchall()
+        kept.sort(key=lambda entry: entry[1])
+        old = np.memmap(self._path(generation), dtype=np.float32, mode="r", shape=(rows, self.dim))
+        np.asarray(old[[row for _, row, _ in kept]], dtype=np.float32).tofile(self._path(generation + 1))
+        del old
+        self._conn.execute("DELETE FROM rows")
+        self._conn.executemany("INSERT INTO rows (key, row, last_access) VALUES (?, ?, ?)",
+                               [(key, i, last_access) for i, (key, _, last_access) in enumerate(kept)])
+        self._set_meta("rows", len(kept))
+        self._set_meta("generation", generation + 1)
+        self.compactions += 1
+        return self._path(generation)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+
+
+class BackendVectorStore:
+    """
+    Same interface as VectorStore on top of a cache backend, e.g. Redis, so
+    every replica shares one set of computed embeddings.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get_many(self, keys: list) -> dict:
+        found = self.backend.get_many(keys)
+        return {key: np.frombuffer(raw, dtype=np.float32) for key, raw in found.items()}
+
+    def put_many(self, items: dict):
+        if items:
+            self.backend.set_many({key: np.asarray(v, dtype=np.float32).tobytes() for key, v in items.items()})
+
+    def __len__(self):
+        return self.backend.stats().get("entries") or 0
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an Embeddings model with an in-memory LRU in front of a second-level
+    store (the on-disk VectorStore unless `store` is given), keyed by
+    (model name, text hash). Only texts that miss both layers are sent to the
+    model, in a single batch.
+    """
+
+    def __init__(self, base: Embeddings, model_name: str, directory: str = EMBED_CACHE_DIR,
+                 lru_size: int = EMBED_CACHE_LRU_SIZE, store=None):
+        self.base = base
+        self.model_name = model_name
+        self.store = store if store is not None else VectorStore(os.path.join(directory, model_slug(model_name)))
+        self.lru_size = lru_size
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def _remember(self, key: str, vector):
+        with self._lock:
+            self._lru[key] = vector
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def _embed(self, texts: list, namespace: str, compute) -> list:
+        keys = [chunk_key(f"{self.model_name}:{namespace}", t) for t in texts]
+        vectors = {}
+
+        with self._lock:
+            for key in keys:
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                    vectors[key] = self._lru[key]
+            self.counters["memory_hits"] += len(vectors)
+
+        missing = [k for k in dict.fromkeys(keys) if k not in vectors]
+        from_disk = self.store.get_many(missing)
+        for key, vector in from_disk.items():
+            vectors[key] = vector
+            self._remember(key, vector)
+
+        # Deduplicate before hitting the model; identical chunks are embedded once
+        to_compute = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                to_compute.setdefault(key, text)
+        with self._lock:
+            self.counters["disk_hits"] += len(from_disk)
+            self.counters["misses"] += len(to_compute)
+
+        if to_compute:
+            computed = compute(list(to_compute.values()))
+            fresh = {key: np.asarray(v, dtype=np.float32) for key, v in zip(to_compute, computed)}
+            self.store.put_many(fresh)
+            for key, vector in fresh.items():
+                vectors[key] = vector
+                self._remember(key, vector)
+
+        return [vectors[key].tolist() for key in keys]
+
+    def embed_documents(self, texts: list) -> list:
+        return self._embed(texts, "doc", self.base.embed_documents)
+
+    def embed_query(self, text: str) -> list:
+        return self._embed([text], "query", lambda batch: [self.base.embed_query(batch[0])])[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+            counters["memory_entries"] = len(self._lru)
+        counters["disk_entries"] = len(self.store)
+        counters["store"] = getattr(getattr(self.store, "backend", None), "name", "disk")
+        lookups = counters["memory_hits"] + counters["disk_hits"] + counters["misses"]
+        counters["hit_rate"] = round((lookups - counters["misses"]) / lookups, 3) if lookups else None
+        if hasattr(self.base, "stats"):
+            counters["batching"] = self.base.stats()
+        return counters
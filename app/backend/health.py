@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+from registry import get_embeddings, get_http_session
+
+HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL", 30))
+HEALTH_CHECK_TTL = float(os.getenv("HEALTH_CHECK_TTL", 90))
+
+
+def probe_vector_store() -> bool:
+    """Embed a short string with the shared model; no collection is built."""
+    embeddings = get_embeddings()
+    # Bypass the embedding cache so the model itself is exercised
+    model = getattr(embeddings, "base", embeddings)
+    vector = model.embed_query("health check")
+    return len(vector) > 0
+
+
+def probe_ollama() -> bool:
+    """List local models via /api/tags instead of running a generation."""
+    base_url = (os.getenv("OLLAMA_BASE_URL") or "http://localhost:11434").rstrip("/")
+    model_name = os.getenv("OLLAMA_MODEL")
+
+    response = get_http_session().get(f"{base_url}/api/tags", timeout=5)
+    response.raise_for_status()
+
+    if not model_name:
+        return True
+    models = [m.get("name", "") for m in response.json().get("models", [])]
+    # "llama3" matches "llama3:latest"
+    return any(m == model_name or m.split(":")[0] == model_name for m in models)
+
+
+class HealthMonitor:
+    """
+    Runs component probes on a background thread and caches the results,
+    so request handlers can read the latest status without probing.
+    """
+
+    def __init__(self, probes: dict, interval: float = HEALTH_CHECK_INTERVAL, ttl: float = HEALTH_CHECK_TTL,
+                 required: tuple = None):
+        self.probes = probes
+        # Components readiness depends on; the others are reported but only degrade features
+        self.required = tuple(probes) if required is None else tuple(required)
+        self.interval = interval
+        self.ttl = ttl
+        self._status = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self, name: str) -> dict:
+        """Run one probe now and cache its result."""
+        start = time.perf_counter()
+        try:
+            healthy = bool(self.probes[name]())
+            error = None if healthy else "probe reported unhealthy"
+        except Exception as e:
+            healthy = False
+            error = str(e)
+
+        entry = {
+            "healthy": healthy,
+            "error": error,
+            "checked_at": time.time(),
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+        with self._lock:
+            self._status[name] = entry
+        return entry
+
+    def check_all(self) -> dict:
+        return {name: self.check(name) for name in self.probes}
+
+    def status(self) -> dict:
+        """Snapshot of the cached status for every component, with staleness flags."""
+        now = time.time()
+        with self._lock:
+            snapshot = {name: dict(entry) for name, entry in self._status.items()}
+        for name in self.probes:
+            entry = snapshot.setdefault(name, {"healthy": None, "error": None, "checked_at": None, "latency_ms": None})
+            entry["stale"] = entry["checked_at"] is None or now - entry["checked_at"] > self.ttl
+        return snapshot
+
+    def is_available(self, name: str) -> bool:
+        """
+        O(1) lookup for the hot path. A component that has not been probed yet
+        is assumed available; the real call will surface any failure.
+        """
+        entry = self._status.get(name)
+        if entry is None:
+            return True
+        return entry["healthy"]
+
+    def is_ready(self) -> bool:
+        status = self.status()
+        return all(status[name]["healthy"] and not status[name]["stale"] for name in self.required)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.check_all()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+# Without Ollama an analysis still returns the match score, so Ollama doesn't gate readiness
+health_monitor = HealthMonitor({
+    "vector_store": probe_vector_store,
+    "ollama": probe_ollama,
+}, required=("vector_store",))
@@ -0,0 +1,182 @@
+"""
+HTML-to-text cleaning for scraped job pages.
+
+Order of preference:
+  1. A JSON-LD JobPosting block, when the page has one: the structured
+     description is the posting itself, with no navigation or ads around it.
+  2. The configured backend on the page body: "lxml" (default) parses with
+     libxml2 and keeps only the main content region; "bs4" is the original
+     BeautifulSoup path.
+  3. BeautifulSoup, whenever the lxml backend is unavailable, raises, or
+     returns next to nothing.
+
+Input is capped at HTML_MAX_CHARS before it is searched or parsed, so a
+multi-megabyte page can't stall a worker.
+"""
+import html as html_lib
+import json
+import os
+import re
+
+from observability import get_logger
+
+logger = get_logger(__name__)
+
+# "lxml" or "bs4"
+HTML_CLEANER = os.getenv("HTML_CLEANER", "lxml").lower()
+HTML_MAX_CHARS = int(os.getenv("HTML_MAX_CHARS", 1_000_000))
+HTML_JSONLD_ENABLED = os.getenv("HTML_JSONLD_ENABLED", "true").lower() == "true"
+# A JSON-LD description or main region shorter than this is not trusted on its own
+MIN_CONTENT_CHARS = 200
+
+BOILERPLATE_TAGS = ("script", "style", "noscript", "nav", "footer", "header", "aside")
+# Dropped by the lxml path as well: never visible text
+HIDDEN_TAGS = BOILERPLATE_TAGS + ("template", "svg", "iframe", "form", "button", "select")
+BLOCK_TAGS = frozenset((
+    "p", "div", "section", "article", "main", "br", "li", "ul", "ol", "dl", "dt", "dd", "tr", "table",
+    "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "hr",
+))
+# Tried in order; the first one holding enough text is used instead of <body>
+MAIN_CONTENT_XPATHS = (
+    "//main", "//*[@role='main']", "//article",
+    "//*[contains(@class, 'job-description') or contains(@id, 'job-description')]",
+)
+JOB_POSTING_FIELDS = (
+    ("title", None), ("description", None), ("responsibilities", "Responsibilities"),
+    ("qualifications", "Qualifications"), ("skills", "Skills"), ("experienceRequirements", "Experience"),
+    ("educationRequirements", "Education"),
+)
+
+_JSONLD_RE = re.compile(
+    r"<script[^>]+type\s*=\s*[\"']application/ld\+json[\"'][^>]*>(.*?)</script>", re.IGNORECASE | re.DOTALL,
+)
+_BLANK_LINES_RE = re.compile(r"\n\s*\n\s*\n+")
+_SPACES_RE = re.compile(r"[ \t\r\f\v\xa0]{2,}")
+
+_lxml_missing_logged = False
+
+
+def normalise_whitespace(text: str) -> str:
+    text = _BLANK_LINES_RE.sub("\n\n", text)
+    text = _SPACES_RE.sub(" ", text)
+    return text.strip()
+
+
+def _job_postings(node):
+    """Yield every JobPosting object in a parsed JSON-LD value (lists and @graph included)."""
+    if isinstance(node, list):
+        for item in node:
+            yield from _job_postings(item)
+    elif isinstance(node, dict):
+        types = node.get("@type")
+        if types == "JobPosting" or (isinstance(types, list) and "JobPosting" in types):
+            yield node
+        if "@graph" in node:
+            yield from _job_postings(node["@graph"])
+
+
+def _field_text(value) -> str:
+    if isinstance(value, list):
+        return "\n".join(filter(None, (_field_text(v) for v in value)))
+    if isinstance(value, dict):
+        value = value.get("name") or value.get("description") or ""
+    if not isinstance(value, str):
+        return ""
+    # Descriptions are usually HTML fragments, often entity-escaped
+    if "<" in value or "&lt;" in value:
+        return clean_fragment(html_lib.unescape(value))
+    return value.strip()
+
+
+def extract_job_posting(html: str) -> str:
+    """Text of the first JSON-LD JobPosting on the page, or "" when there is none."""
+    if "ld+json" not in html:
+        return ""
+    for match in _JSONLD_RE.finditer(html):
+        try:
+            data = json.loads(match.group(1).strip())
+        except ValueError:
+            continue
+        for posting in _job_postings(data):
+            parts = []
+            for field, heading in JOB_POSTING_FIELDS:
+                text = _field_text(posting.get(field))
+                if text:
+                    parts.append(f"{heading}\n{text}" if heading else text)
+            if parts:
+                return normalise_whitespace("\n\n".join(parts))
+    return ""
+
+
+def clean_bs4(html: str) -> str:
+    """Original BeautifulSoup path: drop boilerplate tags, take all remaining text."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(list(BOILERPLATE_TAGS)):
+        tag.extract()
+    return normalise_whitespace(soup.get_text("\n"))
+
+
+def _lxml_text(element) -> str:
+    from lxml import etree
+
+    # Line breaks after block elements so headings and bullets stay on their own lines
+    for node in element.iter(*BLOCK_TAGS):
+        node.tail = "\n" + (node.tail or "")
+    return etree.tostring(element, method="text", encoding="unicode", with_tail=False)
+
+
+def clean_lxml(html: str) -> str:
+    """libxml2 parse, drop hidden and boilerplate elements, keep the main content region."""
+    import lxml.html
+    from lxml import etree
+
+    root = lxml.html.document_fromstring(html)
+    etree.strip_elements(root, *HIDDEN_TAGS, etree.Comment, with_tail=False)
+
+    for xpath in MAIN_CONTENT_XPATHS:
+        for candidate in root.xpath(xpath):
+            text = normalise_whitespace(_lxml_text(candidate))
+            if len(text) >= MIN_CONTENT_CHARS:
+                return text
+    body = root.find("body")
+    return normalise_whitespace(_lxml_text(body if body is not None else root))
+
+
+def clean_fragment(fragment: str) -> str:
+    """Text of a small HTML fragment, e.g. a JSON-LD description."""
+    try:
+        import lxml.html
+        element = lxml.html.fragment_fromstring(fragment, create_parent="div")
+        return normalise_whitespace(_lxml_text(element))
+    except Exception:
+        from bs4 import BeautifulSoup
+        return normalise_whitespace(BeautifulSoup(fragment, "html.parser").get_text("\n"))
+
+
+def clean_html(html: str, backend: str = None) -> str:
+    """Strip boilerplate from an HTML page and normalise whitespace."""
+    global _lxml_missing_logged
+
+    # Before anything scans the page, the JSON-LD search included
+    if len(html) > HTML_MAX_CHARS:
+        html = html[:HTML_MAX_CHARS]
+
+    if HTML_JSONLD_ENABLED:
+        posting = extract_job_posting(html)
+        if len(posting) >= MIN_CONTENT_CHARS:
+            return posting
+
+    if (backend or HTML_CLEANER) == "lxml":
+        try:
+            text = clean_lxml(html)
+            if len(text) >= MIN_CONTENT_CHARS:
+                return text
+        except ImportError:
+            if not _lxml_missing_logged:
+                logger.warning("⚠️ lxml is not installed; cleaning pages with BeautifulSoup")
+                _lxml_missing_logged = True
+        except Exception as e:
+            logger.warning(f"⚠️ lxml cleaner failed ({e}); falling back to BeautifulSoup")
+    return clean_bs4(html)
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from cache_backends import SQLiteBackend
+
+JD_CACHE_PATH = os.getenv("JD_CACHE_PATH", "./cache/jd_cache.sqlite3")
+JD_CACHE_MAX_BYTES = int(os.getenv("JD_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+JD_PAGE_TTL = float(os.getenv("JD_PAGE_TTL", 24 * 3600))
+JD_PAGE_MIN_TTL = float(os.getenv("JD_PAGE_MIN_TTL", 3600))
+JD_SEARCH_TTL = float(os.getenv("JD_SEARCH_TTL", 6 * 3600))
+
+
+def content_hash(raw: str) -> str:
+    return hashlib.sha256(raw.encode("utf-8", errors="replace")).hexdigest()
+
+
+def normalise_query(query: str) -> str:
+    """'  Data-Scientist ' and 'data scientist' share one cache entry."""
+    query = re.sub(r"[^\w+#.]+", " ", query.lower())
+    return " ".join(query.split())
+
+
+def ttl_from_headers(headers, default: float = JD_PAGE_TTL) -> float:
+    """
+    Honour Cache-Control max-age when the site sends one, but never go below
+    JD_PAGE_MIN_TTL: job boards send max-age=0 on postings that rarely change.
+    """
+    cache_control = (headers.get("Cache-Control") or "").lower()
+    match = re.search(r"max-age=(\d+)", cache_control)
+    if match:
+        return max(float(match.group(1)), JD_PAGE_MIN_TTL)
+    return default
+
+
+class JDCache:
+    """
+    Cache of fetched job pages and search results on a pluggable backend
+    (see cache_backends).
+
+    Cleaned text is stored once per raw-HTML hash under `content:`, so a page
+    that comes back byte-identical (even under a different URL) is never
+    re-parsed. `page:` records map URLs to that content plus ETag/Last-Modified
+    for revalidation; `search:` holds Tavily results until JD_SEARCH_TTL.
+    Pages are kept past their freshness so they can be revalidated, until the
+    backend evicts them.
+    """
+
+    def __init__(self, path: str = JD_CACHE_PATH, max_bytes: int = JD_CACHE_MAX_BYTES, backend=None):
+        self.backend = backend or SQLiteBackend(path, max_bytes)
+        self._lock = threading.Lock()
+        self.counters = {
+            "page_hits": 0,
+            "page_misses": 0,
+            "page_revalidations": 0,
+            "content_reuses": 0,
+            "search_hits": 0,
+            "search_misses": 0,
+        }
+
+    def record(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    @staticmethod
+    def _page_key(url: str) -> str:
+        return "page:" + hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    # --- pages ---
+
+    def _page_record(self, url: str):
+        raw = self.backend.get(self._page_key(url))
+        return json.loads(raw) if raw else None
+
+    def get_page(self, url: str):
+        """
+        Return the cached entry for `url` as a dict with `text`, `etag`,
+        `last_modified` and `fresh`, or None. Stale entries are still returned
+        so the caller can revalidate them.
+        """
+        record = self._page_record(url)
+        if record is None:
+            return None
+        text = self.lookup_content(record["content_hash"])
+        if text is None:
+            # Content was evicted; the page record alone is useless
+            return None
+        return {
+            "text": text,
+            "etag": record.get("etag"),
+            "last_modified": record.get("last_modified"),
+            "fresh": record["expires_at"] > time.time(),
+            "content_hash": record["content_hash"],
+        }
+
+    def lookup_content(self, raw_hash: str):
+        """Cleaned text previously produced for identical raw HTML, if any."""
+        raw = self.backend.get("content:" + raw_hash)
+        return raw.decode("utf-8") if raw is not None else None
+
+    def put_page(self, url: str, raw_hash: str, text: str, etag: str = None, last_modified: str = None,
+                 ttl: float = JD_PAGE_TTL):
+        now = time.time()
+        record = {"content_hash": raw_hash, "etag": etag, "last_modified": last_modified,
+                  "fetched_at": now, "expires_at": now + ttl}
+        self.backend.set_many({
+            "content:" + raw_hash: text.encode("utf-8"),
+            self._page_key(url): json.dumps(record).encode("utf-8"),
+        })
+
+    def touch_page(self, url: str, ttl: float = JD_PAGE_TTL):
+        """Extend an entry after a 304 Not Modified."""
+        record = self._page_record(url)
+        if record is None:
+            return
+        now = time.time()
+        record.update(fetched_at=now, expires_at=now + ttl)
+        self.backend.set(self._page_key(url), json.dumps(record).encode("utf-8"))
+
+    # --- searches ---
+
+    def get_search(self, query: str):
+        raw = self.backend.get("search:" + normalise_query(query))
+        self.record("search_hits" if raw else "search_misses")
+        return json.loads(raw) if raw else None
+
+    def put_search(self, query: str, results, ttl: float = JD_SEARCH_TTL):
+        self.backend.set("search:" + normalise_query(query), json.dumps(results).encode("utf-8"), ttl=ttl)
+
+    # --- housekeeping ---
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+        lookups = counters["page_hits"] + counters["page_revalidations"] + counters["page_misses"]
+        counters.update(self.backend.stats())
+        counters["page_hit_rate"] = (
+            round((counters["page_hits"] + counters["page_revalidations"]) / lookups, 3) if lookups else None
+        )
+        return counters
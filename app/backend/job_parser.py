@@ -1,30 +1,59 @@
+import asyncio
+import queue
 import requests
-from bs4 import BeautifulSoup
-import re
-from tavily import TavilyClient
+import httpx
 import os 
 import time
 import random
+from contextlib import asynccontextmanager
 from urllib.parse import urljoin, urlparse
 from dotenv import load_dotenv
 
+from registry import (get_async_http_client, get_event_loop, get_http_session, get_jd_cache, get_tavily_client,
+                      is_registered)
+from jd_cache import content_hash, ttl_from_headers
+from html_cleaner import clean_html
+from observability import FETCHED_BYTES, get_logger, span
+
 load_dotenv()
-api_key = os.getenv("TAVILY_API_KEY")
-tavily_client = TavilyClient(api_key=api_key)  
+
+logger = get_logger(__name__)
+
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", 8))
+FETCH_PER_DOMAIN = int(os.getenv("FETCH_PER_DOMAIN", 2))
+FETCH_POLITENESS_DELAY = float(os.getenv("FETCH_POLITENESS_DELAY", 1.0))
+FETCH_DEADLINE = float(os.getenv("FETCH_DEADLINE", 20))
 
 def search_jobs(job_title: str, n: int = 5):
     """Search for job-related content using Tavily API"""
+    query = f"{job_title} job requirements skills responsibilities"
+    cache = get_jd_cache()
+    cache_key = f"{query} limit {n}"
+    cached = cache.get_search(cache_key)
+    if cached is not None:
+        logger.info(f"💾 Using cached search results for '{job_title}'")
+        return cached
+
+    if not is_registered("tavily"):
+        logger.warning(f"🔌 Offline mode (TAVILY_API_KEY unset): no live search for '{job_title}'")
+        return []
+    
     try:
-        # Fixed typo: reponse -> response
-        response = tavily_client.search(
-            query=f"{job_title} job requirements skills responsibilities", 
-            limit=n,
-            search_depth="advanced",
-            include_domains=["indeed.com", "linkedin.com", "glassdoor.com", "monster.com", "ziprecruiter.com"]
-        )
-        return response['results'] if 'results' in response else []
+        with span("tavily", limit=n) as s:
+            # Fixed typo: reponse -> response
+            response = get_tavily_client().search(
+                query=query, 
+                limit=n,
+                search_depth="advanced",
+                include_domains=["indeed.com", "linkedin.com", "glassdoor.com", "monster.com", "ziprecruiter.com"]
+            )
+            results = response['results'] if 'results' in response else []
+            s["results"] = len(results)
+        if results:
+            cache.put_search(cache_key, results)
+        return results
     except Exception as e:
-        print(f"Error searching jobs with Tavily: {e}")
+        logger.error(f"Error searching jobs with Tavily: {e}")
         return []
 
 def get_headers():
@@ -60,94 +89,278 @@ def is_blocked_domain(url: str) -> bool:
     domain = urlparse(url).netloc.lower()
     return any(blocked in domain for blocked in blocked_domains)
 
+def request_headers(cached: dict = None) -> dict:
+    """Browser-like headers, plus conditional-request validators for a cached page."""
+    headers = get_headers()
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    return headers
+
+def clean_and_cache(url: str, html: str, response_headers) -> str:
+    """Clean `html` (unless identical HTML was cleaned before) and store it for `url`."""
+    cache = get_jd_cache()
+    raw_hash = content_hash(html)
+    text = cache.lookup_content(raw_hash)
+    if text is None:
+        with span("clean", bytes=len(html)) as s:
+            text = clean_html(html)
+            s["chars"] = len(text)
+    else:
+        cache.record("content_reuses")
+    cache.put_page(
+        url,
+        raw_hash,
+        text,
+        etag=response_headers.get("ETag"),
+        last_modified=response_headers.get("Last-Modified"),
+        ttl=ttl_from_headers(response_headers),
+    )
+    return text
+
 def fetch_and_clean(url: str, max_retries: int = 3) -> str:
     """
     Fetch and clean content from URL with improved error handling
     """
     if not url or not url.strip():
-        print("Empty URL provided")
+        logger.warning("Empty URL provided")
         return ""
     
     # Check if domain is known to block scrapers
     if is_blocked_domain(url):
-        print(f"Skipping known blocked domain: {urlparse(url).netloc}")
+        logger.warning(f"Skipping known blocked domain: {urlparse(url).netloc}")
         return ""
     
+    cache = get_jd_cache()
+    cached = cache.get_page(url)
+    if cached and cached["fresh"]:
+        cache.record("page_hits")
+        return cached["text"] if len(cached["text"]) >= 100 else ""
+    
     for attempt in range(max_retries):
         try:
             # Add delay between requests to avoid rate limiting
             if attempt > 0:
                 delay = random.uniform(2, 5) * (attempt + 1)
-                print(f"Retrying in {delay:.1f}s... (attempt {attempt + 1}/{max_retries})")
+                logger.info(f"Retrying in {delay:.1f}s... (attempt {attempt + 1}/{max_retries})")
                 time.sleep(delay)
             
-            # Create session for better connection handling
-            session = requests.Session()
-            session.headers.update(get_headers())
+            # Reuse the shared pooled session instead of opening new connections
+            session = get_http_session()
             
             # Send request with timeout and verify SSL
-            response = session.get(
-                url, 
-                timeout=(10, 30),  # (connection timeout, read timeout)
-                allow_redirects=True,
-                verify=True
-            )
+            with span("http_get", domain=urlparse(url).netloc) as s:
+                response = session.get(
+                    url, 
+                    headers=request_headers(cached),
+                    timeout=(10, 30),  # (connection timeout, read timeout)
+                    allow_redirects=True,
+                    verify=True
+                )
+                s.update(status=response.status_code, bytes=len(response.content))
+            FETCHED_BYTES.inc(len(response.content))
+            
+            # Cached copy is still valid
+            if response.status_code == 304 and cached:
+                cache.touch_page(url, ttl_from_headers(response.headers))
+                cache.record("page_revalidations")
+                return cached["text"] if len(cached["text"]) >= 100 else ""
             
             # Check if request was successful
             response.raise_for_status()
             
-            # Parse HTML content
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove unwanted elements
-            for tag in soup(["script", "style", "noscript", "nav", "footer", "header", "aside"]):
-                tag.extract()
-            
-            # Extract text content
-            text = soup.get_text("\n")
-            
-            # Clean up text
-            text = re.sub(r"\n{3,}", "\n\n", text)  # Replace 3+ newlines with 2
-            text = re.sub(r"[ \t]{2,}", " ", text)   # Replace multiple spaces/tabs with single space
-            text = text.strip()
+            cache.record("page_misses")
+            text = clean_and_cache(url, response.text, response.headers)
             
             if len(text) < 100:  # Too short, probably not useful content
-                print(f"Content too short ({len(text)} chars) for URL: {url}")
+                logger.warning(f"Content too short ({len(text)} chars) for URL: {url}")
                 return ""
             
-            print(f"Successfully fetched {len(text)} characters from {url}")
+            logger.info(f"Successfully fetched {len(text)} characters from {url}")
             return text
             
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 403:
-                print(f"Access forbidden (403) for {url} - domain may block scrapers")
+                logger.warning(f"Access forbidden (403) for {url} - domain may block scrapers")
                 return ""
             elif e.response.status_code == 404:
-                print(f"Page not found (404) for {url}")
+                logger.warning(f"Page not found (404) for {url}")
                 return ""
             else:
-                print(f"HTTP error {e.response.status_code} for {url}: {e}")
+                logger.error(f"HTTP error {e.response.status_code} for {url}: {e}")
         
         except requests.exceptions.ConnectionError as e:
-            print(f"Connection error for {url}: {e}")
+            logger.error(f"Connection error for {url}: {e}")
             if attempt == max_retries - 1:
                 return ""
         
         except requests.exceptions.Timeout as e:
-            print(f"Timeout error for {url}: {e}")
+            logger.error(f"Timeout error for {url}: {e}")
             if attempt == max_retries - 1:
                 return ""
         
         except requests.exceptions.RequestException as e:
-            print(f"Request error for {url}: {e}")
+            logger.error(f"Request error for {url}: {e}")
             if attempt == max_retries - 1:
                 return ""
         
         except Exception as e:
-            print(f"Unexpected error processing {url}: {e}")
+            logger.error(f"Unexpected error processing {url}: {e}")
             return ""
     
-    print(f"Failed to fetch {url} after {max_retries} attempts")
+    logger.error(f"Failed to fetch {url} after {max_retries} attempts")
     return ""
 
 
+class DomainLimiter:
+    """
+    Caps concurrent requests per domain and spaces request starts to the same
+    domain by `delay` seconds. Must only be used from one event loop.
+    """
+
+    def __init__(self, per_domain: int = FETCH_PER_DOMAIN, delay: float = FETCH_POLITENESS_DELAY):
+        self.per_domain = per_domain
+        self.delay = delay
+        self._semaphores = {}
+        self._next_start = {}
+
+    @asynccontextmanager
+    async def slot(self, domain: str):
+        semaphore = self._semaphores.setdefault(domain, asyncio.Semaphore(self.per_domain))
+        async with semaphore:
+            # Reserve the next start time for this domain; no await between read and write
+            now = asyncio.get_running_loop().time()
+            start = max(now, self._next_start.get(domain, now))
+            self._next_start[domain] = start + self.delay
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+
+# Shared by every pipeline on the background loop, so politeness holds across requests
+_domain_limiter = DomainLimiter()
+
+
+async def afetch_and_clean(url: str, client: httpx.AsyncClient, limiter: DomainLimiter, max_retries: int = 3) -> str:
+    """Async counterpart of fetch_and_clean using the shared connection pool."""
+    if not url or not url.strip():
+        return ""
+
+    domain = urlparse(url).netloc.lower()
+    if is_blocked_domain(url):
+        logger.warning(f"Skipping known blocked domain: {domain}")
+        return ""
+
+    # Cache reads are blocking I/O (a SQLite write, or a Redis round trip); keep them off the event loop
+    cache = get_jd_cache()
+    cached = await asyncio.to_thread(cache.get_page, url)
+    if cached and cached["fresh"]:
+        cache.record("page_hits")
+        return cached["text"] if len(cached["text"]) >= 100 else ""
+
+    for attempt in range(max_retries):
+        if attempt > 0:
+            delay = random.uniform(2, 5) * (attempt + 1)
+            logger.info(f"Retrying {url} in {delay:.1f}s... (attempt {attempt + 1}/{max_retries})")
+            await asyncio.sleep(delay)
+
+        try:
+            async with limiter.slot(domain):
+                with span("http_get", domain=domain) as s:
+                    response = await client.get(url, headers=request_headers(cached))
+                    s.update(status=response.status_code, bytes=len(response.content))
+            FETCHED_BYTES.inc(len(response.content))
+
+            if response.status_code == 304 and cached:
+                await asyncio.to_thread(cache.touch_page, url, ttl_from_headers(response.headers))
+                cache.record("page_revalidations")
+                return cached["text"] if len(cached["text"]) >= 100 else ""
+            response.raise_for_status()
+
+            # Parsing is CPU-bound; keep it off the event loop
+            cache.record("page_misses")
+            text = await asyncio.to_thread(clean_and_cache, url, response.text, response.headers)
+
+            if len(text) < 100:
+                logger.warning(f"Content too short ({len(text)} chars) for URL: {url}")
+                return ""
+
+            logger.info(f"Successfully fetched {len(text)} characters from {url}")
+            return text
+
+        except httpx.HTTPStatusError as e:
+            status = e.response.status_code
+            if status in (403, 404):
+                logger.warning(f"HTTP {status} for {url} - giving up")
+                return ""
+            logger.error(f"HTTP error {status} for {url}: {e}")
+
+        except (httpx.TransportError, httpx.TimeoutException) as e:
+            logger.error(f"Request error for {url}: {e}")
+
+        except Exception as e:
+            logger.error(f"Unexpected error processing {url}: {e}")
+            return ""
+
+    logger.error(f"Failed to fetch {url} after {max_retries} attempts")
+    return ""
+
+
+async def afetch_stream(urls: list, deadline: float = FETCH_DEADLINE, concurrency: int = FETCH_CONCURRENCY,
+                        client: httpx.AsyncClient = None, limiter: DomainLimiter = None):
+    """
+    Fetch `urls` concurrently and yield (index, url, text) as each one completes.
+    Anything still running when `deadline` seconds have passed is cancelled.
+    """
+    client = client or get_async_http_client()
+    limiter = limiter or _domain_limiter
+    global_limit = asyncio.Semaphore(concurrency)
+
+    async def fetch_one(index: int, url: str):
+        async with global_limit:
+            return index, url, await afetch_and_clean(url, client, limiter)
+
+    tasks = [asyncio.ensure_future(fetch_one(i, url)) for i, url in enumerate(urls)]
+    try:
+        for next_done in asyncio.as_completed(tasks, timeout=deadline):
+            yield await next_done
+    except asyncio.TimeoutError:
+        pending = sum(1 for t in tasks if not t.done())
+        logger.warning(f"⏰ Fetch deadline of {deadline:.0f}s reached; abandoning {pending} pending URLs")
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+_DONE = object()
+
+
+def fetch_stream(urls: list, deadline: float = FETCH_DEADLINE):
+    """
+    Synchronous wrapper around afetch_stream: runs the pipeline on the shared
+    background loop and yields (index, url, text) in completion order.
+    """
+    if not urls:
+        return
+
+    results = queue.Queue()
+
+    async def pump():
+        try:
+            async for item in afetch_stream(urls, deadline=deadline):
+                results.put(item)
+        finally:
+            results.put(_DONE)
+
+    future = asyncio.run_coroutine_threadsafe(pump(), get_event_loop())
+    try:
+        while True:
+            item = results.get()
+            if item is _DONE:
+                break
+            yield item
+    finally:
+        # Stop outstanding fetches if the caller bailed out early
+        future.cancel()
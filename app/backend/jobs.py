@@ -0,0 +1,370 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from observability import WORKER_SATURATION, bind_context
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", 20))
+JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", 3600))
+JOB_STORE = os.getenv("JOB_STORE", "memory")
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "./cache/jobs.sqlite3")
+# Shared-store records of unfinished jobs expire after this, in case their replica died
+JOB_ACTIVE_TTL = float(os.getenv("JOB_ACTIVE_TTL", 6 * 3600))
+# How often a running job asks a shared store whether another replica cancelled it
+JOB_CANCEL_POLL_INTERVAL = float(os.getenv("JOB_CANCEL_POLL_INTERVAL", 0.5))
+# Synchronous analyses (/analyze, /analyze/stream, /batch) one replica is sized for
+ANALYSIS_SLOTS = int(os.getenv("ANALYSIS_SLOTS", 4))
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class QueueFullError(Exception):
+    """Raised when the queue is at capacity; callers should retry later."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once cancellation has been requested."""
+
+
+class InMemoryJobStore:
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job: dict):
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+
+    def update(self, job_id: str, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def get(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def count_active(self) -> int:
+        with self._lock:
+            return sum(1 for j in self._jobs.values() if j["status"] in ACTIVE_STATUSES)
+
+    def delete_expired(self, now: float) -> int:
+        with self._lock:
+            expired = [i for i, j in self._jobs.items() if j.get("expires_at") and j["expires_at"] <= now]
+            for job_id in expired:
+                del self._jobs[job_id]
+        return len(expired)
+
+
+class SQLiteJobStore:
+    """Job records in SQLite, so status survives restarts and is visible to other processes."""
+
+    _FIELDS = ("id", "status", "role", "progress", "result", "error",
+               "created_at", "started_at", "finished_at", "expires_at")
+
+    def __init__(self, path: str = JOB_STORE_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT, role TEXT, progress TEXT, "
+            "result TEXT, error TEXT, created_at REAL, started_at REAL, finished_at REAL, expires_at REAL)"
+        )
+        # Jobs that were in flight when the process died will never finish
+        self._conn.execute(
+            "UPDATE jobs SET status = 'failed', error = 'interrupted by restart' "
+            "WHERE status IN ('queued', 'running')"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _encode(fields: dict) -> dict:
+        encoded = dict(fields)
+        for key in ("progress", "result"):
+            if key in encoded and encoded[key] is not None:
+                encoded[key] = json.dumps(encoded[key])
+        return encoded
+
+    def create(self, job: dict):
+        row = self._encode({f: job.get(f) for f in self._FIELDS})
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO jobs ({', '.join(self._FIELDS)}) VALUES ({', '.join('?' * len(self._FIELDS))})",
+                [row[f] for f in self._FIELDS],
+            )
+            self._conn.commit()
+
+    def update(self, job_id: str, **fields):
+        if not fields:
+            return
+        fields = self._encode(fields)
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", [*fields.values(), job_id])
+            self._conn.commit()
+
+    def get(self, job_id: str):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self._FIELDS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(self._FIELDS, row))
+        for key in ("progress", "result"):
+            if job[key] is not None:
+                job[key] = json.loads(job[key])
+        return job
+
+    def count_active(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchone()[0]
+
+    def delete_expired(self, now: float) -> int:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM jobs WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+            self._conn.commit()
+        return cursor.rowcount
+
+
+class BackendJobStore:
+    """
+    Job records on a shared cache backend (Redis), so whichever replica a
+    poll or cancel lands on can answer it. Records expire through the
+    backend's TTLs rather than delete_expired.
+    """
+
+    shared = True
+
+    def __init__(self, backend, active_ttl: float = JOB_ACTIVE_TTL):
+        self.backend = backend
+        self.active_ttl = active_ttl
+
+    def _put(self, job: dict):
+        ttl = job["expires_at"] - time.time() if job.get("expires_at") else self.active_ttl
+        self.backend.set(job["id"], json.dumps(job).encode("utf-8"), ttl=ttl)
+
+    def create(self, job: dict):
+        self._put(dict(job))
+
+    def update(self, job_id: str, **fields):
+        job = self.get(job_id)
+        if job is not None:
+            job.update(fields)
+            self._put(job)
+
+    def get(self, job_id: str):
+        raw = self.backend.get(job_id)
+        return json.loads(raw) if raw else None
+
+    def request_cancel(self, job_id: str):
+        # A separate key, so a progress update racing with it can't overwrite the request
+        self.backend.set(f"cancel:{job_id}", b"1", ttl=self.active_ttl)
+
+    def cancel_requested(self, job_id: str) -> bool:
+        return self.backend.get(f"cancel:{job_id}") is not None
+
+    def delete_expired(self, now: float) -> int:
+        return 0
+
+
+class JobContext:
+    """Handed to each job so it can report progress and notice cancellation."""
+
+    def __init__(self, manager, job_id: str, poll_interval: float = JOB_CANCEL_POLL_INTERVAL):
+        self.manager = manager
+        self.job_id = job_id
+        self.poll_interval = poll_interval
+        self._last_poll = float("-inf")
+
+    def cancelled(self) -> bool:
+        if self.job_id in self.manager._cancel_requested:
+            return True
+        # The cancel may have arrived at another replica; called per streamed token,
+        # so the shared store is asked at most once per poll_interval
+        store = self.manager.store
+        if not getattr(store, "shared", False) or time.monotonic() - self._last_poll < self.poll_interval:
+            return False
+        self._last_poll = time.monotonic()
+        return store.cancel_requested(self.job_id)
+
+    def check_cancelled(self):
+        if self.cancelled():
+            raise JobCancelled()
+
+    def progress(self, **fields):
+        self.manager.store.update(self.job_id, progress=fields)
+
+
+class JobManager:
+    """
+    Bounded worker pool for long-running analyses. At most `workers` jobs run
+    at once and at most `max_queue` more wait; beyond that submit() raises
+    QueueFullError. Finished jobs are kept for `result_ttl` seconds.
+    """
+
+    def __init__(self, store=None, workers: int = JOB_WORKERS, max_queue: int = JOB_QUEUE_MAX,
+                 result_ttl: float = JOB_RESULT_TTL):
+        self.store = store or InMemoryJobStore()
+        self.workers = workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job-worker")
+        self._futures = {}
+        self._cancel_requested = set()
+        self._running = 0
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.max_queue
+
+    def submit(self, fn, *args, role: str = None) -> str:
+        """Queue fn(context, *args). Returns the job id."""
+        self.expire()
+        with self._lock:
+            if len(self._futures) >= self.capacity:
+                raise QueueFullError(f"Job queue is full ({self.capacity} jobs in flight)")
+
+            job_id = uuid.uuid4().hex
+            self.store.create({
+                "id": job_id,
+                "status": "queued",
+                "role": role,
+                "created_at": time.time(),
+            })
+            self._futures[job_id] = self._executor.submit(bind_context(self._run), job_id, fn, args)
+        return job_id
+
+    def _run(self, job_id: str, fn, args):
+        context = JobContext(self, job_id)
+        with self._lock:
+            self._running += 1
+        try:
+            context.check_cancelled()
+            self.store.update(job_id, status="running", started_at=time.time())
+            result = fn(context, *args)
+            self._finish(job_id, status="succeeded", result=result)
+        except JobCancelled:
+            self._finish(job_id, status="cancelled")
+        except Exception as e:
+            self._finish(job_id, status="failed", error=str(e))
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._futures.pop(job_id, None)
+                self._cancel_requested.discard(job_id)
+
+    def _finish(self, job_id: str, **fields):
+        now = time.time()
+        self.store.update(job_id, finished_at=now, expires_at=now + self.result_ttl, **fields)
+
+    def get(self, job_id: str):
+        self.expire()
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a queued job immediately, or ask a running one to stop at its
+        next checkpoint. Returns False if the job is unknown or already finished.
+        """
+        with self._lock:
+            future = self._futures.get(job_id)
+            if future is None:
+                return self._cancel_elsewhere(job_id)
+            if future.cancel():
+                self._futures.pop(job_id, None)
+                self._finish(job_id, status="cancelled")
+                return True
+            self._cancel_requested.add(job_id)
+            job = self.store.get(job_id)
+            if job and job["status"] == "running":
+                self.store.update(job_id, status="cancelling")
+        return True
+
+    def _cancel_elsewhere(self, job_id: str) -> bool:
+        """With a shared store, flag a job running on another replica for cancellation."""
+        if not getattr(self.store, "shared", False):
+            return False
+        job = self.store.get(job_id)
+        if job is None or job["status"] not in ACTIVE_STATUSES:
+            return False
+        self.store.request_cancel(job_id)
+        if job["status"] == "running":
+            self.store.update(job_id, status="cancelling")
+        return True
+
+    def expire(self) -> int:
+        return self.store.delete_expired(time.time())
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = len(self._futures)
+            running = self._running
+        return {
+            "workers": self.workers,
+            "running": running,
+            "queued": in_flight - running,
+            "capacity": self.capacity,
+            "saturation": round(in_flight / self.capacity, 3) if self.capacity else 1.0,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class AnalysisSlots:
+    """
+    Counts synchronous analyses in flight against the number this replica is
+    sized for. Nothing is rejected; the count only feeds the saturation signal.
+    """
+
+    def __init__(self, slots: int = ANALYSIS_SLOTS):
+        self.slots = slots
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def hold(self):
+        with self._lock:
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def saturation(self) -> float:
+        return round(self.in_flight / self.slots, 3) if self.slots else 1.0
+
+
+def create_job_store(kind: str = JOB_STORE):
+    if kind == "sqlite":
+        return SQLiteJobStore()
+    if kind == "redis":
+        from cache_backends import create_backend
+        return BackendJobStore(create_backend("redis", "jobs"))
+    return InMemoryJobStore()
+
+
+job_manager = JobManager(create_job_store())
+analysis_slots = AnalysisSlots()
+
+
+def worker_saturation() -> float:
+    """Load on this replica, 0..1 and beyond: the busier of the job pool and the synchronous slots."""
+    return max(job_manager.stats()["saturation"], analysis_slots.saturation())
+
+
+WORKER_SATURATION.set_function(worker_saturation)
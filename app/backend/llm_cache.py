@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from cache_backends import SQLiteBackend
+from jd_cache import normalise_query
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./cache/llm_cache.sqlite3")
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", 7 * 24 * 3600))
+# Semantic hits reuse a report when only the JD evidence drifted slightly
+LLM_CACHE_SEMANTIC = os.getenv("LLM_CACHE_SEMANTIC", "false").lower() == "true"
+LLM_CACHE_SEMANTIC_THRESHOLD = float(os.getenv("LLM_CACHE_SEMANTIC_THRESHOLD", 0.97))
+# Evidence vectors remembered per scope for the semantic lookup, newest first
+LLM_CACHE_SCOPE_ENTRIES = int(os.getenv("LLM_CACHE_SCOPE_ENTRIES", 32))
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def response_scope(model: str, template: str, role: str, cv_skills: list) -> str:
+    """
+    Everything that must match exactly for a report to be reusable: model,
+    prompt template, normalised role and the (unordered) skill set.
+    """
+    skills = sorted({s.strip().lower() for s in cv_skills})
+    return _digest(model, hashlib.sha256(template.encode("utf-8")).hexdigest(), normalise_query(role), skills)
+
+
+def response_key(scope: str, evidence: list) -> str:
+    """Exact key: the scope plus the evidence set, whitespace-normalised."""
+    return _digest(scope, sorted(" ".join(e.split()) for e in evidence))
+
+
+class LLMCache:
+    """
+    Cache of generated reports on a pluggable backend (see cache_backends).
+    An exact hit needs the same scope and evidence; with `semantic` on, an
+    entry in the same scope whose evidence embedding is within `threshold`
+    cosine also counts. Entries expire after `ttl`; size is bounded by the
+    backend.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_bytes: int = LLM_CACHE_MAX_BYTES,
+                 ttl: float = LLM_CACHE_TTL, semantic: bool = LLM_CACHE_SEMANTIC,
+                 threshold: float = LLM_CACHE_SEMANTIC_THRESHOLD, backend=None):
+        self.backend = backend or SQLiteBackend(path, max_bytes)
+        self.ttl = ttl
+        self.semantic = semantic
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "semantic_hits": 0, "misses": 0, "seconds_saved": 0.0}
+
+    def _lookup(self, key: str):
+        raw = self.backend.get("response:" + key)
+        return json.loads(raw) if raw else None
+
+    def _hit(self, entry: dict, semantic: bool) -> dict:
+        with self._lock:
+            self.counters["semantic_hits" if semantic else "hits"] += 1
+            self.counters["seconds_saved"] += entry["seconds"]
+        return {"response": entry["response"], "seconds": entry["seconds"], "semantic": semantic}
+
+    def _scope_index(self, scope: str) -> list:
+        """[(key, vector)] of recent entries in `scope` that stored an evidence vector."""
+        raw = self.backend.get("scope:" + scope)
+        if not raw:
+            return []
+        dim = int.from_bytes(raw[:4], "little")
+        step = 64 + dim * 4
+        return [
+            (raw[i:i + 64].decode("ascii"), np.frombuffer(raw[i + 64:i + step], dtype=np.float32))
+            for i in range(4, len(raw), step)
+        ]
+
+    def get(self, scope: str, key: str, vector=None):
+        """
+        Return {"response", "seconds", "semantic"} for a cached report, or None.
+        `vector` (the mean evidence embedding) enables the semantic lookup.
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            return self._hit(entry, semantic=False)
+
+        if self.semantic and vector is not None:
+            index = self._scope_index(scope)
+            if index:
+                query = np.asarray(vector, dtype=np.float32)
+                query = query / max(float(np.linalg.norm(query)), 1e-12)
+                matrix = np.stack([v for _, v in index])
+                matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+                scores = matrix @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    # The report itself may have expired or been evicted since
+                    entry = self._lookup(index[best][0])
+                    if entry is not None:
+                        return self._hit(entry, semantic=True)
+
+        with self._lock:
+            self.counters["misses"] += 1
+        return None
+
+    def put(self, scope: str, key: str, response: str, generation_seconds: float, vector=None):
+        entry = {"scope": scope, "response": response, "seconds": generation_seconds}
+        self.backend.set("response:" + key, json.dumps(entry).encode("utf-8"), ttl=self.ttl)
+        if vector is None or self.ttl <= 0:
+            return
+
+        # Read-modify-write; a concurrent put in the same scope may drop one
+        # entry from the index, which only costs a semantic hit
+        vector = np.asarray(vector, dtype=np.float32)
+        index = [(k, v) for k, v in self._scope_index(scope) if k != key and len(v) == len(vector)]
+        index = [(key, vector)] + index[:LLM_CACHE_SCOPE_ENTRIES - 1]
+        raw = len(vector).to_bytes(4, "little") + b"".join(k.encode("ascii") + v.tobytes() for k, v in index)
+        self.backend.set("scope:" + scope, raw, ttl=self.ttl)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+        lookups = counters["hits"] + counters["semantic_hits"] + counters["misses"]
+        counters.update(self.backend.stats())
+        counters.update({
+            "semantic": self.semantic,
+            "seconds_saved": round(counters["seconds_saved"], 3),
+            "hit_rate": round((counters["hits"] + counters["semantic_hits"]) / lookups, 3) if lookups else None,
+        })
+        return counters
@@ -0,0 +1,198 @@
+"""
+Precomputed market profiles: for each configured role, the cleaned JD corpus,
+chunk embeddings and skill-demand table, built
+offline and loaded by the request path in milliseconds.
+
+    python market_profiles.py [--roles "Data Scientist,ML Engineer"] [--dir ./profiles]
+
+Layout: <dir>/<role-slug>/<version>.npz (float16 chunk vectors),
+<version>.json.gz (everything else) and LATEST (the current version).
+"""
+import argparse
+import gzip
+import io
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from jd_cache import normalise_query
+from observability import configure_logging, get_logger
+from registry import EMBEDDING_MODEL_NAME, get_embeddings
+from vectorstore import InMemoryIndex
+
+PROFILE_FORMAT = 1
+MARKET_PROFILE_DIR = os.getenv("MARKET_PROFILE_DIR", "./profiles")
+MARKET_PROFILE_ROLES = os.getenv("MARKET_PROFILE_ROLES", "")
+MARKET_PROFILE_ENABLED = os.getenv("MARKET_PROFILE_ENABLED", "true").lower() == "true"
+# Older profiles are ignored and the role goes back to live search
+MARKET_PROFILE_MAX_AGE = float(os.getenv("MARKET_PROFILE_MAX_AGE", 14 * 24 * 3600))
+# Versions kept per role, the one LATEST points at included; must be at least 1
+MARKET_PROFILE_KEEP = int(os.getenv("MARKET_PROFILE_KEEP", 3))
+
+logger = get_logger(__name__)
+
+# slug -> (LATEST mtime, profile); reloaded when the CronJob publishes a new version
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def role_slug(role: str) -> str:
+    return normalise_query(role).replace(" ", "-") or "unknown"
+
+
+def _role_dir(role: str, directory: str) -> str:
+    return os.path.join(directory, role_slug(role))
+
+
+def embedding_identity() -> str:
+    """Model and backend the vectors come from; int8 vectors don't mix with fp32 ones."""
+    # embedding_backends pulls in LangChain; keep it off the import path
+    from embedding_backends import cache_identity
+    return cache_identity(EMBEDDING_MODEL_NAME)
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def save_profile(context: dict, directory: str = MARKET_PROFILE_DIR, keep: int = MARKET_PROFILE_KEEP) -> str:
+    """
+    Write a profile for a prepared role context (see batch.prepare_role_context)
+    as a new version, point LATEST at it and prune all but the newest `keep`
+    versions. Returns the version.
+    """
+    if keep < 1:
+        raise ValueError(f"MARKET_PROFILE_KEEP must be at least 1, got {keep}")
+    index = context["index"]
+
+    version = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+    role_dir = _role_dir(context["role"], directory)
+    os.makedirs(role_dir, exist_ok=True)
+
+    meta = {
+        "format": PROFILE_FORMAT,
+        "role": context["role"],
+        "version": version,
+        "built_at": time.time(),
+        "embedding_model": embedding_identity(),
+        "jd_texts": context["jd_texts"],
+        "chunks": index.texts,
+        "demand": context["demand"],
+    }
+    vectors = io.BytesIO()
+    np.savez_compressed(vectors, vectors=index.matrix.astype(np.float16))
+    _write_atomic(os.path.join(role_dir, f"{version}.npz"), vectors.getvalue())
+    _write_atomic(os.path.join(role_dir, f"{version}.json.gz"), gzip.compress(json.dumps(meta).encode("utf-8")))
+    _write_atomic(os.path.join(role_dir, "LATEST"), version.encode("ascii"))
+
+    versions = sorted(name[:-len(".json.gz")] for name in os.listdir(role_dir) if name.endswith(".json.gz"))
+    for old in versions[:-keep]:
+        for suffix in (".npz", ".json.gz"):
+            try:
+                os.remove(os.path.join(role_dir, old + suffix))
+            except FileNotFoundError:
+                pass
+    return version
+
+
+def _read_profile(role_dir: str, version: str) -> dict:
+    with gzip.open(os.path.join(role_dir, f"{version}.json.gz"), "rb") as f:
+        meta = json.loads(f.read())
+    with np.load(os.path.join(role_dir, f"{version}.npz")) as arrays:
+        vectors = arrays["vectors"].astype(np.float32)
+    meta["index"] = InMemoryIndex(meta["chunks"], vectors, get_embeddings())
+    return meta
+
+
+def load_profile(role: str, directory: str = MARKET_PROFILE_DIR):
+    """
+    The current profile for `role`, or None when there is none, it is too old,
+    or it was built with a different embedding model or backend. Parsed profiles are kept
+    in memory until LATEST changes.
+    """
+    if not MARKET_PROFILE_ENABLED:
+        return None
+    role_dir = _role_dir(role, directory)
+    pointer = os.path.join(role_dir, "LATEST")
+    try:
+        mtime = os.stat(pointer).st_mtime
+    except FileNotFoundError:
+        return None
+
+    slug = role_slug(role)
+    cached = _loaded.get(slug)
+    if cached is None or cached[0] != mtime:
+        with _loaded_lock:
+            cached = _loaded.get(slug)
+            if cached is None or cached[0] != mtime:
+                try:
+                    with open(pointer, encoding="ascii") as f:
+                        profile = _read_profile(role_dir, f.read().strip())
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not load market profile for {role}: {e}")
+                    profile = None
+                cached = (mtime, profile)
+                _loaded[slug] = cached
+
+    profile = cached[1]
+    if profile is None or profile.get("format") != PROFILE_FORMAT:
+        return None
+    if profile["embedding_model"] != embedding_identity():
+        logger.warning(f"⚠️ Market profile for {role} was built with {profile['embedding_model']}; ignoring")
+        return None
+    if time.time() - profile["built_at"] > MARKET_PROFILE_MAX_AGE:
+        logger.warning(f"⚠️ Market profile for {role} ({profile['version']}) is stale; using live search")
+        return None
+    return profile
+
+
+def build_profiles(roles: list, directory: str = MARKET_PROFILE_DIR) -> dict:
+    """Search, scrape, chunk and embed each role live and publish its profile."""
+    from batch import prepare_role_context
+
+    report = {}
+    for role in roles:
+        started = time.perf_counter()
+        try:
+            context = prepare_role_context(role, use_profile=False)
+            if not context["jd_texts"]:
+                raise RuntimeError("no job descriptions fetched")
+            version = save_profile(context, directory)
+            report[role] = {"status": "ok", "version": version, "jds": len(context["jd_texts"]),
+                            "chunks": len(context["chunks"])}
+        except Exception as e:
+            # Keep the previous version published; one bad role shouldn't fail the run
+            report[role] = {"status": "error", "error": str(e)}
+        report[role]["seconds"] = round(time.perf_counter() - started, 3)
+        if report[role]["status"] == "ok":
+            logger.info(f"✅ {role}: {report[role]}", extra={"fields": {"role": role, **report[role]}})
+        else:
+            logger.error(f"❌ {role}: {report[role]}", extra={"fields": {"role": role, **report[role]}})
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--roles", default=MARKET_PROFILE_ROLES, help="comma-separated roles")
+    parser.add_argument("--dir", default=MARKET_PROFILE_DIR)
+    args = parser.parse_args()
+    configure_logging()
+
+    roles = [r.strip() for r in args.roles.split(",") if r.strip()]
+    if not roles:
+        parser.error("no roles given (use --roles or MARKET_PROFILE_ROLES)")
+    if MARKET_PROFILE_KEEP < 1:
+        parser.error(f"MARKET_PROFILE_KEEP must be at least 1, got {MARKET_PROFILE_KEEP}")
+    report = build_profiles(roles, args.dir)
+    # Non-zero exit marks the CronJob run as failed when any role failed
+    raise SystemExit(0 if all(r["status"] == "ok" for r in report.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "json" for log shippers, "text" for a readable local console
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+REQUEST_ID_HEADER = "x-request-id"
+
+# Set per HTTP request by the middleware and copied into worker threads and
+# coroutines, so every log line and span carries the request it belongs to
+request_id_var = ContextVar("request_id", default=None)
+
+STAGE_SECONDS = Histogram(
+    "career_mentor_stage_seconds", "Duration of each pipeline stage", ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120),
+)
+STAGE_ERRORS = Counter("career_mentor_stage_errors_total", "Pipeline stages that raised", ["stage"])
+HTTP_SECONDS = Histogram(
+    "career_mentor_http_request_seconds", "Time to response headers per route", ["method", "route", "status"],
+)
+FETCHED_BYTES = Counter("career_mentor_fetched_bytes_total", "Bytes of job-page HTML downloaded")
+CHUNKS = Histogram("career_mentor_chunks", "JD chunks per analysis", buckets=(0, 10, 25, 50, 100, 200, 400, 800))
+PROMPT_TOKENS = Histogram(
+    "career_mentor_prompt_tokens", "Estimated prompt tokens per generation",
+    buckets=(256, 512, 1024, 1536, 2048, 3072, 4096, 8192),
+)
+GENERATED_TOKENS = Histogram(
+    "career_mentor_generated_tokens", "Tokens streamed back by the LLM per report",
+    buckets=(64, 128, 256, 512, 1024, 1536, 2048, 4096),
+)
+
+# In-flight work over capacity; the readiness probe and the HPA both key off it
+WORKER_SATURATION = Gauge("career_mentor_worker_saturation", "Busiest worker pool's in-flight work over capacity")
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request id and span fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": request_id_var.get(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        request_id = request_id_var.get()
+        line = f"{record.levelname[0]} [{request_id or '-'}] {record.getMessage()}"
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def configure_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT):
+    """Route all logging (ours and uvicorn's) through one structured handler on stdout."""
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        logging.getLogger(name).handlers[:] = []
+        logging.getLogger(name).propagate = True
+    # httpx logs every job-page request at INFO; our http_get spans already cover them
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
+
+
+logger = get_logger("career_mentor.span")
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def bind_context(fn):
+    """
+    Wrap `fn` to run in a copy of the caller's context. Thread pools don't carry
+    context variables across on their own; submit bind_context(fn) instead of fn
+    so the worker logs under the request that queued it.
+    """
+    context = copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+@contextmanager
+def span(stage: str, **fields):
+    """
+    Time a pipeline stage. Yields a dict the caller can add sizes to
+    (chunks, bytes, tokens); on exit it gains "seconds", the duration lands
+    in the stage histogram and one structured log line records the fields.
+    Safe to hold across generator yields: no context variables are changed.
+    """
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield fields
+    except Exception as e:
+        status = "error"
+        fields["error"] = str(e)
+        STAGE_ERRORS.labels(stage).inc()
+        raise
+    except BaseException:
+        # Generator closed early (client went away) or the job was cancelled
+        status = "cancelled"
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        fields["seconds"] = round(seconds, 3)
+        STAGE_SECONDS.labels(stage).observe(seconds)
+        logger.info(
+            "stage %s %s in %.3fs", stage, status, seconds,
+            extra={"fields": {"stage": stage, "status": status, **fields}},
+        )
+
+
+def metrics_payload():
+    """Prometheus exposition text and its content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class RequestContextMiddleware:
+    """
+    ASGI middleware: takes X-Request-ID from the caller or mints one, exposes it
+    through request_id_var for the whole request, echoes it on the response and
+    records time-to-headers per route.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        incoming = headers.get(REQUEST_ID_HEADER.encode(), b"").decode("latin-1").strip()
+        request_id = incoming[:64] or new_request_id()
+        token = request_id_var.set(request_id)
+        started = time.perf_counter()
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (REQUEST_ID_HEADER.encode(), request_id.encode())]
+                route = scope.get("route")
+                HTTP_SECONDS.labels(
+                    scope.get("method", ""), getattr(route, "path", "unmatched"), str(message["status"])
+                ).observe(time.perf_counter() - started)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
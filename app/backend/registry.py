@@ -0,0 +1,266 @@
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+from cache_backends import uses_redis
+from observability import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 20))
+# Keeping the model resident lets Ollama reuse the KV cache of the static prompt prefix
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# name -> zero-argument factory, in warm-up order
+_factories = {}
+_instances = {}
+_locks = {}
+_registry_lock = threading.Lock()
+_last_warmup_report = {}
+
+
+def register(name: str, factory):
+    """Register a factory for a shared resource. The instance is built on first use."""
+    with _registry_lock:
+        _factories[name] = factory
+        _locks.setdefault(name, threading.Lock())
+        _instances.pop(name, None)
+
+
+def get(name: str):
+    """Return the shared instance for `name`, building it once in a thread-safe way."""
+    instance = _instances.get(name)
+    if instance is not None:
+        return instance
+
+    lock = _locks.get(name)
+    if lock is None:
+        raise KeyError(f"Unknown resource: {name}")
+
+    with lock:
+        # Another thread may have built it while we were waiting for the lock
+        instance = _instances.get(name)
+        if instance is None:
+            instance = _factories[name]()
+            _instances[name] = instance
+    return instance
+
+
+def is_loaded(name: str) -> bool:
+    return name in _instances
+
+
+def is_registered(name: str) -> bool:
+    return name in _factories
+
+
+def _build_embeddings():
+    from cache_backends import backend_kind, create_backend
+    from embedding_backends import build_embeddings, cache_identity
+    from embedding_cache import BackendVectorStore, CachedEmbeddings, model_slug
+
+    # Identical chunks are served from the embedding cache instead of the model.
+    # "sqlite" keeps the memory-mapped on-disk store; other backends share vectors
+    identity = cache_identity(EMBEDDING_MODEL_NAME)
+    kind = backend_kind("EMBED")
+    store = None if kind == "sqlite" else BackendVectorStore(
+        create_backend(kind, f"emb:{model_slug(identity)}")
+    )
+    return CachedEmbeddings(build_embeddings(EMBEDDING_MODEL_NAME), identity, store=store)
+
+
+def _build_chunker():
+    from chunker import build_chunker
+
+    # Reuses the embedding model's tokenizer, so the model loads first
+    return build_chunker(get_embeddings())
+
+
+def _build_llm():
+    from langchain_ollama import OllamaLLM as Ollama
+    from context_builder import OLLAMA_NUM_CTX
+    return Ollama(
+        model=os.getenv("OLLAMA_MODEL"),
+        base_url=os.getenv("OLLAMA_BASE_URL"),
+        temperature=0.1,
+        num_ctx=OLLAMA_NUM_CTX,
+        keep_alive=OLLAMA_KEEP_ALIVE,
+    )
+
+
+def _build_tavily_client():
+    from tavily import TavilyClient
+    return TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+
+
+def _build_http_session():
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _build_event_loop():
+    import asyncio
+
+    # One long-lived loop on a daemon thread hosts all async I/O, so pooled
+    # async clients stay bound to a single loop across requests
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="async-io", daemon=True)
+    thread.start()
+    return loop
+
+
+def _build_async_http_client():
+    import httpx
+
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE),
+        timeout=httpx.Timeout(30.0, connect=10.0),
+        follow_redirects=True,
+    )
+
+
+def _build_redis():
+    from cache_backends import build_redis_client
+    return build_redis_client()
+
+
+def _build_jd_cache():
+    from cache_backends import backend_kind, create_backend
+    from jd_cache import JD_CACHE_MAX_BYTES, JD_CACHE_PATH, JDCache
+    return JDCache(backend=create_backend(backend_kind("JD"), "jd", JD_CACHE_PATH, JD_CACHE_MAX_BYTES))
+
+
+def _build_llm_cache():
+    from cache_backends import backend_kind, create_backend
+    from llm_cache import LLM_CACHE_MAX_BYTES, LLM_CACHE_PATH, LLMCache
+    return LLMCache(backend=create_backend(backend_kind("LLM"), "llm", LLM_CACHE_PATH, LLM_CACHE_MAX_BYTES))
+
+
+def _build_session_store():
+    from cache_backends import backend_kind, create_backend
+    from sessions import SESSION_STORE_MAX_BYTES, SESSION_STORE_PATH, SessionStore
+    return SessionStore(backend=create_backend(backend_kind("SESSION"), "session", SESSION_STORE_PATH,
+                                               SESSION_STORE_MAX_BYTES))
+
+
+# Before the caches, so a missing redis package shows up in the warm-up report
+if uses_redis():
+    register("redis", _build_redis)
+register("embeddings", _build_embeddings)
+register("chunker", _build_chunker)
+register("llm", _build_llm)
+# Without a key the API runs offline: market profiles and cached searches only
+if os.getenv("TAVILY_API_KEY"):
+    register("tavily", _build_tavily_client)
+register("http_session", _build_http_session)
+register("event_loop", _build_event_loop)
+register("async_http", _build_async_http_client)
+register("jd_cache", _build_jd_cache)
+register("llm_cache", _build_llm_cache)
+register("session_store", _build_session_store)
+
+
+def get_embeddings():
+    """Shared embedding model (EMBEDDING_BACKEND), behind the request batcher and the embedding cache."""
+    return get("embeddings")
+
+
+def get_chunker():
+    """Shared job-description chunker, sized to the embedding model."""
+    return get("chunker")
+
+
+def get_llm():
+    """Shared Ollama LLM client."""
+    return get("llm")
+
+
+def get_tavily_client():
+    """Shared Tavily search client."""
+    return get("tavily")
+
+
+def get_http_session():
+    """Shared pooled requests.Session."""
+    return get("http_session")
+
+
+def get_event_loop():
+    """Shared background event loop for async I/O."""
+    return get("event_loop")
+
+
+def get_async_http_client():
+    """Shared pooled httpx.AsyncClient. Only use it on the shared event loop."""
+    return get("async_http")
+
+
+def get_redis():
+    """Shared Redis client for the cache backends that use it."""
+    return get("redis")
+
+
+def get_jd_cache():
+    """Shared on-disk cache of fetched job descriptions and search results."""
+    return get("jd_cache")
+
+
+def get_llm_cache():
+    """Shared on-disk cache of generated reports."""
+    return get("llm_cache")
+
+
+def get_session_store():
+    """Shared store of per-session analysis state for incremental re-analysis."""
+    return get("session_store")
+
+
+def warm_up(names=None) -> dict:
+    """
+    Build every registered resource (or only `names`) ahead of the first request.
+    Returns a report of how long each one took; failures are recorded, not raised.
+    """
+    report = {}
+    for name in names or list(_factories):
+        start = time.perf_counter()
+        try:
+            get(name)
+            status = "ok"
+            error = None
+        except Exception as e:
+            status = "error"
+            error = str(e)
+        report[name] = {
+            "status": status,
+            "seconds": round(time.perf_counter() - start, 3),
+            "error": error,
+        }
+
+    _last_warmup_report.clear()
+    _last_warmup_report.update(report)
+    log_warmup_report(report)
+    return report
+
+
+def warmup_report() -> dict:
+    """Timing report from the most recent warm-up."""
+    return dict(_last_warmup_report)
+
+
+def log_warmup_report(report: dict):
+    total = sum(entry["seconds"] for entry in report.values())
+    logger.info(f"🔥 Startup warm-up finished in {total:.3f}s",
+                extra={"fields": {"warmup": report, "seconds": round(total, 3)}})
+    for name, entry in report.items():
+        if entry["status"] != "ok":
+            logger.error(f"❌ {name} failed to warm up: {entry['error']}")
@@ -0,0 +1,138 @@
+import hashlib
+import os
+import re
+from collections import defaultdict
+
+from registry import get_embeddings
+
+RETRIEVAL_MULTI_QUERY = os.getenv("RETRIEVAL_MULTI_QUERY", "true").lower() == "true"
+# all-MiniLM-L6-v2 truncates at 256 word pieces; ~150 words stays safely inside
+SECTION_WINDOW_WORDS = int(os.getenv("SECTION_WINDOW_WORDS", 150))
+RRF_K = int(os.getenv("RRF_K", 60))
+# Matches scoring below this carry no signal and don't vote in the fusion
+RRF_MIN_SCORE = float(os.getenv("RRF_MIN_SCORE", 0.1))
+MAX_SKILL_QUERIES = int(os.getenv("MAX_SKILL_QUERIES", 40))
+
+SECTION_HEADINGS = (
+    "summary", "profile", "about me", "objective", "experience", "work experience",
+    "professional experience", "employment", "employment history", "education",
+    "skills", "technical skills", "core competencies", "projects", "personal projects",
+    "certifications", "certificates", "publications", "awards", "languages",
+    "volunteering", "interests", "achievements", "courses", "training",
+)
+_HEADING = re.compile(r"^\s*(%s)\s*:?\s*$" % "|".join(re.escape(h) for h in SECTION_HEADINGS), re.IGNORECASE)
+
+
+def _is_heading(line: str) -> bool:
+    stripped = line.strip()
+    if _HEADING.match(stripped):
+        return True
+    # Short all-caps lines ("WORK HISTORY") are headings in most CV templates
+    return 2 < len(stripped) <= 40 and stripped.isupper() and len(stripped.split()) <= 4
+
+
+def split_cv_sections(cv_text: str) -> list:
+    """Split a CV into (title, text) sections on heading lines."""
+    sections = []
+    title, lines = "header", []
+    for line in cv_text.splitlines():
+        if _is_heading(line):
+            if any(l.strip() for l in lines):
+                sections.append((title, "\n".join(lines).strip()))
+            title, lines = line.strip().rstrip(":").lower(), []
+        else:
+            lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append((title, "\n".join(lines).strip()))
+    return sections
+
+
+def _windows(text: str, size: int = SECTION_WINDOW_WORDS) -> list:
+    words = text.split()
+    return [" ".join(words[i:i + size]) for i in range(0, len(words), size)] or [text]
+
+
+def build_queries(cv_text: str, cv_skills: list) -> list:
+    """One query per extracted skill and per embedding-sized window of each CV section."""
+    queries = [("skill", skill, skill) for skill in cv_skills[:MAX_SKILL_QUERIES]]
+    for title, text in split_cv_sections(cv_text):
+        for window in _windows(text):
+            queries.append(("section", title, window))
+    return queries
+
+
+def query_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def reciprocal_rank_fusion(rankings: list, rrf_k: int = RRF_K) -> list:
+    """Fuse ranked lists of chunk ids; returns [(chunk_id, score)] best first."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking):
+            scores[chunk_id] += 1.0 / (rrf_k + rank + 1)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+def rank_queries(index, texts_by_key: dict, per_query_k: int = 10) -> dict:
+    """Embed query texts in one batch and search the chunk matrix for all of them in one product."""
+    if not texts_by_key:
+        return {}
+    vectors = get_embeddings().embed_documents(list(texts_by_key.values()))
+    top, scores = index.search_matrix(vectors, per_query_k)
+    # Without the floor, near-zero tails vote for whatever chunks sort first on ties
+    return {
+        key: [int(i) for i, score in zip(row, row_scores) if score >= RRF_MIN_SCORE]
+        for key, row, row_scores in zip(texts_by_key, top, scores)
+    }
+
+
+def _fused_result(index, keys: list, rankings_by_key: dict, k: int, embedded: int) -> dict:
+    fused = reciprocal_rank_fusion([rankings_by_key[key] for key in keys])
+    return {
+        "evidence": [index.texts[i] for i, _ in fused[:k]],
+        "queries": len(keys),
+        "embedded": embedded,
+        "rankings": {key: rankings_by_key[key] for key in keys},
+    }
+
+
+def multi_query_retrieve(index, cv_text: str, cv_skills: list, k: int = 5, per_query_k: int = 10,
+                         known_rankings: dict = None) -> dict:
+    """
+    Embed every skill and section query in one batch, search the JD chunk
+    matrix for all of them in one product, and fuse the rankings with RRF.
+
+    `known_rankings` ({query key: ranking}, from an earlier run over the same
+    index) skips embedding and searching for queries seen before, so a revised
+    CV only pays for its new or edited text.
+
+    Returns {"evidence": [chunk text], "queries": n, "embedded": n searched now,
+    "rankings": {query key: ranking}}.
+    Requires an index exposing search_matrix (InMemoryIndex).
+    """
+    return multi_query_retrieve_batch(index, [(cv_text, cv_skills)], k=k, per_query_k=per_query_k,
+                                      known_rankings=known_rankings)[0]
+
+
+def multi_query_retrieve_batch(index, cvs: list, k: int = 5, per_query_k: int = 10,
+                               known_rankings: dict = None) -> list:
+    """
+    multi_query_retrieve for several (cv_text, cv_skills) pairs against one
+    index: the distinct queries of all of them are embedded and searched
+    together, so a skill shared by many CVs is asked once. One result per CV.
+    """
+    per_cv = []
+    todo = {}
+    known_rankings = known_rankings or {}
+    for cv_text, cv_skills in cvs:
+        queries = build_queries(cv_text, cv_skills)
+        keys = [query_key(text) for _, _, text in queries]
+        new = {key for key, (_, _, text) in zip(keys, queries) if key not in known_rankings}
+        todo.update((key, text) for key, (_, _, text) in zip(keys, queries) if key in new)
+        per_cv.append((keys, len(new)))
+
+    if not len(index):
+        return [{"evidence": [], "queries": len(keys), "embedded": 0, "rankings": {}} for keys, _ in per_cv]
+    rankings_by_key = dict(known_rankings, **rank_queries(index, todo, per_query_k))
+    return [_fused_result(index, keys, rankings_by_key, k, embedded) for keys, embedded in per_cv]
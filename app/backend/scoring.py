@@ -0,0 +1,86 @@
+import os
+from collections import Counter
+
+from skills import count_skills
+
+# Share of the score taken by CV-to-JD embedding similarity; the rest is skill coverage
+SCORE_SIMILARITY_WEIGHT = float(os.getenv("SCORE_SIMILARITY_WEIGHT", 0.3))
+# Mean cosine over this many best-matching JD chunks
+SCORE_SIMILARITY_TOP_K = int(os.getenv("SCORE_SIMILARITY_TOP_K", 5))
+# Skills mentioned by fewer JDs than this are treated as noise and left out
+SCORE_MIN_JD_COUNT = int(os.getenv("SCORE_MIN_JD_COUNT", 1))
+# MiniLM cosine between related texts rarely leaves this band; rescale it to 0..1
+SIMILARITY_FLOOR = float(os.getenv("SIMILARITY_FLOOR", 0.1))
+SIMILARITY_CEILING = float(os.getenv("SIMILARITY_CEILING", 0.7))
+
+
+def skill_demand(jd_texts: list) -> dict:
+    """
+    How often each skill recurs across the fetched JDs.
+    Returns {skill: {"jds": documents mentioning it, "mentions": total occurrences}}.
+    """
+    jds, mentions = Counter(), Counter()
+    for text in jd_texts:
+        counts = count_skills(text)
+        jds.update(counts.keys())
+        mentions.update(counts)
+    return {skill: {"jds": jds[skill], "mentions": mentions[skill]} for skill in jds}
+
+
+def embedding_similarity(index, query_vector, k: int = SCORE_SIMILARITY_TOP_K):
+    """Mean cosine between the CV and its closest JD chunks; None if the index can't say."""
+    if query_vector is None or not hasattr(index, "search_matrix") or not len(index):
+        return None
+    _, scores = index.search_matrix(query_vector, k)
+    return float(scores[0].mean()) if scores.size else None
+
+
+def _rescale(similarity: float) -> float:
+    span = max(SIMILARITY_CEILING - SIMILARITY_FLOOR, 1e-6)
+    return min(1.0, max(0.0, (similarity - SIMILARITY_FLOOR) / span))
+
+
+def match_score(cv_skills: list, demand: dict, jd_count: int, similarity: float = None,
+                similarity_weight: float = SCORE_SIMILARITY_WEIGHT) -> dict:
+    """
+    Deterministic 0-100 match score: skill coverage weighted by the share of
+    JDs asking for each skill, blended with embedding similarity when given.
+    Same inputs always give the same score; no LLM involved.
+    """
+    wanted = {skill: d for skill, d in demand.items() if d["jds"] >= SCORE_MIN_JD_COUNT}
+    have = set(cv_skills)
+
+    def entry(skill):
+        return {"skill": skill, **wanted[skill]}
+
+    by_demand = sorted(wanted, key=lambda s: (-wanted[s]["jds"], -wanted[s]["mentions"], s))
+    matched = [entry(s) for s in by_demand if s in have]
+    missing = [entry(s) for s in by_demand if s not in have]
+
+    total_weight = sum(d["jds"] for d in wanted.values())
+    coverage = sum(e["jds"] for e in matched) / total_weight if total_weight else None
+
+    parts = []
+    if coverage is not None:
+        parts.append((1 - similarity_weight, coverage))
+    if similarity is not None:
+        parts.append((similarity_weight, _rescale(similarity)))
+    weight = sum(w for w, _ in parts)
+    score = round(100 * sum(w * v for w, v in parts) / weight, 1) if weight else 0.0
+
+    return {
+        "score": score,
+        "coverage": round(coverage, 4) if coverage is not None else None,
+        "similarity": round(similarity, 4) if similarity is not None else None,
+        "jd_count": jd_count,
+        "matched": matched,
+        "missing": missing,
+        "extra": [s for s in cv_skills if s not in wanted],
+    }
+
+
+def score_cv(cv_skills: list, jd_texts: list, index=None, query_vector=None, demand: dict = None) -> dict:
+    """Convenience wrapper; pass a precomputed `demand` when scoring many CVs against one role."""
+    if demand is None:
+        demand = skill_demand(jd_texts)
+    return match_score(cv_skills, demand, len(jd_texts), embedding_similarity(index, query_vector))
@@ -0,0 +1,180 @@
+"""
+Session-scoped analysis state for incremental re-analysis.
+
+Users re-submit revised CVs for the same role several times in a row. Every
+finished analysis in a session is saved under (session, role, CV hash), and the
+session remembers its latest run per role. The next upload is diffed
+section by section against that run: the job market (search, scrape, chunk,
+embed) is reused as is, retrieval only embeds and searches queries from
+added or changed sections, and the LLM revises just the report sections the
+change affects instead of writing the whole report again.
+"""
+import difflib
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from cache_backends import SQLiteBackend
+from jd_cache import normalise_query
+from retrieval import split_cv_sections
+
+SESSIONS_ENABLED = os.getenv("SESSIONS_ENABLED", "true").lower() == "true"
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", "./cache/sessions.sqlite3")
+SESSION_STORE_MAX_BYTES = int(os.getenv("SESSION_STORE_MAX_BYTES", 200 * 1024 * 1024))
+SESSION_TTL = float(os.getenv("SESSION_TTL", 4 * 3600))
+# Above this share of the CV (by characters) changed, the report is regenerated in full
+SESSION_DELTA_MAX_CHANGE = float(os.getenv("SESSION_DELTA_MAX_CHANGE", 0.5))
+
+_HEADING = re.compile(r"^##\s+(.+?)\s*$", re.MULTILINE)
+
+
+def cv_digest(cv_text: str) -> str:
+    """Whitespace-insensitive hash of a CV's text."""
+    return hashlib.sha256(" ".join(cv_text.split()).encode("utf-8")).hexdigest()
+
+
+def cv_sections(cv_text: str) -> list:
+    """[key, title, text] per section; repeated titles get #2, #3... so every key is unique."""
+    seen = {}
+    sections = []
+    for title, text in split_cv_sections(cv_text):
+        seen[title] = seen.get(title, 0) + 1
+        key = title if seen[title] == 1 else f"{title}#{seen[title]}"
+        sections.append([key, title, text])
+    return sections
+
+
+def diff_sections(old: list, new: list) -> dict:
+    """
+    Compare two cv_sections() lists, ignoring whitespace. Returns the keys of
+    added, changed, removed and unchanged sections, plus the share of the new
+    CV's text on added or edited lines.
+    """
+    old_text = {key: text for key, _, text in old}
+    new_text = {key: text for key, _, text in new}
+    same = {key for key in new_text if key in old_text and new_text[key].split() == old_text[key].split()}
+    added = [key for key in new_text if key not in old_text]
+    changed = [key for key in new_text if key in old_text and key not in same]
+
+    # Only the edited lines of a changed section count, not the whole section
+    edited = sum(len(new_text[key]) for key in added)
+    for key in changed:
+        before = {" ".join(line.split()) for line in old_text[key].splitlines()}
+        edited += sum(len(line) for line in new_text[key].splitlines() if " ".join(line.split()) not in before)
+    total = sum(len(text) for text in new_text.values()) or 1
+    return {
+        "added": added,
+        "changed": changed,
+        "removed": [key for key in old_text if key not in new_text],
+        "unchanged": [key for key in new_text if key in same],
+        "changed_share": round(min(edited / total, 1.0), 3),
+    }
+
+
+def describe_changes(old: list, new: list, diff: dict) -> str:
+    """The CV edits as prompt text: added sections in full, changed ones as +/- lines, removed by name."""
+    old_text = {key: text for key, _, text in old}
+    new_text = {key: text for key, _, text in new}
+    parts = []
+    for key in diff["added"]:
+        parts.append(f"### Added section: {key}\n{new_text[key]}")
+    for key in diff["changed"]:
+        lines = difflib.unified_diff(old_text[key].splitlines(), new_text[key].splitlines(), lineterm="", n=0)
+        edits = [line for line in lines if line[:1] in "+-" and not line.startswith(("+++", "---"))]
+        parts.append(f"### Changed section: {key}\n" + "\n".join(edits))
+    for key in diff["removed"]:
+        parts.append(f"### Removed section: {key}")
+    return "\n\n".join(parts)
+
+
+def _report_sections(report: str) -> list:
+    """Split a markdown report into (heading, block) pairs on "## " headings; the preamble has heading None."""
+    sections = []
+    matches = list(_HEADING.finditer(report))
+    if not matches or matches[0].start() > 0:
+        preamble = report[:matches[0].start() if matches else len(report)]
+        if preamble.strip():
+            sections.append((None, preamble.strip()))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(report)
+        sections.append((match.group(1), report[match.start():end].strip()))
+    return sections
+
+
+def _heading_key(heading: str) -> str:
+    # Emoji and punctuation vary between generations; the words identify the section
+    return " ".join(re.findall(r"\w+", heading.lower()))
+
+
+def merge_report(previous: str, delta: str) -> str:
+    """
+    Apply a delta update to a report: each "## " section of `delta` replaces
+    the previous section with the same heading, and sections the previous
+    report didn't have go before the first section. Without any headings the
+    delta is returned as is.
+    """
+    updates = [(heading, block) for heading, block in _report_sections(delta) if heading]
+    if not updates:
+        return delta
+    replaced = {_heading_key(heading): block for heading, block in updates}
+    sections = _report_sections(previous)
+    merged = [replaced.pop(_heading_key(heading), block) if heading else block for heading, block in sections]
+    new_blocks = [block for heading, block in updates if _heading_key(heading) in replaced]
+    # After any preamble (a title line), before the first section
+    at = 1 if sections and sections[0][0] is None else 0
+    return "\n\n".join(merged[:at] + new_blocks + merged[at:])
+
+
+class SessionStore:
+    """
+    Analysis state on a pluggable backend (see cache_backends), so any replica
+    can pick up a session. `run:<session>:<role>:<cv hash>` holds one run's
+    state and `latest:<session>:<role>` points at the session's most recent
+    run; both expire after `ttl`. Runs are scoped to their session, so two
+    sessions submitting the same CV never read or overwrite each other's state.
+    """
+
+    def __init__(self, path: str = SESSION_STORE_PATH, max_bytes: int = SESSION_STORE_MAX_BYTES,
+                 ttl: float = SESSION_TTL, backend=None):
+        self.backend = backend or SQLiteBackend(path, max_bytes)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.counters = {"lookups": 0, "reused": 0, "incremental": 0, "saved": 0}
+
+    def record(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    @staticmethod
+    def _run_key(session_id: str, role: str, cv_hash: str) -> str:
+        return f"run:{session_id}:{normalise_query(role)}:{cv_hash}"
+
+    @staticmethod
+    def _latest_key(session_id: str, role: str) -> str:
+        return f"latest:{session_id}:{normalise_query(role)}"
+
+    def latest(self, session_id: str, role: str):
+        """State of the session's most recent run for `role`, or None."""
+        self.record("lookups")
+        pointer = self.backend.get(self._latest_key(session_id, role))
+        if not pointer:
+            return None
+        raw = self.backend.get(self._run_key(session_id, role, pointer.decode("utf-8")))
+        return json.loads(raw) if raw else None
+
+    def save(self, session_id: str, role: str, state: dict):
+        state = dict(state, role=role, saved_at=time.time())
+        self.backend.set_many({
+            self._run_key(session_id, role, state["cv_hash"]): json.dumps(state).encode("utf-8"),
+            self._latest_key(session_id, role): state["cv_hash"].encode("utf-8"),
+        }, ttl=self.ttl)
+        self.record("saved")
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+        counters["backend"] = self.backend.name
+        return counters
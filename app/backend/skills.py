@@ -0,0 +1,153 @@
+import json
+import os
+from collections import Counter, deque
+
+SKILLS_TAXONOMY_PATH = os.getenv(
+    "SKILLS_TAXONOMY_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "skills_taxonomy.json")
+)
+# Optional extra taxonomy merged over the bundled one (same JSON format)
+SKILLS_TAXONOMY_EXTRA = os.getenv("SKILLS_TAXONOMY_EXTRA")
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _joins(text: str, left: int, right: int) -> bool:
+    """
+    Whether text[left] and text[right] belong to the same token: adjacent word
+    characters, or word characters on either side of a "." or "@" (jane@mail.net).
+    """
+    if left < 0 or right >= len(text):
+        return False
+    if _is_word_char(text[left]) and _is_word_char(text[right]):
+        return True
+    if text[left] in ".@":
+        return left > 0 and _is_word_char(text[left - 1]) and _is_word_char(text[right])
+    if text[right] in ".@":
+        return right + 1 < len(text) and _is_word_char(text[left]) and _is_word_char(text[right + 1])
+    return False
+
+
+def load_taxonomy(path: str = SKILLS_TAXONOMY_PATH, extra_path: str = SKILLS_TAXONOMY_EXTRA):
+    """
+    Read {"skills": {canonical: [aliases]}, "ambiguous": [canonical]}.
+    Ambiguous names ("r", "go", "excel") are only matched through their aliases.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    skills = {k: list(v) for k, v in data["skills"].items()}
+    ambiguous = set(data.get("ambiguous", []))
+
+    if extra_path:
+        with open(extra_path, encoding="utf-8") as f:
+            extra = json.load(f)
+        for canonical, aliases in extra.get("skills", {}).items():
+            skills.setdefault(canonical, [])
+            skills[canonical].extend(a for a in aliases if a not in skills[canonical])
+        ambiguous |= set(extra.get("ambiguous", []))
+
+    return skills, ambiguous
+
+
+class SkillMatcher:
+    """
+    Aho-Corasick automaton over every skill name and alias. One pass over the
+    text finds all occurrences, so cost grows with text length plus matches,
+    not with the number of skills. Matches must sit on word boundaries and
+    overlapping matches resolve leftmost-longest ("react native" beats "react").
+    """
+
+    def __init__(self, skills: dict, ambiguous=()):
+        self.skills = skills
+        self._goto = [{}]
+        self._fail = [0]
+        # Per node: (term length, canonical)
+        self._out = [[]]
+
+        for canonical, aliases in skills.items():
+            terms = list(aliases) if canonical in ambiguous else [canonical, *aliases]
+            for term in terms:
+                self._add(" ".join(term.lower().split()), canonical)
+        self._build_failure_links()
+
+    def _add(self, term: str, canonical: str):
+        if not term:
+            return
+        node = 0
+        for ch in term:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(term), canonical))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                # Inherit matches that end here via the suffix link
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find(self, text: str) -> list:
+        """All (start, end, canonical) matches in the normalised text, leftmost-longest."""
+        text = " ".join(text.lower().split())
+        goto, fail, out = self._goto, self._fail, self._out
+        candidates = []
+        node = 0
+
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not out[node]:
+                continue
+            end = i + 1
+            for length, canonical in out[node]:
+                start = end - length
+                # A term that starts with punctuation (".net") still can't continue a word (mail.net)
+                if _joins(text, start - 1, start) or (start > 0 and _is_word_char(text[start - 1])):
+                    continue
+                if _joins(text, end - 1, end):
+                    continue
+                candidates.append((start, end, canonical))
+
+        candidates.sort(key=lambda m: (m[0], m[0] - m[1]))
+        matches = []
+        last_end = 0
+        for start, end, canonical in candidates:
+            if start >= last_end:
+                matches.append((start, end, canonical))
+                last_end = end
+        return matches
+
+    def extract(self, text: str) -> list:
+        """Unique canonical skills in order of first appearance."""
+        return list(dict.fromkeys(canonical for _, _, canonical in self.find(text)))
+
+    def count(self, text: str) -> Counter:
+        return Counter(canonical for _, _, canonical in self.find(text))
+
+
+_skills, _ambiguous = load_taxonomy()
+# Built once at import; every extractor in the app shares it
+default_matcher = SkillMatcher(_skills, _ambiguous)
+
+
+def extract_skills(text: str) -> list:
+    return default_matcher.extract(text)
+
+
+def count_skills(text: str) -> Counter:
+    return default_matcher.count(text)
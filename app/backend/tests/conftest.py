@@ -0,0 +1,69 @@
+"""
+Shared fixtures. Tests run offline against the stand-ins in benchmarks.fakes:
+
+    cd app/backend && python -m pytest -q
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import job_parser  # noqa: E402
+import market_profiles  # noqa: E402
+import registry  # noqa: E402
+from jd_cache import JDCache  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_globals(monkeypatch):
+    """
+    Undo what a test (or benchmarks.harness.use_offline_services) changes in
+    process-wide state: registry factories and built instances, the
+    environment, and the module settings the harness overrides.
+    """
+    environ = dict(os.environ)
+    monkeypatch.setattr(registry, "_factories", dict(registry._factories))
+    monkeypatch.setattr(registry, "_instances", dict(registry._instances))
+    monkeypatch.setattr(registry, "_locks", dict(registry._locks))
+    monkeypatch.setattr(market_profiles, "MARKET_PROFILE_ENABLED", market_profiles.MARKET_PROFILE_ENABLED)
+    monkeypatch.setattr(job_parser, "_domain_limiter", job_parser._domain_limiter)
+    yield
+    os.environ.clear()
+    os.environ.update(environ)
+
+
+@pytest.fixture
+def jd_cache(tmp_path):
+    """A throwaway page and search cache in place of the shared one."""
+    registry.register("jd_cache", lambda: JDCache(str(tmp_path / "jd.sqlite3")))
+    yield registry.get("jd_cache")
+
+
+@pytest.fixture
+def offline_stack():
+    """Fake Tavily, job board and Ollama with the registry pointed at them (see benchmarks.harness)."""
+    from benchmarks.fakes import FakeStack
+    from benchmarks.harness import use_offline_services
+
+    with FakeStack(search_latency=0.05, page_latency=0.01, llm_latency=0.05, llm_tokens=20) as stack:
+        use_offline_services(stack)
+        yield stack
+
+
+@pytest.fixture
+def api(offline_stack):
+    """The FastAPI app in-process. The lifespan (warm-up, health monitor) is skipped; resources load on use."""
+    from fastapi.testclient import TestClient
+
+    from app import app
+
+    return TestClient(app)
+
+
+@pytest.fixture(scope="session")
+def cv_pdf():
+    from benchmarks.harness import make_pdf
+
+    return make_pdf()
@@ -0,0 +1,73 @@
+"""Batch screening: results stream per group, and a group's queries share one embedding call."""
+import json
+
+import batch
+import registry
+from benchmarks.harness import CV_TEXT
+from retrieval import build_queries
+from skills import extract_skills
+
+ROLE = "Machine Learning Engineer"
+
+
+def sample_cvs(count: int) -> list:
+    variants = ("Terraform", "React", "Kafka", "Snowflake", "TensorFlow", "Redis")
+    return [(f"cv{i}.pdf", CV_TEXT + f"\nPROJECTS\nBuilt a {variants[i % len(variants)]} service #{i}.\n")
+            for i in range(count)]
+
+
+class CountingEmbeddings:
+    """Records how many texts each embed_documents call carried."""
+
+    def __init__(self, base):
+        self.base = base
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(len(texts))
+        return self.base.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.base.embed_query(text)
+
+
+def test_first_result_arrives_before_later_groups_are_matched(offline_stack, monkeypatch):
+    groups = []
+    match_cvs = batch.match_cvs
+    monkeypatch.setattr(batch, "match_cvs", lambda cvs, *args, **kwargs: groups.append(len(cvs)) or
+                        match_cvs(cvs, *args, **kwargs))
+
+    results = batch.run_batch(sample_cvs(10), ROLE, with_report=False, group_size=4)
+    first = next(results)
+    assert first["type"] == "result"
+    assert groups == [4]
+
+    rest = list(results)
+    assert groups == [4, 4, 2]
+    assert [r["type"] for r in rest] == ["result"] * 9 + ["summary"]
+    assert rest[-1]["cvs"] == 10 and rest[-1]["failures"] == 0
+
+
+def test_group_queries_are_embedded_together(offline_stack):
+    context = batch.prepare_role_context(ROLE)
+    counting = CountingEmbeddings(registry.get_embeddings())
+    registry.register("embeddings", lambda: counting)
+
+    matches = batch.match_cvs(sample_cvs(5), context)
+
+    # One call for the five CV vectors, then one for the distinct skill and section queries of all five
+    queries = {text for _, cv_text in sample_cvs(5)
+               for _, _, text in build_queries(cv_text, extract_skills(cv_text))}
+    assert counting.calls[:2] == [5, len(queries)]
+    assert len(queries) < sum(len(build_queries(cv_text, extract_skills(cv_text))) for _, cv_text in sample_cvs(5))
+    assert len(matches) == 5 and all(prompt["evidence"] for _, _, prompt in matches)
+
+
+def test_reports_stream_as_ndjson(api, cv_pdf):
+    files = [("cvs", (f"cv{i}.pdf", cv_pdf, "application/pdf")) for i in range(3)]
+    response = api.post("/batch/analyze", data={"role": ROLE}, files=files)
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["type"] for line in lines] == ["result"] * 3 + ["summary"]
+    assert all(line["report"].startswith("## Report") for line in lines[:3])
@@ -0,0 +1,81 @@
+"""Memory and SQLite cache backends: TTL expiry, LRU eviction by size, and identical behaviour."""
+import pytest
+
+import cache_backends
+from cache_backends import MemoryBackend, SQLiteBackend
+
+
+class Clock:
+    """Stands in for the time module so expiry and access order don't depend on sleeping."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_backends, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    def make(max_bytes: int = 1000):
+        if request.param == "memory":
+            return MemoryBackend(max_bytes)
+        return SQLiteBackend(str(tmp_path / "cache.sqlite3"), max_bytes, touch_interval=60)
+    return make
+
+
+def test_entries_expire_after_their_ttl(make_backend, clock):
+    backend = make_backend()
+    backend.set_many({"short": b"1", "forever": b"2"}, ttl=10)
+    backend.set("forever", b"2")
+    backend.set("never", b"3", ttl=0)
+
+    assert backend.get_many(["short", "forever", "never"]) == {"short": b"1", "forever": b"2"}
+    clock.now += 11
+    assert backend.get_many(["short", "forever", "never"]) == {"forever": b"2"}
+
+
+def test_least_recently_read_entry_is_evicted_first(make_backend, clock):
+    backend = make_backend(max_bytes=30)
+    for key in ("a", "b", "c"):
+        backend.set(key, b"x" * 10)
+        clock.now += 100
+    assert backend.get("a") == b"x" * 10
+    clock.now += 100
+
+    backend.set("d", b"x" * 10)
+
+    assert set(backend.get_many(["a", "b", "c", "d"])) == {"a", "c", "d"}
+    assert backend.stats()["evictions"] == 1
+    assert backend.stats()["bytes"] <= 30
+
+
+def test_replacing_and_deleting_keep_the_size_accurate(make_backend, clock):
+    backend = make_backend()
+    backend.set("k", b"x" * 100)
+    backend.set("k", b"x" * 40)
+    assert backend.stats()["bytes"] == 40
+    backend.delete("k")
+    assert backend.stats()["bytes"] == 0 and backend.get("k") is None
+
+
+def test_sqlite_reads_only_write_when_the_access_time_is_stale(tmp_path, clock):
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"), 1000, touch_interval=60)
+    backend.set("k", b"v")
+    writes = backend._conn.total_changes
+
+    for _ in range(10):
+        clock.now += 1
+        backend.get("k")
+    assert backend._conn.total_changes == writes
+
+    clock.now += 60
+    backend.get("k")
+    assert backend._conn.total_changes == writes + 1
@@ -0,0 +1,75 @@
+"""Evidence selection: token budget, near-duplicate and overlap removal, MMR ordering."""
+import numpy as np
+
+from context_builder import count_tokens, mmr_order, select_evidence, trim_overlap
+
+
+def words(start: int, stop: int) -> list:
+    return [f"w{i}" for i in range(start, stop)]
+
+
+def chunk(start: int, stop: int) -> str:
+    return " ".join(words(start, stop))
+
+
+def test_budget_is_never_exceeded():
+    candidates = [chunk(i * 100, i * 100 + 40) for i in range(10)]
+    per_chunk = count_tokens(candidates[0])
+    for budget in (0, per_chunk - 1, per_chunk, 3 * per_chunk + 5, 100 * per_chunk):
+        selection = select_evidence(candidates, budget)
+        assert selection["evidence_tokens"] <= budget
+        assert selection["evidence_tokens"] == sum(count_tokens(e) for e in selection["evidence"])
+    assert len(select_evidence(candidates, 3 * per_chunk + 5)["evidence"]) == 3
+
+
+def test_smaller_candidate_later_still_fills_the_budget():
+    candidates = [chunk(0, 40), chunk(100, 200), chunk(300, 310)]
+    budget = count_tokens(candidates[0]) + count_tokens(candidates[2])
+    assert select_evidence(candidates, budget)["evidence"] == [candidates[0], candidates[2]]
+
+
+def test_near_duplicates_are_dropped():
+    original = chunk(0, 50)
+    reworded = " ".join(words(0, 48) + ["extra", "tail"])
+    selection = select_evidence([original, reworded, chunk(100, 150)], 10_000)
+
+    assert selection["evidence"] == [original, chunk(100, 150)]
+    assert selection["duplicates_dropped"] == 1
+    assert selection["sources"] == [original, chunk(100, 150)]
+
+
+def test_neighbouring_chunk_overlap_is_trimmed():
+    # Chunker output: the second chunk repeats the last 10 words of the first
+    first, second = chunk(0, 60), chunk(50, 110)
+    selection = select_evidence([first, second], 10_000)
+
+    assert selection["evidence"] == [first, chunk(60, 110)]
+    # The untrimmed chunk is what the session remembers
+    assert selection["sources"] == [first, second]
+
+
+def test_trim_overlap_edges():
+    kept = words(0, 30)
+    assert trim_overlap(kept, words(20, 40)) == words(30, 40)
+    # A chunk ending where the kept one starts loses its tail instead
+    assert trim_overlap(kept, words(-15, 10)) == words(-15, 0)
+    # Below min_overlap nothing is trimmed
+    assert trim_overlap(kept, words(25, 40)) == words(25, 40)
+    # A chunk wholly inside the kept one is left to the near-duplicate check, not trimmed to nothing
+    assert trim_overlap(kept, words(20, 30)) == words(20, 30)
+
+
+def test_mmr_order_is_used_with_vectors():
+    query = np.array([1.0, 0.0, 0.0])
+    vectors = np.array([[0.0, 1.0, 0.0], [1.0, 0.05, 0.0], [1.0, 0.0, 0.05], [0.7, 0.0, 0.7]])
+    order = mmr_order(query, vectors)
+    assert order[0] == 1 and sorted(order) == [0, 1, 2, 3]
+    # Weighted towards diversity, the near copy of the first pick loses to a different candidate
+    diverse = mmr_order(query, vectors, lambda_mult=0.3)
+    assert diverse[0] == 1 and diverse.index(3) < diverse.index(2)
+
+    candidates = [chunk(i * 100, i * 100 + 20) for i in range(4)]
+    selection = select_evidence(candidates, 10_000, query, vectors)
+    assert selection["evidence"] == [candidates[i] for i in order]
+    # Without vectors the given order stands
+    assert select_evidence(candidates, 10_000)["evidence"] == candidates
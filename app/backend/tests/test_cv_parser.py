@@ -0,0 +1,61 @@
+"""PDF extraction: page-parallel workers are spawned, and a timed-out document doesn't keep them busy."""
+import multiprocessing
+import time
+
+import pytest
+
+import cv_parser
+from benchmarks.harness import CV_TEXT, make_pdf
+
+
+def _slow_extract(pdf_bytes: bytes, start: int, stop: int) -> list:
+    """Stands in for a page range that takes far longer than the budget."""
+    time.sleep(60)
+    return []
+
+
+@pytest.fixture
+def parallel(monkeypatch):
+    """Split even short documents across two fresh workers."""
+    monkeypatch.setattr(cv_parser, "PDF_PARALLEL_MIN_PAGES", 2)
+    monkeypatch.setattr(cv_parser, "PDF_WORKERS", 2)
+    monkeypatch.setattr(cv_parser, "_pool", None)
+    yield
+    if cv_parser._pool is not None:
+        cv_parser._recycle_pool(cv_parser._pool)
+
+
+def test_parallel_extraction_keeps_page_order(parallel):
+    result = cv_parser.extract_pages(make_pdf(pages=4), timeout=60)
+
+    assert len(cv_parser._pool.worker_pids()) == 2
+    assert [page["number"] for page in result["pages"]] == [1, 2, 3, 4]
+    assert "Machine learning engineer" in result["text"] and not result["truncated"]
+
+
+def test_timeout_stops_the_workers(parallel, monkeypatch):
+    monkeypatch.setattr(cv_parser, "_extract_page_range", _slow_extract)
+    recycled = []
+    recycle = cv_parser._recycle_pool
+    monkeypatch.setattr(cv_parser, "_recycle_pool", lambda pool: recycled.append(pool.worker_pids()) or recycle(pool))
+
+    started = time.monotonic()
+    with pytest.raises(cv_parser.PDFLimitError):
+        cv_parser.extract_pages(make_pdf(CV_TEXT + "timeout", pages=4), timeout=2)
+    assert time.monotonic() - started < 10
+
+    # The stuck workers were killed and the next document gets a fresh pool
+    assert len(recycled) == 1 and cv_parser._pool is None
+    workers = set(recycled[0])
+    assert len(workers) == 2
+    # active_children() reaps exited workers; the stuck ones must go well before their 60s task ends
+    for _ in range(100):
+        if not workers & {process.pid for process in multiprocessing.active_children()}:
+            break
+        time.sleep(0.05)
+    assert not workers & {process.pid for process in multiprocessing.active_children()}
+    monkeypatch.undo()
+    monkeypatch.setattr(cv_parser, "PDF_PARALLEL_MIN_PAGES", 2)
+    monkeypatch.setattr(cv_parser, "PDF_WORKERS", 2)
+    result = cv_parser.extract_pages(make_pdf(CV_TEXT + "after", pages=4), timeout=60)
+    assert len(result["pages"]) == 4
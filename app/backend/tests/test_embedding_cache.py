@@ -0,0 +1,57 @@
+"""On-disk vector store: row alignment after torn writes, and the size bound."""
+import os
+
+import numpy as np
+
+from embedding_cache import VectorStore
+
+DIM = 8
+ROW_BYTES = DIM * 4
+
+
+def vectors(start: int, stop: int) -> dict:
+    return {f"k{i}": np.full(DIM, i, dtype=np.float32) for i in range(start, stop)}
+
+
+def assert_aligned(found: dict):
+    assert found
+    for key, vector in found.items():
+        assert vector[0] == int(key[1:]), key
+
+
+def test_torn_append_is_cut_off_on_open(tmp_path):
+    store = VectorStore(str(tmp_path), max_bytes=100 * ROW_BYTES)
+    store.put_many(vectors(0, 20))
+    # A crash mid-append leaves part of a row behind
+    with open(tmp_path / "vectors.f32", "ab") as f:
+        f.write(b"\0" * 13)
+
+    reopened = VectorStore(str(tmp_path), max_bytes=100 * ROW_BYTES)
+    assert os.path.getsize(tmp_path / "vectors.f32") == 20 * ROW_BYTES
+    reopened.put_many(vectors(20, 40))
+    assert_aligned(reopened.get_many([f"k{i}" for i in range(40)]))
+
+
+def test_compaction_keeps_recently_read_rows(tmp_path):
+    store = VectorStore(str(tmp_path), max_bytes=100 * ROW_BYTES)
+    store.put_many(vectors(0, 90))
+    store.get_many([f"k{i}" for i in range(10)])
+    store.put_many(vectors(90, 120))
+
+    assert store.compactions == 1
+    assert len(store) <= 75
+    assert os.path.getsize(store._path(1)) == len(store) * ROW_BYTES
+    assert not os.path.exists(tmp_path / "vectors.f32")
+    found = store.get_many([f"k{i}" for i in range(120)])
+    assert_aligned(found)
+    assert all(f"k{i}" in found for i in range(10))
+
+
+def test_other_instances_follow_a_compaction(tmp_path):
+    writer = VectorStore(str(tmp_path), max_bytes=100 * ROW_BYTES)
+    reader = VectorStore(str(tmp_path), max_bytes=100 * ROW_BYTES)
+    writer.put_many(vectors(0, 60))
+    assert_aligned(reader.get_many(["k1", "k59"]))
+
+    writer.put_many(vectors(60, 120))
+    assert_aligned(reader.get_many([f"k{i}" for i in range(120)]))
@@ -0,0 +1,27 @@
+"""Readiness follows dependency health only; a saturated replica sheds new work at the submit endpoints."""
+import app as app_module
+from health import health_monitor
+
+
+def test_saturated_replica_stays_ready_and_refuses_new_analyses(api, cv_pdf, monkeypatch):
+    monkeypatch.setattr(health_monitor, "is_ready", lambda: True)
+    monkeypatch.setattr(app_module, "worker_saturation", lambda: 1.5)
+
+    ready = api.get("/readyz")
+    assert ready.status_code == 200 and ready.json()["saturation"] == 1.5
+
+    files = {"cv": ("cv.pdf", cv_pdf, "application/pdf")}
+    for path in ("/analyze", "/analyze/stream"):
+        response = api.post(path, data={"role": "Machine Learning Engineer"}, files=files)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"]
+    batch = api.post("/batch/analyze", data={"role": "Machine Learning Engineer"},
+                     files=[("cvs", ("cv.pdf", cv_pdf, "application/pdf"))])
+    assert batch.status_code == 503
+    # Polling an accepted job still works
+    assert api.get("/jobs/unknown").status_code == 404
+
+
+def test_unhealthy_dependencies_fail_readiness(api, monkeypatch):
+    monkeypatch.setattr(health_monitor, "is_ready", lambda: False)
+    assert api.get("/readyz").status_code == 503
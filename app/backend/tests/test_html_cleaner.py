@@ -0,0 +1,32 @@
+"""Job-page cleaning: JSON-LD postings first, and the size cap applies before any scan."""
+import json
+
+import html_cleaner
+from benchmarks.fakes import job_page
+from html_cleaner import clean_html
+
+DESCRIPTION = "<p>" + "Build and operate Python services on Kubernetes. " * 10 + "</p>"
+JSONLD = ('<script type="application/ld+json">'
+          + json.dumps({"@type": "JobPosting", "title": "Data Engineer", "description": DESCRIPTION})
+          + "</script>")
+
+
+def test_json_ld_posting_wins_over_the_page_body():
+    page = job_page(1).replace("</head>", JSONLD + "</head>")
+    text = clean_html(page)
+    assert "Build and operate Python services" in text
+    assert "Engineer #1" not in text
+
+
+def test_nothing_past_the_cap_is_read(monkeypatch):
+    page = job_page(1)
+    monkeypatch.setattr(html_cleaner, "HTML_MAX_CHARS", len(page))
+    scanned = []
+    extract = html_cleaner.extract_job_posting
+    monkeypatch.setattr(html_cleaner, "extract_job_posting", lambda html: scanned.append(len(html)) or extract(html))
+
+    # A posting hidden after a huge page body is beyond the cap
+    text = clean_html(page + "x" * 5_000_000 + JSONLD)
+
+    assert scanned == [len(page)]
+    assert "Engineer #1" in text and "Build and operate" not in text
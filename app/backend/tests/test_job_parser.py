@@ -0,0 +1,90 @@
+"""Concurrent job-page fetching against a local job board: deadline, per-domain limits, partial results."""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from benchmarks.fakes import FakeJobBoard
+from job_parser import DomainLimiter, afetch_stream
+
+
+@pytest.fixture
+def board():
+    server = FakeJobBoard(latency=0.2, jitter=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+def fetch_all(urls: list, limiter: DomainLimiter, deadline: float = 10, concurrency: int = 8) -> tuple:
+    """Run afetch_stream to completion; returns (results in completion order, elapsed seconds)."""
+
+    async def collect():
+        async with httpx.AsyncClient() as client:
+            return [item async for item in afetch_stream(urls, deadline=deadline, concurrency=concurrency,
+                                                         client=client, limiter=limiter)]
+
+    started = time.perf_counter()
+    results = asyncio.run(collect())
+    return results, time.perf_counter() - started
+
+
+def test_fetches_every_page_concurrently(jd_cache, board):
+    urls = [f"{board.url}/jobs/{i}" for i in range(6)]
+    results, elapsed = fetch_all(urls, DomainLimiter(per_domain=6, delay=0))
+
+    assert sorted(index for index, _, _ in results) == list(range(6))
+    assert all("Engineer #" in text for _, _, text in results)
+    # Six 0.2s pages in parallel, not one after another
+    assert elapsed < 0.2 * 6 / 2
+
+
+def test_caps_concurrent_requests_per_domain(jd_cache, board):
+    urls = [f"{board.url}/jobs/{i}" for i in range(6)]
+    results, elapsed = fetch_all(urls, DomainLimiter(per_domain=2, delay=0))
+
+    assert len(results) == 6
+    assert board.peak_in_flight == 2
+    # Three rounds of two
+    assert elapsed >= 0.2 * 3
+
+
+def test_spaces_requests_to_the_same_domain(jd_cache):
+    server = FakeJobBoard(latency=0, jitter=0)
+    server.start()
+    try:
+        urls = [f"{server.url}/jobs/{i}" for i in range(4)]
+        results, _ = fetch_all(urls, DomainLimiter(per_domain=4, delay=0.15))
+    finally:
+        server.stop()
+
+    assert len(results) == 4
+    gaps = [b - a for a, b in zip(server.arrivals, server.arrivals[1:])]
+    assert min(gaps) >= 0.12
+
+
+def test_deadline_returns_partial_results(jd_cache, board):
+    slow = FakeJobBoard(latency=3, jitter=0)
+    slow.start()
+    try:
+        fast_urls = [f"{board.url}/jobs/{i}" for i in range(3)]
+        slow_urls = [f"{slow.url}/jobs/{i}" for i in range(100, 102)]
+        results, elapsed = fetch_all(fast_urls + slow_urls, DomainLimiter(per_domain=4, delay=0), deadline=0.8)
+    finally:
+        slow.stop()
+
+    # The fast pages made it, the slow ones were abandoned at the deadline
+    assert sorted(url for _, url, _ in results) == sorted(fast_urls)
+    assert elapsed < 1.5
+
+
+def test_second_fetch_is_served_from_the_page_cache(jd_cache, board):
+    urls = [f"{board.url}/jobs/{i}" for i in range(3)]
+    first, _ = fetch_all(urls, DomainLimiter(per_domain=4, delay=0))
+    requests_after_first = board.requests
+    second, elapsed = fetch_all(urls, DomainLimiter(per_domain=4, delay=0))
+
+    assert board.requests == requests_after_first
+    assert sorted(text for _, _, text in second) == sorted(text for _, _, text in first)
+    assert elapsed < 0.2
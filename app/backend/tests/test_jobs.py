@@ -0,0 +1,95 @@
+"""The /jobs API on the in-process job store: submit, poll, cancel, and failures."""
+import time
+
+import pytest
+
+import registry
+from cache_backends import MemoryBackend
+from jobs import BackendJobStore, JobContext, JobManager
+
+TERMINAL = ("succeeded", "failed", "cancelled")
+
+
+def submit(api, cv_pdf, role: str = "Machine Learning Engineer") -> str:
+    response = api.post("/jobs", data={"role": role}, files={"cv": ("cv.pdf", cv_pdf, "application/pdf")})
+    assert response.status_code == 202
+    assert response.json()["status"] == "queued"
+    return response.json()["job_id"]
+
+
+def wait_for(api, job_id: str, timeout: float = 30) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = api.get(f"/jobs/{job_id}").json()
+        if job["status"] in TERMINAL:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} still {job['status']} after {timeout}s")
+
+
+@pytest.fixture
+def broken_llm():
+    """Every generation fails, as when Ollama drops mid-request. The registry is restored by isolated_globals."""
+
+    def unavailable():
+        raise ConnectionError("Ollama refused the connection")
+
+    registry.register("llm", unavailable)
+
+
+def test_submit_and_poll_until_done(api, offline_stack, cv_pdf):
+    job = wait_for(api, submit(api, cv_pdf))
+
+    assert job["status"] == "succeeded"
+    assert job["result"]["report"].startswith("## Report")
+    assert 0 <= job["result"]["score"]["score"] <= 100
+    assert job["progress"]["stage"] in ("context", "generate", "score")
+
+
+def test_pipeline_error_fails_the_job(api, offline_stack, cv_pdf, broken_llm):
+    job = wait_for(api, submit(api, cv_pdf))
+
+    assert job["status"] == "failed"
+    assert "Ollama refused the connection" in job["error"]
+    assert job.get("result") is None
+
+
+def test_cancel_a_running_job(api, offline_stack, cv_pdf):
+    # Slow generation, so the job is still streaming tokens when the cancel arrives
+    offline_stack.ollama.token_latency = 0.1
+    job_id = submit(api, cv_pdf)
+
+    response = api.delete(f"/jobs/{job_id}")
+    assert response.status_code == 200
+    assert wait_for(api, job_id)["status"] == "cancelled"
+    # Finished jobs can't be cancelled again
+    assert api.delete(f"/jobs/{job_id}").status_code == 409
+
+
+def test_unknown_job_is_404(api):
+    assert api.get("/jobs/does-not-exist").status_code == 404
+    assert api.delete("/jobs/does-not-exist").status_code == 409
+
+
+class CountingJobStore(BackendJobStore):
+    """A shared store that counts how often a job asks whether it was cancelled."""
+
+    polls = 0
+
+    def cancel_requested(self, job_id: str) -> bool:
+        self.polls += 1
+        return super().cancel_requested(job_id)
+
+
+def test_shared_store_cancellation_is_polled_at_most_once_per_interval():
+    store = CountingJobStore(MemoryBackend())
+    context = JobContext(JobManager(store), "job", poll_interval=0.2)
+
+    assert not any(context.cancelled() for _ in range(500))
+    assert store.polls == 1
+
+    # Cancelled from another replica: noticed on the first check after the interval
+    store.request_cancel("job")
+    assert not context.cancelled()
+    time.sleep(0.25)
+    assert context.cancelled() and store.polls == 2
@@ -0,0 +1,112 @@
+"""Report cache: exact and semantic hits, expiry, and the per-scope vector index."""
+import numpy as np
+import pytest
+
+import cache_backends
+import llm_cache
+from cache_backends import MemoryBackend
+from llm_cache import LLMCache, response_key, response_scope
+
+SCOPE = response_scope("llama3", "template {role}", "Data Engineer", ["Python", "sql"])
+EVIDENCE = ["Python and SQL required.", "Airflow   pipelines."]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_backends, "time", clock)
+    return clock
+
+
+def make_cache(**kwargs) -> LLMCache:
+    return LLMCache(backend=MemoryBackend(), ttl=100, **kwargs)
+
+
+def unit(*values) -> np.ndarray:
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_exact_hit_needs_the_same_scope_and_evidence():
+    cache = make_cache()
+    key = response_key(SCOPE, EVIDENCE)
+    cache.put(SCOPE, key, "## Report", 12.5)
+
+    # Order, whitespace and skill case don't change the key
+    same_scope = response_scope("llama3", "template {role}", " data engineer ", ["SQL", "python"])
+    assert response_key(same_scope, ["Airflow pipelines.", "Python and SQL required."]) == key
+    assert cache.get(SCOPE, key) == {"response": "## Report", "seconds": 12.5, "semantic": False}
+
+    other_model = response_scope("mistral", "template {role}", "Data Engineer", ["python", "sql"])
+    assert cache.get(other_model, response_key(other_model, EVIDENCE)) is None
+    assert cache.get(SCOPE, response_key(SCOPE, EVIDENCE + ["Kafka"])) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+    assert cache.stats()["seconds_saved"] == 12.5
+
+
+def test_semantic_hit_only_above_the_threshold():
+    cache = make_cache(semantic=True, threshold=0.95)
+    cache.put(SCOPE, response_key(SCOPE, EVIDENCE), "## Report", 10.0, vector=unit(1, 0, 0))
+
+    near = cache.get(SCOPE, response_key(SCOPE, ["drifted"]), vector=unit(1, 0.1, 0))
+    assert near is not None and near["semantic"] and near["response"] == "## Report"
+    assert cache.get(SCOPE, response_key(SCOPE, ["different"]), vector=unit(1, 1, 0)) is None
+    # Semantic matching never crosses scopes
+    other = response_scope("llama3", "template {role}", "Designer", ["figma"])
+    assert cache.get(other, response_key(other, ["drifted"]), vector=unit(1, 0.1, 0)) is None
+
+    assert not make_cache(semantic=False).get(SCOPE, "0" * 64, vector=unit(1, 0, 0))
+
+
+def test_semantic_match_on_an_expired_report_is_a_miss(clock):
+    cache = make_cache(semantic=True, threshold=0.95)
+    old_key = response_key(SCOPE, EVIDENCE)
+    cache.put(SCOPE, old_key, "## Old", 10.0, vector=unit(1, 0, 0))
+    clock.now += 60
+    # A later put renews the scope index, which still lists the old entry
+    cache.put(SCOPE, response_key(SCOPE, ["other"]), "## Other", 10.0, vector=unit(0, 1, 0))
+    clock.now += 60
+
+    assert [key for key, _ in cache._scope_index(SCOPE)][1] == old_key
+    assert cache.get(SCOPE, response_key(SCOPE, ["drifted"]), vector=unit(1, 0.1, 0)) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_scope_index_layout():
+    cache = make_cache(semantic=True)
+    keys = [response_key(SCOPE, [f"evidence {i}"]) for i in range(3)]
+    cache.put(SCOPE, keys[1], "report 1", 1.0, vector=np.full(4, 1, dtype=np.float32))
+    # A vector of another size can't share the index; the older entries are dropped
+    cache.put(SCOPE, keys[2], "report 2", 1.0, vector=np.ones(2, dtype=np.float32))
+    cache.put(SCOPE, keys[0], "report 0", 1.0, vector=np.zeros(2, dtype=np.float32))
+
+    raw = cache.backend.get("scope:" + SCOPE)
+    # 4-byte little-endian dimension, then per entry a 64-char hex key and dim float32s, newest first
+    assert int.from_bytes(raw[:4], "little") == 2
+    assert len(raw) == 4 + 2 * (64 + 2 * 4)
+    assert raw[4:68].decode("ascii") == keys[0]
+    index = cache._scope_index(SCOPE)
+    assert [key for key, _ in index] == [keys[0], keys[2]]
+    assert np.array_equal(index[1][1], np.ones(2, dtype=np.float32))
+
+
+def test_scope_index_is_capped_newest_first(monkeypatch):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_SCOPE_ENTRIES", 3)
+    cache = make_cache(semantic=True)
+    keys = [response_key(SCOPE, [f"evidence {i}"]) for i in range(5)]
+    for i, key in enumerate(keys):
+        cache.put(SCOPE, key, f"report {i}", 1.0, vector=np.full(4, i, dtype=np.float32))
+    # Re-putting a key moves it to the front instead of duplicating it
+    cache.put(SCOPE, keys[3], "report 3", 1.0, vector=np.full(4, 9, dtype=np.float32))
+
+    index = cache._scope_index(SCOPE)
+    assert [key for key, _ in index] == [keys[3], keys[4], keys[2]]
+    assert index[0][1][0] == 9
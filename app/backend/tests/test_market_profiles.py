@@ -0,0 +1,65 @@
+"""Market profiles: served only to replicas embedding the same way, and old versions pruned."""
+import os
+
+import pytest
+
+import embedding_backends
+import market_profiles
+import registry
+from benchmarks.bench_vectorstore import HashingEmbeddings
+from scoring import skill_demand
+from vectorstore import InMemoryIndex
+
+ROLE = "Data Engineer"
+JDS = ["We need Python, Spark and Airflow for batch pipelines.", "Kafka and SQL on AWS; Docker a plus."]
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    registry.register("embeddings", HashingEmbeddings)
+    monkeypatch.setattr(market_profiles, "MARKET_PROFILE_ENABLED", True)
+    monkeypatch.setattr(market_profiles, "_loaded", {})
+    return str(tmp_path)
+
+
+def publish(directory: str, **kwargs) -> str:
+    index = InMemoryIndex.from_texts(JDS, registry.get_embeddings())
+    context = {"role": ROLE, "jd_texts": JDS, "index": index, "demand": skill_demand(JDS)}
+    return market_profiles.save_profile(context, directory, **kwargs)
+
+
+def test_profile_loads_on_the_backend_it_was_built_with(profile_dir, monkeypatch):
+    monkeypatch.setattr(embedding_backends, "EMBEDDING_BACKEND", "onnx-int8")
+    version = publish(profile_dir)
+
+    profile = market_profiles.load_profile(ROLE, profile_dir)
+    assert profile["version"] == version
+    assert profile["embedding_model"].endswith("@onnx-int8")
+    assert profile["chunks"] == JDS
+
+
+def test_profile_from_another_backend_is_ignored(profile_dir, monkeypatch):
+    # Built by a job on the default fp32 backend, served by an int8 replica
+    monkeypatch.setattr(embedding_backends, "EMBEDDING_BACKEND", "torch")
+    publish(profile_dir)
+    monkeypatch.setattr(embedding_backends, "EMBEDDING_BACKEND", "onnx-int8")
+
+    assert market_profiles.load_profile(ROLE, profile_dir) is None
+
+
+def test_only_the_newest_versions_are_kept(profile_dir, monkeypatch):
+    versions = iter(["20260101T000000Z", "20260102T000000Z", "20260103T000000Z"])
+    monkeypatch.setattr(market_profiles.time, "strftime", lambda *args: next(versions))
+    for _ in range(3):
+        publish(profile_dir, keep=2)
+
+    role_dir = os.path.join(profile_dir, market_profiles.role_slug(ROLE))
+    assert sorted(os.listdir(role_dir)) == ["20260102T000000Z.json.gz", "20260102T000000Z.npz",
+                                            "20260103T000000Z.json.gz", "20260103T000000Z.npz", "LATEST"]
+    assert "skill_evidence" not in market_profiles.load_profile(ROLE, profile_dir)
+
+
+def test_keeping_no_versions_is_rejected(profile_dir):
+    with pytest.raises(ValueError, match="at least 1"):
+        publish(profile_dir, keep=0)
+    assert not os.path.exists(os.path.join(profile_dir, market_profiles.role_slug(ROLE)))
@@ -0,0 +1,69 @@
+"""Deterministic match score: skill coverage by demand, blended with similarity."""
+import numpy as np
+
+from benchmarks.bench_vectorstore import HashingEmbeddings
+from scoring import embedding_similarity, match_score, score_cv, skill_demand
+from vectorstore import InMemoryIndex
+
+JDS = [
+    "Python and SQL required; Spark a plus.",
+    "Strong Python, Docker and Kubernetes.",
+    "Python, SQL and Airflow for our data platform.",
+]
+
+
+def test_demand_counts_documents_and_mentions():
+    demand = skill_demand(JDS + ["Python, python and more Python."])
+    assert demand["python"] == {"jds": 4, "mentions": 6}
+    assert demand["sql"] == {"jds": 2, "mentions": 2}
+    assert demand["spark"] == {"jds": 1, "mentions": 1}
+
+
+def test_matched_missing_and_extra_split():
+    result = score_cv(["python", "docker", "react"], JDS)
+
+    assert [e["skill"] for e in result["matched"]] == ["python", "docker"]
+    # Most requested first, ties by mentions then name
+    assert [e["skill"] for e in result["missing"]] == ["sql", "airflow", "kubernetes", "spark"]
+    assert result["extra"] == ["react"]
+    # Python is asked for by 3 JDs and Docker by 1, out of 3 + 2 + 1 + 1 + 1 + 1 = 9
+    assert result["coverage"] == round(4 / 9, 4)
+    assert result["score"] == round(100 * 4 / 9, 1)
+    assert result["similarity"] is None and result["jd_count"] == 3
+
+
+def test_score_is_stable_across_calls():
+    embeddings = HashingEmbeddings()
+    index = InMemoryIndex.from_texts(JDS, embeddings)
+    query = np.array([embeddings.embed_query("Python engineer with SQL")])
+
+    results = [score_cv(["sql", "python"], JDS, index, query) for _ in range(5)]
+    assert all(r == results[0] for r in results)
+    assert results[0]["similarity"] is not None
+    # Skill order in the CV doesn't matter
+    assert score_cv(["python", "sql"], JDS, index, query)["score"] == results[0]["score"]
+
+
+def test_similarity_is_blended_by_weight():
+    demand = skill_demand(JDS)
+    coverage_only = match_score(["python"], demand, 3)["score"]
+    # A similarity at or above the ceiling rescales to 1.0
+    blended = match_score(["python"], demand, 3, similarity=0.9, similarity_weight=0.5)
+    assert blended["score"] == round(50 * coverage_only / 100 + 50, 1)
+
+
+def test_empty_cv_scores_zero_and_misses_everything():
+    result = score_cv([], JDS)
+    assert result["score"] == 0.0 and result["coverage"] == 0.0
+    assert result["matched"] == [] and len(result["missing"]) == len(skill_demand(JDS))
+
+
+def test_no_market_skills():
+    # Nothing to cover: the score rests on similarity alone, or is 0 without it
+    assert match_score(["python"], {}, 0)["score"] == 0.0
+    result = match_score(["python"], {}, 0, similarity=0.7)
+    assert result["score"] == 100.0 and result["coverage"] is None
+    assert result["extra"] == ["python"] and result["missing"] == []
+    # No index or no CV vector: no similarity either
+    assert embedding_similarity(None, np.zeros((1, 8))) is None
+    assert embedding_similarity(InMemoryIndex.from_texts(JDS, HashingEmbeddings()), None) is None
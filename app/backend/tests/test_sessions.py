@@ -0,0 +1,44 @@
+"""Incremental re-analysis: delta prompts only add unseen evidence, and runs stay within their session."""
+import pytest
+
+import registry
+from agent import run_analysis
+from benchmarks.bench_sessions import REVISED_CV, run
+from benchmarks.harness import CV_TEXT
+from sessions import SessionStore
+
+
+@pytest.fixture
+def session_store(tmp_path):
+    registry.register("session_store", lambda: SessionStore(str(tmp_path / "sessions.sqlite3")))
+    yield registry.get("session_store")
+
+
+def test_revision_prompt_skips_evidence_the_report_already_saw(offline_stack, session_store):
+    first = run(CV_TEXT, "s1")
+    revised = run(REVISED_CV, "s1")
+
+    assert revised["incremental"] and not revised["searched"]
+    assert revised["prompt_tokens"] < first["prompt_tokens"]
+    state = session_store.latest("s1", "Machine Learning Engineer")
+    # Stored as the raw retrieved chunks, without repeats
+    assert state["evidence"] and len(set(state["evidence"])) == len(state["evidence"])
+
+
+def test_score_only_run_keeps_the_report_to_revise(offline_stack, session_store):
+    run(CV_TEXT, "s1")
+    scored = run_analysis(REVISED_CV, "Machine Learning Engineer", skip_llm=True, session_id="s1")
+    assert scored["report"] is None
+
+    assert session_store.latest("s1", "Machine Learning Engineer")["report"]
+    assert run(REVISED_CV, "s1")["incremental"]
+
+
+def test_sessions_do_not_share_runs_of_the_same_cv(session_store):
+    role = "Machine Learning Engineer"
+    session_store.save("a", role, {"cv_hash": "h", "report": "report of a"})
+    session_store.save("b", role, {"cv_hash": "h", "report": "report of b"})
+
+    assert session_store.latest("a", role)["report"] == "report of a"
+    assert session_store.latest("b", role)["report"] == "report of b"
+    assert session_store.latest("c", role) is None
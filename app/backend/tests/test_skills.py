@@ -0,0 +1,38 @@
+"""Skill matching: word boundaries, emails and domains, overlaps and aliases."""
+import pytest
+
+from skills import SkillMatcher, extract_skills
+
+
+@pytest.mark.parametrize("text", [
+    "Contact: jane@mail.net, github.com/jane",
+    "visit example.net for details",
+    "jane.doe@python.org",
+    "https://react.dev.example.com",
+])
+def test_emails_and_domains_are_not_skills(text):
+    assert extract_skills(text) == []
+
+
+def test_punctuated_terms_still_match_on_their_own():
+    assert extract_skills("Built services in C# and C++ on .NET") == ["c#", "c++", ".net"]
+    assert extract_skills("csharp, cpp, dotnet") == ["c#", "c++", ".net"]
+    assert extract_skills("React.js and Node.js, python.") == ["react", "nodejs", "python"]
+
+
+def test_longest_match_wins():
+    assert extract_skills("Shipped two React Native apps") == ["react native"]
+    assert extract_skills("React and React Native") == ["react", "react native"]
+    assert extract_skills("ASP.NET Core services") == ["asp.net"]
+
+
+def test_ambiguous_names_only_match_through_aliases():
+    assert extract_skills("Let's go, R&D team, r") == []
+    assert extract_skills("Golang and R programming") == ["go", "r"]
+
+
+def test_matches_need_word_boundaries():
+    matcher = SkillMatcher({"java": [], "sql": ["postgresql"]})
+    assert matcher.extract("javascript mysql") == []
+    assert matcher.find("java, PostgreSQL") == [(0, 4, "java"), (6, 16, "sql")]
+    assert matcher.count("Java and java and SQL")["java"] == 2
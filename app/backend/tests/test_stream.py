@@ -0,0 +1,42 @@
+"""/analyze/stream end to end against the fake search, job board and Ollama."""
+import json
+
+
+def read_sse(body: str) -> list:
+    """[(event name, data)] from a server-sent event stream."""
+    frames = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        frames.append((fields["event"], json.loads(fields["data"])))
+    return frames
+
+
+def test_streams_stages_then_tokens_then_done(api, offline_stack, cv_pdf):
+    response = api.post("/analyze/stream", data={"role": "Machine Learning Engineer"},
+                        files={"cv": ("cv.pdf", cv_pdf, "application/pdf")})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    frames = read_sse(response.text)
+    names = [name for name, _ in frames]
+
+    finished = [data["stage"] for name, data in frames if name == "stage" and data["status"] == "done"]
+    for stage in ("search", "fetch", "chunk", "embed", "retrieve", "score", "context"):
+        assert stage in finished
+    # Stages, then the tokens, then exactly one done frame at the end
+    first_token = names.index("token")
+    assert "token" not in names[:first_token] and names[-1] == "done" and names.count("done") == 1
+    assert set(names[first_token:-1]) == {"token"}
+
+    tokens = [data["text"] for name, data in frames if name == "token"]
+    # Ollama's closing chunk carries no text
+    assert len([token for token in tokens if token]) == offline_stack.ollama.tokens
+    done = frames[-1][1]
+    assert done["report"] == "".join(tokens)
+    assert 0 <= done["score"]["score"] <= 100
+
+
+def test_rejects_a_non_pdf_upload(api):
+    response = api.post("/analyze/stream", data={"role": "Data Scientist"},
+                        files={"cv": ("cv.txt", b"plain text", "text/plain")})
+    assert response.status_code == 400
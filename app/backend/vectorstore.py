@@ -1,22 +1,151 @@
-from langchain_community.vectorstores import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
 
-def build_vector_store(chunks: list) -> Chroma:
+import numpy as np
+from registry import get_embeddings
+from observability import bind_context, get_logger
 
-    # Base embeddings
-    base_embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+# "ephemeral": per-request in-memory index (default)
+# "chroma": legacy shared, persisted "job_descriptions" collection
+VECTOR_STORE_MODE = os.getenv("VECTOR_STORE_MODE", "ephemeral")
+CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "./chroma_db")
+# A Chroma server shared by every replica; unset keeps the pod-local CHROMA_PERSIST_DIR
+CHROMA_HOST = os.getenv("CHROMA_HOST", "")
+CHROMA_PORT = int(os.getenv("CHROMA_PORT", 8000))
+CORPUS_INDEX_ENABLED = os.getenv("CORPUS_INDEX_ENABLED", "false").lower() == "true"
+CORPUS_COLLECTION = os.getenv("CORPUS_COLLECTION", "job_corpus")
+
+logger = get_logger(__name__)
+
+# Corpus writes happen off the request path, one at a time
+_corpus_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="corpus-writer")
+
+
+class InMemoryIndex:
+    """
+    Brute-force cosine index over one request's chunks. For the tens of chunks
+    a single analysis produces, a normalised matrix product beats any ANN
+    structure, touches no disk, and cannot leak evidence between requests.
+    """
+
+    def __init__(self, texts: list, vectors, embedding=None):
+        self.texts = list(texts)
+        self.embedding = embedding
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(self.texts), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.matrix = matrix / np.maximum(norms, 1e-12)
+
+    @classmethod
+    def from_texts(cls, texts: list, embedding):
+        vectors = embedding.embed_documents(texts) if texts else []
+        return cls(texts, vectors, embedding)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def search_matrix(self, query_vectors, k: int = 5):
+        """
+        Top-k for a batch of query vectors in one matrix product.
+        Returns (indices, scores), each of shape (n_queries, min(k, n_chunks)).
+        """
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        if not len(self.texts):
+            empty = np.empty((len(queries), 0))
+            return empty.astype(int), empty
+
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        scores = queries @ self.matrix.T
+        k = min(k, scores.shape[1])
+        # argpartition finds the top-k in O(n); only those k are then sorted
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+    def similarity_search_by_vector_with_score(self, vector, k: int = 5) -> list:
+        from langchain_core.documents import Document
+
+        indices, scores = self.search_matrix(vector, k)
+        return [(Document(page_content=self.texts[i]), float(s)) for i, s in zip(indices[0], scores[0])]
+
+    def similarity_search_by_vector(self, vector, k: int = 5) -> list:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(vector, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 5) -> list:
+        return self.similarity_search_by_vector_with_score(self.embedding.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 5) -> list:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+
+def chroma_location() -> dict:
+    """Where Chroma collections live: the shared server when CHROMA_HOST is set, else local disk."""
+    if CHROMA_HOST:
+        import chromadb
+        return {"client": chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)}
+    return {"persist_directory": CHROMA_PERSIST_DIR}
+
+
+def _build_chroma_store(chunks: list, embeddings):
+    from langchain_community.vectorstores import Chroma
 
     # Build vector store with Chroma using cached embeddings
     vector_store = Chroma.from_texts(
     texts=chunks,
-    embedding=base_embeddings,
+    embedding=embeddings,
     collection_name="job_descriptions",
-    persist_directory="./chroma_db"  # Local folder for persistence
+    **chroma_location()
+    )
+    if not CHROMA_HOST:
+        vector_store.persist()
+    return vector_store
+
+
+def get_corpus_index():
+    """Long-lived corpus of every JD chunk seen, kept apart from per-request indexes."""
+    from langchain_community.vectorstores import Chroma
+
+    return Chroma(
+        collection_name=CORPUS_COLLECTION,
+        embedding_function=get_embeddings(),
+        **chroma_location(),
     )
-    vector_store.persist()
+
+
+def add_to_corpus(chunks: list):
+    """Upsert chunks into the corpus index, keyed by content hash so repeats don't grow it."""
+    try:
+        ids = [hashlib.sha256(c.encode("utf-8")).hexdigest() for c in chunks]
+        unique = dict(zip(ids, chunks))
+        corpus = get_corpus_index()
+        existing = set(corpus.get(ids=list(unique)).get("ids", []))
+        new_ids = [i for i in unique if i not in existing]
+        if new_ids:
+            corpus.add_texts([unique[i] for i in new_ids], ids=new_ids)
+    except Exception as e:
+        logger.warning(f"⚠️ Corpus index update failed: {e}")
+
+
+def build_vector_store(chunks: list, mode: str = None):
+
+    # Shared embedding model, loaded once per process; repeat chunks come from the cache
+    base_embeddings = get_embeddings()
+    mode = mode or VECTOR_STORE_MODE
+
+    if mode == "chroma":
+        vector_store = _build_chroma_store(chunks, base_embeddings)
+    else:
+        vector_store = InMemoryIndex.from_texts(chunks, base_embeddings)
+
+    if CORPUS_INDEX_ENABLED and chunks:
+        # Embeddings are cached by now, so the background upsert is cheap
+        _corpus_writer.submit(bind_context(add_to_corpus), list(chunks))
 
     return vector_store
 
-def top_k(vector_store: Chroma, query: str, k: int = 5) -> list:
+def top_k(vector_store, query: str, k: int = 5) -> list:
     # Query the vector store
     return vector_store.similarity_search(query, k=k)
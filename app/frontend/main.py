@@ -1,6 +1,8 @@
 import streamlit as st
 import requests
+import json
 import os
+import uuid
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -24,30 +26,103 @@ with col2:
     st.markdown("• DevOps Engineer")
 
 cv = st.file_uploader("📄 Upload your CV (PDF)", type=["pdf"])
+# Re-submitting a revised CV in the same session updates the previous analysis
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = uuid.uuid4().hex
+stream = st.toggle("⚡ Stream results as they are generated", value=True)
+
+STAGE_LABELS = {
+    "profile": "📦 Loading the market profile for this role",
+    "session": "♻️ Reusing your previous analysis",
+    "search": "🔍 Searching job postings",
+    "fetch": "🌐 Fetching job descriptions",
+    "chunk": "✂️ Chunking job descriptions",
+    "embed": "🧠 Embedding evidence",
+    "retrieve": "🎯 Matching your skills",
+    "score": "📐 Scoring the match",
+    "context": "🧾 Packing evidence into the prompt",
+    "generate": "🤖 Writing your report",
+}
+
+def iter_sse(response):
+    """Yield the JSON payload of each server-sent event"""
+    response.encoding = "utf-8"
+    for line in response.iter_lines(decode_unicode=True):
+        if line and line.startswith("data: "):
+            yield json.loads(line[len("data: "):])
+
+def render_score(score):
+    """Headline match score with the most in-demand skills on each side"""
+    if not score:
+        return
+    st.metric("📐 Match score", f"{score['score']:.0f} / 100")
+    col_have, col_missing = st.columns(2)
+    with col_have:
+        st.markdown("**✅ Matched**")
+        st.markdown("\n".join(f"- {s['skill']} ({s['jds']} JDs)" for s in score["matched"][:10]) or "—")
+    with col_missing:
+        st.markdown("**❌ Missing**")
+        st.markdown("\n".join(f"- {s['skill']} ({s['jds']} JDs)" for s in score["missing"][:10]) or "—")
+
+def render_stream(files, data):
+    status = st.status("🤖 Analyzing your CV against job market requirements...", expanded=True)
+    score_box = st.empty()
+    report_box = st.empty()
+    report = ""
+    with requests.post(f"{API_URL}/analyze/stream", data=data, files=files, stream=True, timeout=(10, 180)) as response:
+        if not response.ok:
+            status.update(label="❌ Analysis failed", state="error")
+            st.error(f"❌ Error: {response.text}")
+            return
+        for event in iter_sse(response):
+            if event["event"] == "stage":
+                label = STAGE_LABELS.get(event["stage"], event["stage"])
+                if event["status"] == "start":
+                    status.write(f"{label}...")
+                elif event["status"] == "done":
+                    seconds = event.get("seconds")
+                    status.write(f"✅ {label}" + (f" ({seconds:.1f}s)" if seconds is not None else ""))
+                if event["stage"] == "score":
+                    with score_box.container():
+                        render_score(event["score"])
+            elif event["event"] == "token":
+                report += event["text"]
+                report_box.markdown(report)
+            elif event["event"] == "error":
+                status.update(label="❌ Analysis failed", state="error")
+                st.error(event["message"])
+                return
+            elif event["event"] == "done":
+                label = "✅ Analysis updated for your revised CV!" if event.get("incremental") else "✅ Analysis complete!"
+                status.update(label=label, state="complete", expanded=False)
+                report_box.markdown(event["report"])
 
 if st.button("🔍 Analyze My Career Gap", type="primary") and role and cv:
-    with st.spinner("🤖 Analyzing your CV against job market requirements..."):
-        try:
-            files = {"cv": (cv.name or "resume.pdf", cv.getvalue(), "application/pdf")}
-            data = {"role": role}
-            
-            response = requests.post(f"{API_URL}/analyze", data=data, files=files, timeout=180)
+    files = {"cv": (cv.name or "resume.pdf", cv.getvalue(), "application/pdf")}
+    data = {"role": role, "session_id": st.session_state["session_id"]}
+    try:
+        if stream:
+            render_stream(files, data)
+        else:
+            with st.spinner("🤖 Analyzing your CV against job market requirements..."):
+                response = requests.post(f"{API_URL}/analyze", data=data, files=files, timeout=180)
             
             if response.ok:
                 result = response.json()
                 st.success("✅ Analysis complete!")
+                render_score(result.get("score"))
                 st.markdown("---")
                 st.markdown(result["report"])
             else:
                 st.error(f"❌ Error: {response.text}")
-                
-        except requests.exceptions.ConnectionError:
-            st.error(f"❌ Cannot connect to backend server at {API_URL}")
-            st.info("💡 Make sure the FastAPI backend is running with: `python app.py`")
-        except requests.exceptions.Timeout:
-            st.error("⏰ Request timed out. The analysis is taking too long.")
-        except Exception as e:
-            st.error(f"❌ Request failed: {e}")
+            
+    except requests.exceptions.ConnectionError:
+        st.error(f"❌ Cannot connect to backend server at {API_URL}")
+        st.info("💡 Make sure the FastAPI backend is running with: `python app.py`")
+    except requests.exceptions.Timeout:
+        st.error("⏰ Request timed out. The analysis is taking too long.")
+    except Exception as e:
+        st.error(f"❌ Request failed: {e}")
 
 # Footer
 st.markdown("---")